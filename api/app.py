@@ -1,85 +1,952 @@
 """
 API Flask pour la détection de Fake News
 Projet FCC - Federal Communications Commission
+
+Avec un serveur WSGI, passer par la fabrique pour charger les modèles au
+démarrage :
+    gunicorn --chdir api 'app:create_app()'
 """
 
-from flask import Flask, request, jsonify
+import time
+
+# Début de l'import du module : référence du temps de démarrage (voir /ready)
+IMPORT_STARTED = time.perf_counter()
+
+from flask import Flask, Response, request, jsonify, has_request_context
 from flask_cors import CORS
-import pickle
+import atexit
+import logging
 import os
+import hmac
+import random
 import sys
+import threading
+
+# Permet d'importer les modules voisins (config, ...) quel que soit le point
+# d'entrée : `python app.py` depuis api/ ou `gunicorn api.app:app` depuis la racine
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from cache import PredictionCache, text_hash
+from dedup import NearDuplicate, NearDuplicateIndex
+from store import PredictionStore
+from sessions import DraftScorer, SessionStore, apply_edits
+import formats
+from shadow import ShadowScorer
+from governor import Overloaded, ResourceGovernor, limit_threads, set_thread_environment
+from loader import WARMUP_TEXTS, load_release, release_dir, set_current_release, current_release, warm_up, memory_usage
+from inference import Cascade, LongTextPolicy, top_contributions
+from metrics import CONTENT_TYPE, SIZE_BUCKETS, MetricsRegistry
+from logs import setup_logging
 
 # Configuration
 app = Flask(__name__)
 CORS(app)  # Active CORS pour permettre les requêtes depuis le frontend
 
-# Variables globales pour stocker le modèle et le vectorizer
+# Taille maximale du corps des requêtes (Flask répond 413 au-delà)
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_BODY_BYTES
+
+# Journalisation non bloquante (file + thread d'écriture, voir logs.py)
+setup_logging(Config.LOG_LEVEL, Config.LOG_FORMAT)
+logger = logging.getLogger('fcc.api')
+request_logger = logging.getLogger('fcc.requests')
+
+# Version active du modèle : un seul ModelBundle, remplacé d'un bloc (une
+# affectation est atomique). Chaque requête lit `bundle` UNE fois au début et
+# garde cette version jusqu'à sa réponse, même si un rechargement a lieu entre-temps.
+bundle = None
+
+# Alias de la version active (lecture seule, mis à jour avec `bundle`)
 model = None
 vectorizer = None
+scorer = None
+model_version = None
+model_format = None
+load_time_ms = None
 
-def load_models():
+# Rechargement à chaud : un seul à la fois, état exposé dans /health.
+# `reload_trigger` est remplacé par le serveur pré-forké (signal au maître).
+reload_lock = threading.Lock()
+reload_status = {'state': 'idle', 'error': None, 'finished_at': None}
+reload_trigger = None
+
+# Démarrage : état exposé par /ready (starting, loading, ready ou failed) et
+# durée de chaque phase en secondes
+startup = {'state': 'starting', 'error': None}
+startup_lock = threading.Lock()
+
+# Traitement à coût borné des textes longs
+long_text_policy = LongTextPolicy(
+    mode=Config.LONG_TEXT_MODE,
+    threshold_chars=Config.LONG_TEXT_CHARS,
+    token_budget=Config.TOKEN_BUDGET,
+    chunk_tokens=Config.CHUNK_TOKENS
+)
+
+# Cascade vers le second modèle de la version active (s'il existe)
+cascade = Cascade(
+    low=Config.CASCADE_LOW,
+    high=Config.CASCADE_HIGH,
+    max_chars=Config.LONG_TEXT_CHARS
+)
+
+# Cache des prédictions, vidé à chaque (re)chargement du modèle
+prediction_cache = PredictionCache(
+    max_size=Config.CACHE_MAX_SIZE if Config.CACHE_ENABLED else 0,
+    ttl_seconds=Config.CACHE_TTL_SECONDS
+)
+
+# Index des quasi-doublons (dépêches reprises), vidé avec le cache
+near_duplicates = NearDuplicateIndex(
+    threshold=Config.DEDUP_THRESHOLD,
+    max_size=Config.DEDUP_MAX_SIZE if Config.DEDUP_ENABLED else 0,
+    ttl_seconds=Config.DEDUP_TTL_SECONDS,
+    min_tokens=Config.DEDUP_MIN_TOKENS,
+    max_tokens=Config.TOKEN_BUDGET
+)
+
+# Historique persistant des prédictions (désactivé sans FCC_STORE_PATH)
+prediction_store = PredictionStore(
+    Config.STORE_PATH,
+    batch_size=Config.STORE_BATCH_SIZE,
+    flush_seconds=Config.STORE_FLUSH_SECONDS,
+    queue_size=Config.STORE_QUEUE_SIZE,
+    retention_days=Config.STORE_RETENTION_DAYS,
+    max_rows=Config.STORE_MAX_ROWS,
+    compact_seconds=Config.STORE_COMPACT_SECONDS
+) if Config.STORE_PATH else None
+if prediction_store is not None:
+    atexit.register(prediction_store.close)
+
+# Évaluation fantôme du modèle candidat (chargé au démarrage si FCC_SHADOW_RELEASE)
+shadow = None
+
+# Sessions d'édition : état de scoring des brouillons, propre à chaque processus
+sessions = SessionStore(
+    max_sessions=Config.SESSION_MAX_COUNT,
+    ttl_seconds=Config.SESSION_TTL_SECONDS
+)
+
+# Threads BLAS/OpenMP par processus (fixés avant le premier import de numpy)
+# et contrôle d'admission des inférences ; pools limités listés dans /health
+set_thread_environment(Config.INFERENCE_THREADS)
+governor = ResourceGovernor(
+    max_concurrent=Config.MAX_CONCURRENT_INFERENCES,
+    max_queue=Config.ADMISSION_MAX_QUEUE,
+    max_wait_seconds=Config.ADMISSION_MAX_WAIT_MS / 1000
+)
+thread_pools = []
+
+# Métriques Prometheus, exposées sur /metrics
+metrics = MetricsRegistry()
+request_duration = metrics.histogram(
+    'fcc_request_duration_seconds', 'Durée totale des requêtes HTTP', ['endpoint'])
+stage_duration = metrics.histogram(
+    'fcc_stage_duration_seconds',
+    'Durée par étape : parse et response par requête, dedup, vectorize, score et second_stage par texte',
+    ['endpoint', 'stage'])
+request_size = metrics.histogram(
+    'fcc_request_size_bytes', 'Taille du corps des requêtes', ['endpoint'], SIZE_BUCKETS)
+response_size = metrics.histogram(
+    'fcc_response_size_bytes', 'Taille du corps des réponses', ['endpoint'], SIZE_BUCKETS)
+requests_total = metrics.counter(
+    'fcc_requests_total', 'Requêtes HTTP par endpoint et code de statut', ['endpoint', 'status'])
+errors_total = metrics.counter(
+    'fcc_errors_total', 'Réponses en erreur (client = 4xx, server = 5xx)', ['endpoint', 'kind'])
+predictions_total = metrics.counter(
+    'fcc_predictions_total', 'Prédictions renvoyées par label', ['label'])
+requests_in_flight = metrics.gauge(
+    'fcc_requests_in_flight', 'Requêtes en cours de traitement')
+model_load_seconds = metrics.gauge(
+    'fcc_model_load_seconds', 'Durée du dernier chargement des modèles')
+model_info = metrics.gauge(
+    'fcc_model_info', 'Modèle chargé (version et format)', ['version', 'format'])
+startup_seconds = metrics.gauge(
+    'fcc_startup_seconds', 'Durée du démarrage par phase (import, load, warmup, ready)', ['phase'])
+admission_rejected = metrics.counter(
+    'fcc_admission_rejected_total', 'Requêtes refusées par le contrôle d\'admission (503)', ['reason'])
+admission_queue_depth = metrics.gauge(
+    'fcc_admission_queue_depth', 'Requêtes en attente d\'un créneau d\'inférence')
+admission_queue_depth.set_function(lambda: governor.waiting)
+metrics.gauge('fcc_inferences_active', 'Inférences en cours').set_function(lambda: governor.active)
+metrics.counter('fcc_cache_hits_total', 'Prédictions servies par le cache').set_function(
+    lambda: prediction_cache.stats()['hits'])
+metrics.counter('fcc_cache_misses_total', 'Prédictions absentes du cache').set_function(
+    lambda: prediction_cache.stats()['misses'])
+metrics.counter('fcc_store_written_total', 'Prédictions écrites dans l\'historique').set_function(
+    lambda: prediction_store.written if prediction_store is not None else 0)
+metrics.counter('fcc_store_dropped_total', 'Prédictions non enregistrées (file pleine)').set_function(
+    lambda: prediction_store.dropped if prediction_store is not None else 0)
+metrics.counter('fcc_near_duplicate_hits_total', 'Verdicts repris d\'un quasi-doublon').set_function(
+    lambda: near_duplicates.stats()['hits'])
+metrics.counter('fcc_cascade_escalations_total', 'Textes rescorés par le second étage de la cascade').set_function(
+    lambda: cascade.escalated)
+metrics.counter('fcc_shadow_compared_total', 'Prédictions rescorées par le modèle candidat').set_function(
+    lambda: shadow.compared if shadow is not None else 0)
+metrics.counter('fcc_shadow_agreements_total', 'Prédictions où le candidat donne le même label').set_function(
+    lambda: shadow.agreed if shadow is not None else 0)
+metrics.counter('fcc_shadow_dropped_total', 'Prédictions non rescorées (file pleine)').set_function(
+    lambda: shadow.dropped if shadow is not None else 0)
+metrics.gauge('fcc_sessions_active', 'Sessions d\'édition ouvertes').set_function(
+    lambda: sessions.stats()['active'])
+shadow_duration = metrics.histogram(
+    'fcc_shadow_candidate_duration_seconds', 'Durée du scoring d\'un texte par le modèle candidat')
+shadow_drift = metrics.histogram(
+    'fcc_shadow_probability_drift', 'Écart absolu de probabilité « Reliable News » (candidat - actif)', (),
+    (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0))
+
+def load_release_bundle(release=None):
     """
-    Charge le modèle et le vectorizer depuis les fichiers .pkl
-    Cette fonction est appelée UNE SEULE FOIS au démarrage de l'API
+    Charge et préchauffe une version publiée, sans l'activer.
+    Lève une exception si les fichiers sont absents ou illisibles.
     """
-    global model, vectorizer
-    
-    print("=" * 60)
-    print("🚀 CHARGEMENT DES MODÈLES")
-    print("=" * 60)
+    new_bundle = load_release(Config.MODEL_DIR, release, Config.MODEL_FORMAT, log=logger.info,
+                              precision=Config.MODEL_PRECISION, second_stage=Config.CASCADE_ENABLED)
+    warm_up(new_bundle.scorer, second_stage=new_bundle.second_stage)
+    return new_bundle
+
+
+def activate_bundle(new_bundle):
+    """Remplace la version active d'un seul bloc"""
+    global bundle, model, vectorizer, scorer, model_version, model_format, load_time_ms
+    bundle = new_bundle
+    model, vectorizer, scorer = new_bundle.model, new_bundle.vectorizer, new_bundle.scorer
+    model_version, model_format = new_bundle.version, new_bundle.format
+    load_time_ms = new_bundle.load_time_ms
     
-    # Obtenir le chemin absolu du dossier 'models'
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    models_dir = os.path.join(base_dir, '..', 'models')
+    prediction_cache.clear()
+    near_duplicates.clear()
+    if shadow is not None:
+        # Les comparaisons portent sur la version active
+        shadow.reset()
     
-    # Chemins complets des fichiers
-    model_path = os.path.join(models_dir, 'fake_news_model.pkl')
-    vectorizer_path = os.path.join(models_dir, 'tfidf_vectorizer.pkl')
+    model_load_seconds.set(load_time_ms / 1000)
+    model_info.clear()
+    model_info.set(1, model_version, model_format)
     
-    print(f"\n📂 Dossier models: {os.path.abspath(models_dir)}")
-    print(f"📄 Chemin modèle: {model_path}")
-    print(f"📄 Chemin vectorizer: {vectorizer_path}")
+    # Afficher les informations
+    memory = memory_usage()
+    logger.info("✅ MODÈLES CHARGÉS AVEC SUCCÈS!", extra={'fields': {
+        'model': type(model).__name__ if model is not None else None,
+        'vectorizer': type(vectorizer).__name__ if vectorizer is not None else None,
+        'features': scorer.n_features,
+        'second_stage': type(new_bundle.second_stage).__name__ if new_bundle.second_stage is not None else None,
+        'release': new_bundle.release,
+        'version': model_version,
+        'format': model_format,
+        'load_time_ms': round(load_time_ms, 1),
+        'rss_mb': memory.get('VmRSS'),
+        'private_mb': memory.get('RssAnon'),
+        'mapped_mb': memory.get('RssFile'),
+    }})
+
+
+def load_models():
+    """
+    Charge le modèle et le vectorizer de la version active (models/CURRENT,
+    sinon fichiers .pkl de models/). Appelée au démarrage de l'API ; en cas
+    d'échec, le processus s'arrête.
+    """
+    logger.info("🚀 CHARGEMENT DES MODÈLES")
     
-    # Vérifier que les fichiers existent
-    if not os.path.exists(model_path):
-        print(f"\n❌ ERREUR: Modèle non trouvé à {model_path}")
-        print("💡 Assurez-vous d'avoir copié fake_news_model.pkl dans models/")
+    try:
+        activate_bundle(load_release_bundle())
+        logger.info("🚀 L'API est prête à recevoir des requêtes!")
+        
+    except FileNotFoundError as e:
+        logger.error(f"❌ ERREUR: {e}")
+        logger.error("💡 Assurez-vous d'avoir copié fake_news_model.pkl et tfidf_vectorizer.pkl dans models/")
         sys.exit(1)
-    
-    if not os.path.exists(vectorizer_path):
-        print(f"\n❌ ERREUR: Vectorizer non trouvé à {vectorizer_path}")
-        print("💡 Assurez-vous d'avoir copié tfidf_vectorizer.pkl dans models/")
+        
+    except Exception:
+        logger.exception("❌ ERREUR lors du chargement des modèles")
         sys.exit(1)
+
+
+def reload_models():
+    """
+    Recharge la version active en arrière-plan : chargement et préchauffage
+    dans un thread, puis remplacement atomique. Les requêtes en cours
+    terminent sur l'ancienne version. Si le chargement échoue, l'ancienne
+    version reste active et models/CURRENT est rétabli.
+    Retourne False si un rechargement est déjà en cours.
+    """
+    if not reload_lock.acquire(blocking=False):
+        return False
+    reload_status.update(state='loading', error=None)
     
+    def run():
+        previous = bundle
+        try:
+            activate_bundle(load_release_bundle())
+            prefill_cache()
+            reload_status.update(state='idle', error=None)
+        except Exception as e:
+            logger.exception("❌ Rechargement impossible, la version actuelle est conservée")
+            reload_status.update(state='failed', error=str(e))
+            if previous is not None:
+                set_current_release(Config.MODEL_DIR, previous.release)
+        finally:
+            reload_status['finished_at'] = time.time()
+            reload_lock.release()
+            
+    threading.Thread(target=run, name='model-reload', daemon=True).start()
+    return True
+
+
+def trigger_reload():
+    """Déclenche un rechargement (dans ce processus, ou via le serveur pré-forké)"""
+    if reload_trigger is not None:
+        reload_trigger()
+        return True
+    return reload_models()
+
+
+def start_model_watcher(interval=None):
+    """
+    Surveille models/CURRENT toutes les `interval` secondes et recharge dès
+    que la version demandée diffère de la version active (0 : désactivé)
+    """
+    interval = Config.MODEL_WATCH_INTERVAL if interval is None else interval
+    if interval <= 0:
+        return None
+        
+    def watch():
+        while True:
+            time.sleep(interval)
+            active = bundle
+            if active is not None and not reload_lock.locked() \
+                    and current_release(Config.MODEL_DIR) != active.release:
+                logger.info("👀 Nouvelle version demandée dans models/CURRENT")
+                trigger_reload()
+                
+    thread = threading.Thread(target=watch, name='model-watcher', daemon=True)
+    thread.start()
+    return thread
+
+
+def process_age():
+    """Secondes écoulées depuis le lancement du processus (Linux), ou None"""
+    try:
+        with open('/proc/self/stat') as f:
+            started = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(uptime - started / os.sysconf('SC_CLK_TCK'), 0.0)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def warm_up_app():
+    """
+    Préchauffe le chemin complet des requêtes (routage Flask, JSON, cache,
+    textes longs) avec des textes synthétiques, pour que la première vraie
+    requête ne paie pas ces initialisations. Ces requêtes ne sont pas comptées
+    dans les métriques ; le cache et l'index des quasi-doublons sont vidés ensuite.
+    """
+    client = app.test_client()
+    environ = {'fcc.warmup': True}
+    long_text = ' '.join(WARMUP_TEXTS) * (Config.LONG_TEXT_CHARS // len(' '.join(WARMUP_TEXTS)) + 1)
+    for text in WARMUP_TEXTS + [long_text]:
+        client.post('/predict', json={'text': text}, environ_base=environ)
+    client.post('/predict/batch', json={'texts': WARMUP_TEXTS}, environ_base=environ)
+    client.get('/health', environ_base=environ)
+    prediction_cache.clear()
+    near_duplicates.clear()
+
+
+def prefill_cache():
+    """
+    Préremplit le cache avec les dernières prédictions de l'historique pour la
+    version active (les textes déjà vus ne sont pas rescorés après un
+    redémarrage). Retourne le nombre de prédictions chargées.
+    """
+    current = bundle
+    if prediction_store is None or current is None or prediction_cache.max_size <= 0:
+        return 0
     try:
-        # Charger le modèle
-        print("\n⏳ Chargement du modèle...")
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
-        print("✅ Modèle chargé avec succès!")
-        
-        # Charger le vectorizer
-        print("⏳ Chargement du vectorizer...")
-        with open(vectorizer_path, 'rb') as f:
-            vectorizer = pickle.load(f)
-        print("✅ Vectorizer chargé avec succès!")
-        
-        # Afficher les informations
-        print("\n" + "=" * 60)
-        print("📊 INFORMATIONS SUR LES MODÈLES")
-        print("=" * 60)
-        print(f"🤖 Modèle: {type(model).__name__}")
-        print(f"📝 Vectorizer: {type(vectorizer).__name__}")
-        print(f"📈 Nombre de features: {vectorizer.max_features}")
-        print("=" * 60)
-        
-        print("\n✅ MODÈLES CHARGÉS AVEC SUCCÈS!")
-        print("🚀 L'API est prête à recevoir des requêtes!\n")
+        records = prediction_store.latest(current.version, min(Config.STORE_WARM_SIZE, prediction_cache.max_size))
+    except Exception:
+        logger.exception("⚠️  Lecture de l'historique impossible, cache non prérempli")
+        return 0
+    # Du plus ancien au plus récent : les plus récents restent en tête du LRU
+    for digest, prediction, probabilities, details in reversed(records):
+        prediction_cache.put(PredictionCache.key_for_hash(digest, current.version),
+                             (prediction, probabilities, details, None))
+    logger.info("🗄️  Cache prérempli depuis l'historique", extra={'fields': {
+        'predictions': len(records), 'version': current.version}})
+    return len(records)
+
+
+def predict_candidate(candidate, text):
+    """Scoring du modèle candidat, avec le même traitement des textes longs"""
+    counts, details = vectorize(text, candidate)
+    prediction, probabilities = long_text_policy.combine(candidate.scorer, counts)
+    return prediction, probabilities, details
+
+
+def observe_shadow(drift, seconds):
+    """Histogrammes d'une comparaison fantôme (l'accord est compté par ShadowScorer)"""
+    shadow_duration.observe(seconds)
+    shadow_drift.observe(abs(drift))
+
+
+def load_shadow():
+    """
+    Charge et préchauffe le modèle candidat de l'évaluation fantôme
+    (FCC_SHADOW_RELEASE). En cas d'échec, l'API démarre sans évaluation fantôme.
+    """
+    global shadow
+    if not Config.SHADOW_RELEASE or shadow is not None:
+        return
+    try:
+        candidate = load_release(Config.MODEL_DIR, Config.SHADOW_RELEASE, Config.MODEL_FORMAT, log=logger.info,
+                                 precision=Config.MODEL_PRECISION, second_stage=False)
+        warm_up(candidate.scorer)
+    except Exception:
+        logger.exception(f"⚠️  Modèle candidat {Config.SHADOW_RELEASE!r} non chargé, évaluation fantôme désactivée")
+        return
+    shadow = ShadowScorer(
+        candidate,
+        predict_candidate,
+        sample_rate=Config.SHADOW_SAMPLE_RATE,
+        workers=Config.SHADOW_WORKERS,
+        queue_size=Config.SHADOW_QUEUE_SIZE,
+        on_result=observe_shadow,
+        # Scoring du candidat pendant le temps libre du processus uniquement
+        busy=lambda: requests_in_flight.value() > 0
+    )
+    logger.info("👥 Évaluation fantôme activée", extra={'fields': {
+        'release': candidate.release, 'version': candidate.version, 'sample_rate': Config.SHADOW_SAMPLE_RATE}})
+
+
+def submit_shadow(text, prediction, probabilities):
+    """
+    Confie une prédiction renvoyée à l'évaluation fantôme. Dans une requête
+    Flask, le dépôt est fait une fois la réponse envoyée (voir
+    record_request_metrics).
+    """
+    if shadow is None or is_warmup_request():
+        return
+    if has_request_context():
+        request.environ.setdefault('fcc.shadow', []).append((text, prediction, probabilities))
+    else:
+        shadow.submit(text, prediction, probabilities)
+
+
+def record_prediction(text, endpoint, version, prediction, probabilities, details, duration):
+    """Dépose une prédiction renvoyée dans l'historique (sans attendre l'écriture)"""
+    if prediction_store is not None and not is_warmup_request():
+        prediction_store.record(text, version, endpoint, prediction, probabilities, details,
+                                round(duration * 1000, 3))
+
+
+def is_warmup_request():
+    return has_request_context() and request.environ.get('fcc.warmup', False)
+
+
+def start_up():
+    """
+    Charge les modèles puis préchauffe l'API, en mesurant chaque phase.
+    /ready répond 200 une fois cette fonction terminée.
+    """
+    with startup_lock:
+        if startup['state'] != 'starting':
+            return
+        startup['state'] = 'loading'
         
-    except Exception as e:
-        print(f"\n❌ ERREUR lors du chargement des modèles:")
-        print(f"   {str(e)}")
-        sys.exit(1)
+    try:
+        start = time.perf_counter()
+        if bundle is None:
+            load_models()
+        load_shadow()
+        # numpy et les bibliothèques BLAS sont chargés : limiter leurs pools de threads
+        thread_pools[:] = limit_threads(Config.INFERENCE_THREADS)
+        loaded = time.perf_counter()
+        warm_up_app()
+        prefill_cache()
+        ready = time.perf_counter()
+    except BaseException as e:
+        # load_models() termine le processus (SystemExit) : garder l'état pour /ready
+        startup.update(state='failed', error=str(e) or type(e).__name__)
+        raise
+        
+    age = process_age()
+    phases = {
+        'import': IMPORT_FINISHED - IMPORT_STARTED,
+        'load': loaded - start,
+        'warmup': ready - loaded,
+        # Depuis le lancement du processus (interpréteur compris) si disponible
+        'ready': age if age is not None else ready - IMPORT_STARTED,
+    }
+    for phase, seconds in phases.items():
+        startup_seconds.set(seconds, phase)
+    startup.update({f'{phase}_seconds': round(seconds, 4) for phase, seconds in phases.items()})
+    startup['state'] = 'ready'
+    logger.info("🚦 API prête", extra={'fields': {
+        f'{phase}_ms': round(seconds * 1000, 1) for phase, seconds in phases.items()
+    }})
+
+
+def create_app(load=True, background=None):
+    """
+    Fabrique de l'application : charge et préchauffe les modèles sous
+    n'importe quel serveur WSGI. Avec `background` (FCC_BACKGROUND_LOAD=1),
+    le chargement se fait dans un thread : /health répond tout de suite,
+    /ready seulement une fois les modèles prêts.
+    """
+    background = Config.BACKGROUND_LOAD if background is None else background
+    if load and startup['state'] == 'starting':
+        if background:
+            threading.Thread(target=start_up, name='model-startup', daemon=True).start()
+        else:
+            start_up()
+        start_model_watcher()
+    return app
+
+
+def model_unavailable():
+    """Réponse (corps, statut) d'une prédiction demandée sans modèle actif"""
+    if startup['state'] == 'loading':
+        return {'error': 'Modèle en cours de chargement, réessayez dans quelques secondes'}, 503
+    return {'error': 'Modèle non chargé. Redémarrez le serveur.'}, 500
+
+
+def overloaded(error):
+    """Réponse Flask 503 (avec Retry-After) d'une requête refusée par le contrôle d'admission"""
+    admission_rejected.inc(error.reason)
+    return jsonify({
+        'error': 'Serveur surchargé, réessayez plus tard',
+        'reason': error.reason,
+        'retry_after': error.retry_after
+    }), 503, {'Retry-After': str(error.retry_after)}
+
+
+def vectorize(text, current):
+    """([comptes de termes par morceau], détails du texte long ou None)"""
+    if long_text_policy.applies(text):
+        return long_text_policy.count(current.scorer, text)
+    return [current.scorer.count_terms(text)], None
+
+
+def compute_prediction(text, endpoint, current):
+    """
+    Vectorise puis score un texte avec le scoreur compilé de la version
+    `current`, en mesurant les deux étapes séparément ; un texte incertain est
+    rescoré par le second étage de la cascade. Retourne (classe,
+    probabilités, détails) ; les détails décrivent le traitement d'un texte
+    long (None sinon).
+    """
+    start = time.perf_counter()
+    counts, details = vectorize(text, current)
+    vectorized = time.perf_counter()
+    prediction, probabilities = long_text_policy.combine(current.scorer, counts)
+    scored = time.perf_counter()
+    stage_duration.observe(vectorized - start, endpoint, 'vectorize')
+    stage_duration.observe(scored - vectorized, endpoint, 'score')
+    prediction, probabilities, _ = escalate(text, endpoint, current, prediction, probabilities)
+    return prediction, probabilities, details
+
+
+def escalate(text, endpoint, current, prediction, probabilities):
+    """
+    Cascade : rescore un texte incertain avec le second étage de la version `current`.
+    Retourne (classe, probabilités, étage ayant répondu : 1 ou 2)
+    """
+    if current.second_stage is None:
+        return prediction, probabilities, 1
+    start = time.perf_counter()
+    prediction, probabilities, stage = cascade.route(current.second_stage, text, prediction, probabilities)
+    if stage == 2:
+        stage_duration.observe(time.perf_counter() - start, endpoint, 'second_stage')
+    return prediction, probabilities, stage
+
+
+def score_draft(session, current):
+    """
+    Score le brouillon d'une session avec la version `current` (son état est
+    reconstruit si la version a changé depuis). Même résultat que /predict
+    sur le texte entier : un brouillon long suit long_text_policy et un
+    brouillon incertain passe par la cascade. Retourne (classe, probabilités, détails)
+    """
+    if session.version != current.version:
+        session.draft = DraftScorer(current.scorer, session.draft.text)
+        session.version = current.version
+    draft = session.draft
+    text = draft.text
+    if not draft.incremental or long_text_policy.applies(text):
+        return compute_prediction(text, 'session', current)
+    start = time.perf_counter()
+    prediction, probabilities = draft.predict()
+    stage_duration.observe(time.perf_counter() - start, 'session', 'score')
+    prediction, probabilities, _ = escalate(text, 'session', current, prediction, probabilities)
+    return prediction, probabilities, None
+
+
+def session_response(session, current, prediction, probabilities, details, retokenized):
+    """Réponse de /sessions : celle de /predict plus l'état de la session"""
+    start = time.perf_counter()
+    result = build_result(session.draft.text, prediction, probabilities, details, current.version)
+    result['session'] = {
+        'id': session.id,
+        'revision': session.revision,
+        'retokenized_chars': retokenized,
+        'ttl_seconds': sessions.ttl_seconds,
+    }
+    response = jsonify(result)
+    stage_duration.observe(time.perf_counter() - start, 'session', 'response')
+    return response
+
+
+def explain_text(text, current, top_k, endpoint='predict'):
+    """
+    Prédiction accompagnée des `top_k` termes qui poussent le plus vers chaque
+    label, calculés sur les comptes déjà construits pour le score (sans cache).
+    Le verdict passe par la cascade comme celui de /predict : s'il vient du
+    second étage, l'explication le signale (les poids restent ceux du premier
+    modèle). Retourne (classe, probabilités, détails, explication)
+    """
+    start = time.perf_counter()
+    counts, details = vectorize(text, current)
+    vectorized = time.perf_counter()
+    prediction, probabilities, contributions = long_text_policy.explain(current.scorer, counts)
+    scored = time.perf_counter()
+    
+    # Classe 1 = Reliable News : une contribution positive pousse vers "reliable"
+    toward_reliable, toward_fake = top_contributions(contributions, top_k)
+    explanation = {
+        'top_k': top_k,
+        'intercept': round(current.scorer.intercept, 6),
+        'toward_fake': [{'term': term, 'weight': round(weight, 6)} for term, weight in toward_fake],
+        'toward_reliable': [{'term': term, 'weight': round(weight, 6)} for term, weight in toward_reliable],
+    }
+    stage_duration.observe(vectorized - start, endpoint, 'vectorize')
+    stage_duration.observe(scored - vectorized, endpoint, 'score')
+    stage_duration.observe(time.perf_counter() - scored, endpoint, 'explain')
+    
+    prediction, probabilities, stage = escalate(text, endpoint, current, prediction, probabilities)
+    explanation['stage'] = stage
+    if stage == 2:
+        explanation['note'] = ('Verdict du second étage (cascade) : les poids ci-dessus '
+                               'décrivent le premier modèle')
+    return prediction, probabilities, details, explanation
+
+
+def score_new_text(text, endpoint, current, doc_id=None):
+    """
+    Texte absent du cache : reprend le verdict d'un quasi-doublon récemment
+    scoré s'il en existe un, sinon score le texte et l'ajoute à l'index.
+    Retourne (classe, probabilités, détails, quasi-doublon) ; le quasi-doublon
+    vaut None ou {'id', 'similarity'}. `doc_id` est l'identifiant renvoyé aux
+    textes qui ressembleront à celui-ci (empreinte du texte par défaut).
+    """
+    start = time.perf_counter()
+    signature = near_duplicates.signature(text)
+    match = near_duplicates.lookup(signature, current.version)
+    if signature is not None:
+        stage_duration.observe(time.perf_counter() - start, endpoint, 'dedup')
+    if match is not None:
+        prediction, probabilities = match.verdict
+        return prediction, probabilities, None, {'id': match.doc_id, 'similarity': round(match.similarity, 4)}
+        
+    prediction, probabilities, details = compute_prediction(text, endpoint, current)
+    if signature is not None:
+        key = text_hash(text)
+        near_duplicates.add(key, doc_id if doc_id is not None else key[:16], signature,
+                            (prediction, probabilities), current.version)
+    return prediction, probabilities, details, None
+
+
+def score_text(text, endpoint='predict', current=None):
+    """
+    Retourne (classe, probabilités, détails, quasi-doublon) pour un texte en
+    passant par le cache : les requêtes identiques simultanées ne déclenchent
+    qu'un seul calcul
+    """
+    current = current or bundle
+    key = PredictionCache.make_key(text, current.version)
+    return prediction_cache.get_or_compute(key, lambda: score_new_text(text, endpoint, current))
+
+
+def compute_predictions(texts, endpoint, current):
+    """
+    compute_prediction pour plusieurs textes : les textes courts sont scorés
+    ensemble par un seul appel à predict_batch (étape `score`, tokenisation
+    comprise), les textes longs un par un selon long_text_policy. Retourne
+    [(classe, probabilités, détails), ...] dans l'ordre
+    """
+    results = [None] * len(texts)
+    batch = []
+    for j, text in enumerate(texts):
+        if long_text_policy.applies(text):
+            results[j] = compute_prediction(text, endpoint, current)
+        else:
+            batch.append(j)
+            
+    if batch:
+        start = time.perf_counter()
+        scored = current.scorer.predict_batch([texts[j] for j in batch])
+        stage_duration.observe(time.perf_counter() - start, endpoint, 'score')
+        for j, (prediction, probabilities) in zip(batch, scored):
+            prediction, probabilities, _ = escalate(texts[j], endpoint, current, prediction, probabilities)
+            results[j] = (prediction, probabilities, None)
+    return results
+
+
+def score_texts(texts, endpoint='predict_batch', current=None, doc_ids=None):
+    """
+    Retourne [(classe, probabilités, détails, quasi-doublon), ...] pour une
+    liste de textes : chaque texte est d'abord cherché dans le cache puis dans
+    l'index des quasi-doublons (une reprise d'un texte précédent du lot reçoit
+    son verdict), les autres sont scorés ensemble. `doc_ids` : identifiants
+    client des textes, pour l'index des quasi-doublons
+    """
+    current = current or bundle
+    keys = [PredictionCache.make_key(text, current.version) for text in texts]
+    predictions = [prediction_cache.get(key) for key in keys]
+    
+    # Textes manquants, une seule fois chacun (un texte répété reprend le premier calcul)
+    first = {}
+    for i, cached in enumerate(predictions):
+        if cached is None:
+            first.setdefault(keys[i], i)
+    missing = list(first.values())
+    if missing:
+        start = time.perf_counter()
+        signatures = [near_duplicates.signature(texts[i]) for i in missing]
+        matches = near_duplicates.lookup_batch(signatures, current.version)
+        if any(signature is not None for signature in signatures):
+            stage_duration.observe(time.perf_counter() - start, endpoint, 'dedup')
+            
+        # Label et probabilités calculés ensemble pour les textes sans quasi-doublon
+        pending = [i for i, match in zip(missing, matches) if match is None]
+        for i, computed in zip(pending, compute_predictions([texts[i] for i in pending], endpoint, current)):
+            predictions[i] = computed + (None,)
+            
+        for i, signature, match in zip(missing, signatures, matches):
+            if isinstance(match, NearDuplicate):
+                prediction, probabilities = match.verdict
+                doc_id, similarity = match.doc_id, match.similarity
+            elif match is not None:
+                # Reprise d'un texte précédent du lot, scoré ci-dessus
+                earlier, similarity = missing[match[0]], match[1]
+                prediction, probabilities = predictions[earlier][:2]
+                doc_id = text_doc_id(texts[earlier], earlier, doc_ids)
+            if match is not None:
+                predictions[i] = (prediction, probabilities, None,
+                                  {'id': doc_id, 'similarity': round(similarity, 4)})
+            elif signature is not None:
+                near_duplicates.add(text_hash(texts[i]), text_doc_id(texts[i], i, doc_ids), signature,
+                                    predictions[i][:2], current.version)
+            prediction_cache.put(keys[i], predictions[i])
+            
+    for i, cached in enumerate(predictions):
+        if cached is None:
+            predictions[i] = predictions[first[keys[i]]]
+    return predictions
+
+
+def text_doc_id(text, index, doc_ids):
+    """Identifiant d'un texte du lot dans l'index des quasi-doublons"""
+    if doc_ids is not None and doc_ids[index] is not None:
+        return doc_ids[index]
+    return text_hash(text)[:16]
+
+
+def read_payload():
+    """
+    Corps d'une requête de prédiction, en JSON ou en MessagePack (selon son
+    Content-Type). Retourne (données, None, None) ou (None, corps de l'erreur, code HTTP)
+    """
+    if formats.is_msgpack(request.mimetype):
+        try:
+            return formats.decode(request.get_data()), None, None
+        except ValueError as e:
+            return None, {'error': str(e)}, 415 if not formats.available() else 400
+    if not request.is_json:
+        return None, {
+            'error': 'Content-Type doit être application/json'
+        }, 400
+    return request.get_json(), None, None
+
+
+def response_format():
+    """
+    Format de réponse négocié (en-tête Accept) : formats.JSON ou
+    formats.MSGPACK. Retourne (format, None, None) ou (None, corps de l'erreur, 406)
+    """
+    mimetype = formats.negotiate(request.accept_mimetypes)
+    if mimetype is None:
+        return None, {
+            'error': "MessagePack n'est pas installé sur le serveur : acceptez application/json"
+        }, 406
+    return mimetype, None, None
+
+
+def respond(payload, mimetype, status=200):
+    """Réponse Flask encodée dans le format négocié"""
+    if mimetype == formats.MSGPACK:
+        return Response(formats.encode(payload), status=status, mimetype=formats.MSGPACK)
+    return jsonify(payload), status
+
+
+def parse_text_payload(data):
+    """
+    Valide le corps JSON de /predict.
+    Retourne (texte, None, None) ou (None, corps de l'erreur, code HTTP)
+    """
+    # Vérifier que le champ 'text' existe
+    if not isinstance(data, dict) or 'text' not in data:
+        return None, {
+            'error': 'Le champ "text" est requis',
+            'example': {'text': 'Your article text here'}
+        }, 400
+    
+    if not isinstance(data['text'], str):
+        return None, {
+            'error': 'Le champ "text" doit être une chaîne de caractères'
+        }, 400
+    
+    text = data['text'].strip()
+    
+    # Vérifier que le texte n'est pas vide
+    if not text:
+        return None, {
+            'error': 'Le texte ne peut pas être vide'
+        }, 400
+    
+    # Vérifier que le texte ne dépasse pas la limite
+    if len(text) > Config.MAX_TEXT_CHARS:
+        return None, {
+            'error': f'Texte trop long ({len(text)} caractères, maximum {Config.MAX_TEXT_CHARS})'
+        }, 413
+    
+    return text, None, None
+
+
+def parse_explain(data):
+    """
+    Option `explain` de /predict : true (EXPLAIN_TOP_K termes) ou un entier.
+    Retourne (nombre de termes ou None, None, None) ou (None, corps de l'erreur, code HTTP)
+    """
+    explain = data.get('explain') if isinstance(data, dict) else None
+    if explain is None or explain is False:
+        return None, None, None
+    if explain is True:
+        return Config.EXPLAIN_TOP_K, None, None
+    if isinstance(explain, int) and 1 <= explain <= Config.EXPLAIN_MAX_K:
+        return explain, None, None
+    return None, {
+        'error': f'Le champ "explain" doit être un booléen ou un entier entre 1 et {Config.EXPLAIN_MAX_K}'
+    }, 400
+
+
+def build_result(text, prediction, probabilities, details=None, version=None, near_duplicate=None):
+    """
+    Construit le dictionnaire de réponse pour un texte à partir de la classe
+    prédite et des probabilités [fake, reliable]. Pour un texte long, `details`
+    (troncature, morceaux) est renvoyé dans le champ `long_text` ; `version`
+    est la version du modèle qui a produit le score ; `near_duplicate`
+    (article dont le verdict a été repris) dans le champ `near_duplicate`.
+    """
+    # Déterminer le label
+    prediction_label = Config.LABELS.get(int(prediction), 'Fake News')
+    if not is_warmup_request():
+        predictions_total.inc(prediction_label)
+    
+    # Calculer la confiance
+    confidence = float(max(probabilities) * 100)
+    
+    result = {
+        'prediction': prediction_label,
+        'prediction_code': int(prediction),
+        'confidence': round(confidence, 2),
+        'probabilities': {
+            'fake': round(float(probabilities[0] * 100), 2),
+            'reliable': round(float(probabilities[1] * 100), 2)
+        },
+        'text_length': len(text),
+        'text_preview': text[:100] + '...' if len(text) > 100 else text
+    }
+    if version is not None:
+        result['model_version'] = version
+    if details is not None:
+        result['long_text'] = details
+    if near_duplicate is not None:
+        result['near_duplicate'] = near_duplicate
+    return result
+
+
+def log_request(endpoint, status, duration, fields=None):
+    """
+    Journalise une requête terminée : toujours au-delà de SLOW_REQUEST_MS,
+    sinon pour une fraction LOG_SAMPLE_RATE des requêtes seulement
+    """
+    duration_ms = duration * 1000
+    slow = duration_ms >= Config.SLOW_REQUEST_MS
+    if not slow and (Config.LOG_SAMPLE_RATE <= 0 or random.random() >= Config.LOG_SAMPLE_RATE):
+        return
+        
+    record = {'endpoint': endpoint, 'status': status, 'duration_ms': round(duration_ms, 3)}
+    if fields:
+        record.update(fields)
+    if slow:
+        request_logger.warning("🐢 Requête lente", extra={'fields': record})
+    else:
+        request_logger.info("📰 Requête traitée", extra={'fields': record})
+
+
+def record_request(endpoint, status, request_bytes, response_bytes, duration, fields=None):
+    """Enregistre les métriques (et le journal échantillonné) d'une requête terminée"""
+    request_duration.observe(duration, endpoint)
+    requests_total.inc(endpoint, status)
+    if request_bytes is not None:
+        request_size.observe(request_bytes, endpoint)
+    if response_bytes is not None:
+        response_size.observe(response_bytes, endpoint)
+    if status >= 500:
+        errors_total.inc(endpoint, 'server')
+    elif status >= 400:
+        errors_total.inc(endpoint, 'client')
+    log_request(endpoint, status, duration, fields)
+
+
+# ============================================================
+# INSTRUMENTATION DES REQUÊTES
+# ============================================================
+
+@app.before_request
+def start_request_timer():
+    request.environ['fcc.start_time'] = time.perf_counter()
+    requests_in_flight.inc()
+
+
+@app.after_request
+def record_request_metrics(response):
+    start = request.environ.get('fcc.start_time')
+    if start is not None and not is_warmup_request():
+        # Endpoints inconnus regroupés : le nombre de séries reste borné
+        record_request(request.endpoint or 'unknown', response.status_code,
+                       request.content_length, response.calculate_content_length(),
+                       time.perf_counter() - start, request.environ.get('fcc.log_fields'))
+    sampled = request.environ.get('fcc.shadow')
+    if sampled and shadow is not None:
+        # Après l'envoi de la réponse : le client n'attend pas ces dépôts
+        response.call_on_close(lambda: [shadow.submit(*item) for item in sampled])
+    return response
+
+
+@app.teardown_request
+def end_request(exception):
+    if request.environ.pop('fcc.start_time', None) is not None:
+        requests_in_flight.dec()
+
+
+@app.errorhandler(413)
+def request_too_large(error):
+    return jsonify({
+        'error': f'Corps de requête trop volumineux (maximum {Config.MAX_BODY_BYTES} octets)'
+    }), 413
 
 
 # ============================================================
@@ -91,89 +958,286 @@ def health():
     """
     Endpoint de santé - Vérifie que l'API fonctionne
     """
+    current = bundle
     return jsonify({
         'status': 'ok',
-        'model_loaded': model is not None and vectorizer is not None,
+        'model_loaded': current is not None,
+        'model_version': current.version if current else None,
+        'model_release': current.release if current else None,
+        'model_format': current.format if current else None,
+        'load_time_ms': round(current.load_time_ms, 2) if current else None,
+        'reload': dict(reload_status),
+        'cache': prediction_cache.stats(),
+        'near_duplicates': near_duplicates.stats(),
+        'sessions': sessions.stats(),
+        'cascade': dict(cascade.stats(), second_stage=type(current.second_stage).__name__
+                        if current is not None and current.second_stage is not None else None),
+        'store': prediction_store.stats() if prediction_store is not None else None,
+        'shadow': shadow.stats() if shadow is not None else None,
+        'governor': dict(governor.stats(), inference_threads=Config.INFERENCE_THREADS,
+                         thread_pools=thread_pools),
         'message': 'FCC Fake News Detector API is running'
     })
 
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """
+    Endpoint de disponibilité - 200 une fois les modèles chargés et préchauffés,
+    503 avant (à utiliser comme sonde de readiness, /health restant la sonde de vie)
+    """
+    ready_now = startup['state'] == 'ready' and bundle is not None
+    return jsonify(dict(startup, ready=ready_now)), 200 if ready_now else 503
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Endpoint de métriques - Format texte Prometheus
+    """
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """
     Endpoint de prédiction - Détecte si un article est fake ou reliable
     """
     
-    # Vérifier que le modèle est chargé
-    if model is None or vectorizer is None:
+    # Version du modèle utilisée jusqu'à la réponse (même si un rechargement a lieu)
+    current = bundle
+    if current is None:
+        error, status = model_unavailable()
+        return jsonify(error), status
+    
+    # Extraire et valider les données (JSON ou MessagePack)
+    start = time.perf_counter()
+    mimetype, error, status = response_format()
+    if error is None:
+        data, error, status = read_payload()
+    if error is None:
+        text, error, status = parse_text_payload(data)
+    if error is None:
+        top_k, error, status = parse_explain(data)
+    if error is None:
+        fields, message = formats.parse_fields(data, mimetype)
+        if message is not None:
+            error, status = {'error': message}, 400
+    stage_duration.observe(time.perf_counter() - start, 'predict', 'parse')
+    if error is not None:
+        return jsonify(error), status
+    
+    # Faire la prédiction
+    try:
+        start = time.perf_counter()
+        # Un créneau d'inférence (503 si la file d'attente est saturée)
+        with governor.admit():
+            if top_k:
+                # Termes les plus influents, calculés sur la même vectorisation
+                prediction, probabilities, details, explanation = explain_text(text, current, top_k)
+                near_duplicate = None
+            else:
+                # Vectoriser (TF-IDF) et scorer le texte en un seul passage (via le
+                # cache, puis l'index des quasi-doublons)
+                prediction, probabilities, details, near_duplicate = score_text(text, current=current)
+        record_prediction(text, 'predict', current.version, prediction, probabilities, details,
+                          time.perf_counter() - start)
+        submit_shadow(text, prediction, probabilities)
+        
+        # Créer la réponse
+        start = time.perf_counter()
+        result = build_result(text, prediction, probabilities, details, current.version, near_duplicate)
+        
+        # Champs du journal (écrit après la réponse, si la requête est échantillonnée)
+        request.environ['fcc.log_fields'] = {
+            'prediction': result['prediction'],
+            'confidence': result['confidence'],
+            'text_length': result['text_length'],
+            'truncated': bool(details and details['truncated']),
+            'near_duplicate': near_duplicate['id'] if near_duplicate else None,
+        }
+        
+        # Limité aux champs demandés ; en MessagePack, valeurs brutes (probabilités
+        # entre 0 et 1) comme les colonnes de /predict/batch
+        if mimetype == formats.MSGPACK:
+            extra = {key: result[key] for key in ('model_version', 'long_text', 'near_duplicate') if key in result}
+            result = dict(formats.record(text, prediction, probabilities, fields, Config.LABELS), **extra)
+        else:
+            formats.select(result, fields)
+        if top_k:
+            result['explanation'] = explanation
+        response = respond(result, mimetype)
+        stage_duration.observe(time.perf_counter() - start, 'predict', 'response')
+        return response
+    
+    except Overloaded as e:
+        return overloaded(e)
+    
+    except Exception as e:
+        logger.exception("❌ Erreur lors de la prédiction")
+        
         return jsonify({
-            'error': 'Modèle non chargé. Redémarrez le serveur.'
+            'error': 'Erreur lors de la prédiction',
+            'details': str(e)
         }), 500
+
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Endpoint de prédiction par lot - Analyse plusieurs articles en un seul appel
     
-    # Vérifier que la requête contient du JSON
-    if not request.is_json:
-        return jsonify({
-            'error': 'Content-Type doit être application/json'
-        }), 400
+    Le corps accepte soit {"texts": ["...", ...]}, soit
+    {"items": [{"id": "...", "text": "..."}, ...]} avec des identifiants client
+    optionnels. Tous les textes valides sont scorés par le scoreur compilé
+    (label et probabilités en un seul passage) ; les résultats sont renvoyés
+    dans l'ordre d'entrée. Un élément invalide produit une erreur pour cet
+    élément uniquement, sans faire échouer le lot.
     
-    # Extraire les données
-    data = request.get_json()
+    En MessagePack (Accept: application/msgpack, voir formats.py), les
+    résultats sont renvoyés en colonnes ; `fields` limite les champs renvoyés.
+    """
     
-    # Vérifier que le champ 'text' existe
-    if 'text' not in data:
+    # Version du modèle utilisée jusqu'à la réponse (même si un rechargement a lieu)
+    current = bundle
+    if current is None:
+        error, status = model_unavailable()
+        return jsonify(error), status
+        
+    # Extraire les données (JSON ou MessagePack) et les champs demandés
+    start = time.perf_counter()
+    mimetype, error, status = response_format()
+    if error is None:
+        data, error, status = read_payload()
+    if error is not None:
+        return jsonify(error), status
+    fields, message = formats.parse_fields(data, mimetype)
+    if message is not None:
+        return jsonify({'error': message}), 400
+        
+    # Normaliser les deux formats d'entrée en une liste d'éléments
+    if isinstance(data, dict) and isinstance(data.get('items'), list):
+        items = data['items']
+    elif isinstance(data, dict) and isinstance(data.get('texts'), list):
+        items = [{'text': text} for text in data['texts']]
+    else:
         return jsonify({
-            'error': 'Le champ "text" est requis',
-            'example': {'text': 'Your article text here'}
+            'error': 'Le champ "items" ou "texts" (liste) est requis',
+            'example': {'items': [{'id': 'article-1', 'text': 'Your article text here'}]}
         }), 400
-    
-    text = data.get('text', '').strip()
-    
-    # Vérifier que le texte n'est pas vide
-    if not text:
+        
+    if not items:
         return jsonify({
-            'error': 'Le texte ne peut pas être vide'
+            'error': 'Le lot ne peut pas être vide'
         }), 400
-    
-    # Faire la prédiction
-    try:
-        # Vectoriser le texte avec TF-IDF
-        text_vectorized = vectorizer.transform([text])
         
-        # Faire la prédiction
-        prediction = model.predict(text_vectorized)[0]
+    if len(items) > Config.MAX_BATCH_SIZE:
+        return jsonify({
+            'error': f'Lot trop volumineux ({len(items)} éléments, '
+                     f'maximum {Config.MAX_BATCH_SIZE})'
+        }), 413
+        
+    # Valider chaque élément séparément
+    results = [None] * len(items)
+    valid_indices = []
+    valid_texts = []
+    
+    for index, item in enumerate(items):
+        item_id = item.get('id') if isinstance(item, dict) else None
+        text = item.get('text') if isinstance(item, dict) else None
         
-        # Obtenir les probabilités
-        probabilities = model.predict_proba(text_vectorized)[0]
+        if not isinstance(text, str):
+            results[index] = {
+                'index': index,
+                'id': item_id,
+                'error': 'Le champ "text" est requis et doit être une chaîne'
+            }
+            continue
+            
+        text = text.strip()
+        if not text:
+            results[index] = {
+                'index': index,
+                'id': item_id,
+                'error': 'Le texte ne peut pas être vide'
+            }
+            continue
+            
+        if len(text) > Config.MAX_TEXT_CHARS:
+            results[index] = {
+                'index': index,
+                'id': item_id,
+                'error': f'Texte trop long ({len(text)} caractères, maximum {Config.MAX_TEXT_CHARS})'
+            }
+            continue
+            
+        valid_indices.append(index)
+        valid_texts.append(text)
         
-        # Déterminer le label
-        prediction_label = "Reliable News" if prediction == 1 else "Fake News"
+    stage_duration.observe(time.perf_counter() - start, 'predict_batch', 'parse')
+    
+    # Faire les prédictions en un seul passage
+    try:
+        # Cache d'abord, puis quasi-doublons et scoring groupé des textes manquants
+        doc_ids = [items[index].get('id') for index in valid_indices]
+        start = time.perf_counter()
+        predictions = []
+        if valid_texts:
+            # Un lot sans texte valide ne prend pas de créneau d'inférence
+            with governor.admit(len(valid_texts)):
+                predictions = score_texts(valid_texts, current=current, doc_ids=doc_ids)
+        # Durée moyenne par texte pour l'historique
+        duration = (time.perf_counter() - start) / max(len(valid_texts), 1)
         
-        # Calculer la confiance
-        confidence = float(max(probabilities) * 100)
+        start = time.perf_counter()
+        for index, text, (prediction, probabilities, details, near_duplicate) in zip(
+                valid_indices, valid_texts, predictions):
+            record_prediction(text, 'predict_batch', current.version, prediction, probabilities, details, duration)
+            submit_shadow(text, prediction, probabilities)
+            
+        failed = len(items) - len(valid_texts)
+        payload = {
+            'count': len(items),
+            'succeeded': len(valid_texts),
+            'failed': failed,
+            'model_version': current.version
+        }
+        if mimetype == formats.MSGPACK:
+            # Colonnes dans l'ordre d'entrée, erreurs à part
+            if not is_warmup_request():
+                for prediction, _, _, _ in predictions:
+                    predictions_total.inc(Config.LABELS.get(int(prediction), 'Fake News'))
+            payload['columns'] = formats.columns(
+                [(index, text, prediction, probabilities) for index, text, (prediction, probabilities, _, _)
+                 in zip(valid_indices, valid_texts, predictions)],
+                len(items), fields, Config.LABELS)
+            payload['errors'] = [result for result in results if result is not None]
+        else:
+            for index, text, (prediction, probabilities, details, near_duplicate) in zip(
+                    valid_indices, valid_texts, predictions):
+                result = formats.select(build_result(text, prediction, probabilities, details,
+                                                     current.version, near_duplicate), fields)
+                result['index'] = index
+                result['id'] = items[index].get('id')
+                results[index] = result
+            payload = dict(results=results, **payload)
+        response = respond(payload, mimetype)
+        stage_duration.observe(time.perf_counter() - start, 'predict_batch', 'response')
         
-        # Créer la réponse
-        result = {
-            'prediction': prediction_label,
-            'prediction_code': int(prediction),
-            'confidence': round(confidence, 2),
-            'probabilities': {
-                'fake': round(float(probabilities[0] * 100), 2),
-                'reliable': round(float(probabilities[1] * 100), 2)
-            },
-            'text_length': len(text),
-            'text_preview': text[:100] + '...' if len(text) > 100 else text
+        # Champs du journal (écrit après la réponse, si la requête est échantillonnée)
+        request.environ['fcc.log_fields'] = {
+            'count': len(items),
+            'succeeded': len(valid_texts),
+            'failed': failed,
         }
         
-        # Log dans la console
-        print(f"\n📰 Prédiction effectuée:")
-        print(f"   Texte: {text[:50]}...")
-        print(f"   Résultat: {prediction_label} ({confidence:.2f}%)")
+        return response
+        
+    except Overloaded as e:
+        return overloaded(e)
         
-        return jsonify(result), 200
-    
     except Exception as e:
-        print(f"\n❌ Erreur lors de la prédiction:")
-        print(f"   {str(e)}")
+        logger.exception("❌ Erreur lors de la prédiction par lot")
         
         return jsonify({
             'error': 'Erreur lors de la prédiction',
@@ -181,6 +1245,166 @@ def predict():
         }), 500
 
 
+@app.route('/sessions', methods=['POST'])
+def create_session():
+    """
+    Endpoint de session d'édition - Ouvre une session pour un brouillon et le score
+    
+    Les analyses suivantes (PATCH /sessions/<id>) n'envoient que les passages
+    modifiés. Le texte n'est pas nettoyé (espaces conservés) : les positions
+    des modifications se rapportent exactement au texte envoyé.
+    """
+    current = bundle
+    if current is None:
+        error, status = model_unavailable()
+        return jsonify(error), status
+    if not request.is_json:
+        return jsonify({
+            'error': 'Content-Type doit être application/json'
+        }), 400
+        
+    data = request.get_json()
+    text = data.get('text') if isinstance(data, dict) else None
+    if not isinstance(text, str):
+        return jsonify({
+            'error': 'Le champ "text" est requis (chaîne de caractères, éventuellement vide)'
+        }), 400
+    if len(text) > Config.SESSION_MAX_CHARS:
+        return jsonify({
+            'error': f'Brouillon trop long ({len(text)} caractères, maximum {Config.SESSION_MAX_CHARS})'
+        }), 413
+        
+    try:
+        with governor.admit():
+            start = time.perf_counter()
+            draft = DraftScorer(current.scorer, text)
+            stage_duration.observe(time.perf_counter() - start, 'session', 'vectorize')
+            session = sessions.create(draft, current.version)
+            prediction, probabilities, details = score_draft(session, current)
+    except Overloaded as e:
+        return overloaded(e)
+    except Exception as e:
+        logger.exception("❌ Erreur lors de l'ouverture de la session")
+        return jsonify({
+            'error': 'Erreur lors de la prédiction',
+            'details': str(e)
+        }), 500
+        
+    return session_response(session, current, prediction, probabilities, details, len(text)), 201
+
+
+@app.route('/sessions/<session_id>', methods=['PATCH'])
+def update_session(session_id):
+    """
+    Endpoint de session d'édition - Applique des modifications au brouillon et le rescore
+    
+    Corps : {"edits": [{"start": 120, "end": 135, "text": "nouveau passage"}],
+    "revision": 3}. Chaque modification remplace text[start:end], dans l'ordre.
+    `revision` (optionnel) est la révision connue du client : 409 si le
+    brouillon a changé entre-temps. 404 si la session a expiré, a été évincée
+    ou a été ouverte par un autre processus : le client rouvre alors une
+    session avec le texte complet.
+    """
+    current = bundle
+    if current is None:
+        error, status = model_unavailable()
+        return jsonify(error), status
+    if not request.is_json:
+        return jsonify({
+            'error': 'Content-Type doit être application/json'
+        }), 400
+        
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({
+            'error': 'Session inconnue ou expirée, rouvrez-la avec le texte complet (POST /sessions)'
+        }), 404
+        
+    data = request.get_json()
+    if not isinstance(data, dict):
+        data = {}
+    with session.lock:
+        revision = data.get('revision')
+        if revision is not None and revision != session.revision:
+            return jsonify({
+                'error': 'Le brouillon a changé depuis cette révision',
+                'revision': session.revision
+            }), 409
+        try:
+            with governor.admit():
+                start = time.perf_counter()
+                retokenized = apply_edits(session.draft, data.get('edits'), Config.SESSION_MAX_CHARS)
+                stage_duration.observe(time.perf_counter() - start, 'session', 'vectorize')
+                prediction, probabilities, details = score_draft(session, current)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Overloaded as e:
+            return overloaded(e)
+        except Exception as e:
+            logger.exception("❌ Erreur lors de la mise à jour de la session")
+            return jsonify({
+                'error': 'Erreur lors de la prédiction',
+                'details': str(e)
+            }), 500
+        session.revision += 1
+        return session_response(session, current, prediction, probabilities, details, retokenized), 200
+
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    """
+    Endpoint de session d'édition - Ferme une session (libère son brouillon)
+    """
+    if not sessions.delete(session_id):
+        return jsonify({
+            'error': 'Session inconnue ou expirée'
+        }), 404
+    return '', 204
+
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """
+    Endpoint d'administration - Recharge le modèle sans redémarrage
+    
+    Protégé par l'en-tête X-Admin-Token (FCC_ADMIN_TOKEN ; désactivé si non
+    défini). Le corps optionnel {"version": "<nom>"} change d'abord la
+    version active (models/CURRENT). Le chargement se fait en arrière-plan :
+    l'ancienne version continue de répondre jusqu'au remplacement.
+    """
+    token = request.headers.get('X-Admin-Token', '')
+    if not Config.ADMIN_TOKEN or not hmac.compare_digest(token.encode(), Config.ADMIN_TOKEN.encode()):
+        return jsonify({
+            'error': 'Accès refusé'
+        }), 403
+        
+    data = request.get_json(silent=True) or {}
+    release = data.get('version') if isinstance(data, dict) else None
+    if release is not None:
+        try:
+            release_dir(Config.MODEL_DIR, str(release))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except FileNotFoundError as e:
+            return jsonify({'error': str(e)}), 404
+        if reload_lock.locked():
+            return jsonify({'error': 'Rechargement déjà en cours'}), 409
+        set_current_release(Config.MODEL_DIR, str(release))
+        
+    if not trigger_reload():
+        return jsonify({
+            'error': 'Rechargement déjà en cours'
+        }), 409
+        
+    current = bundle
+    return jsonify({
+        'status': 'reloading',
+        'requested': current_release(Config.MODEL_DIR),
+        'active': current.release if current else None,
+        'model_version': current.version if current else None
+    }), 202
+
+
 @app.route('/', methods=['GET'])
 def home():
     """
@@ -201,7 +1425,37 @@ def home():
                 'url': '/predict',
                 'description': 'Détecter si un article est fake',
                 'body': {
-                    'text': 'Article text to analyze'
+                    'text': 'Article text to analyze',
+                    'explain': 'optional: true or number of terms'
+                }
+            },
+            'predict_batch': {
+                'method': 'POST',
+                'url': '/predict/batch',
+                'description': 'Analyser plusieurs articles en un seul appel',
+                'body': {
+                    'items': [{'id': 'optional-client-id', 'text': 'Article text to analyze'}]
+                }
+            },
+            'sessions': {
+                'method': 'POST',
+                'url': '/sessions',
+                'description': 'Ouvrir une session d\'édition (puis PATCH /sessions/<id> avec les passages modifiés)',
+                'body': {
+                    'text': 'Draft text'
+                }
+            },
+            'metrics': {
+                'method': 'GET',
+                'url': '/metrics',
+                'description': 'Métriques au format Prometheus'
+            },
+            'admin_reload': {
+                'method': 'POST',
+                'url': '/admin/reload',
+                'description': 'Recharger le modèle sans redémarrage (en-tête X-Admin-Token)',
+                'body': {
+                    'version': 'optional-release-name'
                 }
             }
         },
@@ -215,27 +1469,29 @@ def home():
     })
 
 
+# Fin de l'import du module (phase "import" du démarrage)
+IMPORT_FINISHED = time.perf_counter()
+
+
 # ============================================================
 # DÉMARRAGE DU SERVEUR
 # ============================================================
 
 if __name__ == '__main__':
-    # Charger les modèles au démarrage
-    load_models()
+    # Charger et préchauffer les modèles au démarrage
+    create_app()
     
     # Lancer le serveur Flask
-    print("=" * 60)
-    print("🌐 DÉMARRAGE DU SERVEUR FLASK")
-    print("=" * 60)
-    print(f"📍 Host: 0.0.0.0")
-    print(f"🔌 Port: 5000")
-    print(f"🔗 URL: http://localhost:5000")
-    print(f"⚙️  Mode Debug: Activé")
-    print("=" * 60)
-    print("\n📚 Endpoints disponibles:")
-    print("   GET  /         - Documentation")
-    print("   GET  /health   - État de l'API")
-    print("   POST /predict  - Prédiction fake news")
-    print("\n💡 Pour arrêter le serveur: Ctrl+C\n")
+    logger.info("🌐 DÉMARRAGE DU SERVEUR FLASK", extra={'fields': {
+        'host': '0.0.0.0',
+        'port': 5000,
+        'url': 'http://localhost:5000',
+        'debug': True,
+    }})
+    logger.info("📚 Endpoints disponibles: GET / (documentation), GET /health (état), "
+                "POST /predict (prédiction), POST /predict/batch (lot), POST /sessions (brouillons), "
+                "GET /metrics (Prometheus), "
+                "POST /admin/reload (rechargement)")
+    logger.info("💡 Pour arrêter le serveur: Ctrl+C")
     
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,436 @@
+"""
+Artefact de modèle mappable en mémoire (numpy.memmap)
+
+Convertit les deux fichiers .pkl (TfidfVectorizer + LogisticRegression) en un
+fichier plat et versionné : un en-tête JSON suivi de tableaux alignés
+(vocabulaire trié en chaînes de largeur fixe, poids IDF, poids IDF × coefficient).
+Le fichier est ensuite mappé en lecture seule : N workers partagent une seule
+copie dans le page cache au lieu de désérialiser chacun leur pickle.
+
+Trois précisions de poids :
+    float64  exacte (par défaut)
+    float32  IDF et poids en float32
+    int8     IDF en float32, poids quantifiés sur 8 bits (échelle unique)
+Les variantes compactes doivent passer `check` sur un jeu de validation.
+
+Usage :
+    python api/artifact.py export                      # crée models/fake_news_model.mmap
+    python api/artifact.py export --precision int8     # crée models/fake_news_model.int8.mmap
+    python api/artifact.py check --data heldout.jsonl  # écart des variantes / modèle d'origine
+    python api/artifact.py compare                     # chargement, RSS et latence par variante
+Chaque commande lit la version active (models/CURRENT, ou les fichiers de
+models/ sans CURRENT) ; `--release <nom>` en choisit une autre. L'artefact est
+écrit dans le dossier de la version, où load_release le cherche.
+"""
+
+import argparse
+import csv
+import json
+import os
+import pickle
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from inference import LinearScorer, compute_model_version
+from loader import (MODEL_FILE, VECTORIZER_FILE, WARMUP_TEXTS, artifact_file, current_release, memory_usage,
+                    release_dir)
+
+MAGIC = b'FCCMMAP\0'
+# Version 2 : poids int8 avec échelle (les artefacts float restent en version 1)
+FORMAT_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+ALIGNMENT = 64
+
+PRECISIONS = ('float64', 'float32', 'int8')
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def quantize(weights):
+    """Quantification symétrique sur 8 bits : retourne (poids int8, échelle)"""
+    largest = float(np.abs(weights).max()) if len(weights) else 0.0
+    scale = largest / 127 if largest > 0 else 1.0
+    return np.clip(np.rint(weights / scale), -127, 127).astype('i1'), scale
+
+
+def export_artifact(scorer, path, model_version, precision='float64'):
+    """
+    Écrit le scoreur compilé dans un artefact mappable (écriture atomique)
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Précision inconnue: {precision} (attendue: {', '.join(PRECISIONS)})")
+        
+    # Vocabulaire trié (ordre des octets UTF-8, identique à np.searchsorted)
+    items = sorted((term.encode('utf-8'), entry) for term, entry in scorer.weights.items())
+    width = max(len(term) for term, _ in items)
+    idf = np.array([entry[0] for _, entry in items], dtype='<f8')
+    weights = np.array([entry[1] for _, entry in items], dtype='<f8')
+    
+    header = {
+        'format_version': 1,
+        'model_version': model_version,
+        'n_features': len(items),
+        'params': scorer.analyzer_params(),
+        'precision': precision,
+        'arrays': {},
+    }
+    if precision == 'float32':
+        idf, weights = idf.astype('<f4'), weights.astype('<f4')
+    elif precision == 'int8':
+        idf = idf.astype('<f4')
+        weights, header['weights_scale'] = quantize(weights)
+        header['format_version'] = FORMAT_VERSION
+        
+    arrays = {
+        'terms': np.array([term for term, _ in items], dtype=f'S{width}'),
+        'idf': idf,
+        'weights': weights,
+    }
+    
+    # Offsets relatifs au début de la zone de données, alignée après l'en-tête
+    offset = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = {
+            'offset': offset,
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+        }
+        offset = _align(offset + array.nbytes)
+        
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_offset = _align(len(MAGIC) + 8 + len(header_bytes))
+    
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<II', header['format_version'], len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_offset + header['arrays'][name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_offset + offset)
+    os.replace(tmp_path, path)
+    return header
+
+
+def read_header(path):
+    """Lit et valide l'en-tête d'un artefact"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} n'est pas un artefact de modèle")
+        format_version, header_length = struct.unpack('<II', f.read(8))
+        if format_version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Version d'artefact non supportée: {format_version} "
+                             f"(attendue: {FORMAT_VERSION} au plus)")
+        header = json.loads(f.read(header_length).decode('utf-8'))
+    header['data_offset'] = _align(len(MAGIC) + 8 + header_length)
+    return header
+
+
+class MappedScorer(LinearScorer):
+    """
+    Scoreur servi directement depuis l'artefact mappé en mémoire
+    
+    La recherche des termes se fait par recherche dichotomique vectorisée
+    (np.searchsorted) dans la table triée : aucune structure Python par terme
+    n'est créée, les pages du fichier restent partagées entre processus.
+    Les poids int8 sont multipliés par `weights_scale` après le produit scalaire.
+    """
+    
+    def __init__(self, path):
+        header = read_header(path)
+        super().__init__(None, **header['params'])
+        self.path = path
+        self.model_version = header['model_version']
+        self.n_features = header['n_features']
+        self.precision = header.get('precision', 'float64')
+        self.weights_scale = header.get('weights_scale', 1.0)
+        
+        # Un seul mapping en lecture seule ; les tableaux en sont des vues
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            array = np.frombuffer(buffer, dtype=np.dtype(spec['dtype']),
+                                  count=int(np.prod(spec['shape'])),
+                                  offset=header['data_offset'] + spec['offset'])
+            arrays[name] = array.reshape(spec['shape'])
+        self._buffer = buffer
+        self.terms = arrays['terms']
+        self.idf = arrays['idf']
+        self.term_weights = arrays['weights']
+        self._width = self.terms.dtype.itemsize
+        
+    def lookup(self, counts):
+        """
+        Retourne (indices, comptes) des termes du vocabulaire présents dans `counts`
+        """
+        width = self._width
+        keys = []
+        values = []
+        for term, count in counts.items():
+            key = term.encode('utf-8')
+            # Un terme plus long que la table ne peut pas être dans le vocabulaire
+            if len(key) <= width:
+                keys.append(key)
+                values.append(count)
+        if not keys:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+            
+        candidates = np.array(keys, dtype=self.terms.dtype)
+        indices = np.searchsorted(self.terms, candidates)
+        np.minimum(indices, len(self.terms) - 1, out=indices)
+        found = self.terms[indices] == candidates
+        return indices[found], np.asarray(values, dtype=np.float64)[found]
+        
+    def term_entries(self, terms):
+        keys = [term for term in terms if len(term.encode('utf-8')) <= self._width]
+        if not keys:
+            return {}
+        candidates = np.array([term.encode('utf-8') for term in keys], dtype=self.terms.dtype)
+        indices = np.searchsorted(self.terms, candidates)
+        np.minimum(indices, len(self.terms) - 1, out=indices)
+        found = self.terms[indices] == candidates
+        return {term: (float(self.idf[index]), float(self.term_weights[index]) * self.weights_scale)
+                for term, index, present in zip(keys, indices.tolist(), found.tolist()) if present}
+        
+    def decision(self, counts):
+        indices, values = self.lookup(counts)
+        if len(indices) == 0:
+            return self.intercept
+        tfidf = values * self.idf[indices]
+        squared_norm = float(tfidf @ tfidf)
+        dot = float(values @ self.term_weights[indices]) * self.weights_scale
+        if squared_norm > 0.0:
+            dot /= squared_norm ** 0.5
+        return self.intercept + dot
+        
+    def contributions(self, counts):
+        # Table triée des termes : indice → terme sans inversion du vocabulaire
+        indices, values = self.lookup(counts)
+        if len(indices) == 0:
+            return []
+        tfidf = values * self.idf[indices]
+        squared_norm = float(tfidf @ tfidf)
+        scale = self.weights_scale / squared_norm ** 0.5 if squared_norm > 0.0 else self.weights_scale
+        weights = values * self.term_weights[indices] * scale
+        return [(term.decode('utf-8'), float(weight))
+                for term, weight in zip(self.terms[indices].tolist(), weights.tolist())]
+
+
+def load_artifact(path):
+    """Charge un artefact mappé en mémoire et retourne son scoreur"""
+    return MappedScorer(path)
+
+
+def model_paths(release=None):
+    """
+    Dossier et chemins (.pkl) d'une version publiée, comme load_release :
+    (dossier, modèle, vectorizer). Par défaut, la version active.
+    """
+    if release is None:
+        release = current_release(Config.MODEL_DIR)
+    directory = release_dir(Config.MODEL_DIR, release)
+    return directory, os.path.join(directory, MODEL_FILE), os.path.join(directory, VECTORIZER_FILE)
+
+
+def load_sklearn_models(release=None):
+    """Modèle et vectorizer d'origine (fichiers .pkl de la version)"""
+    _, model_path, vectorizer_path = model_paths(release)
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    with open(vectorizer_path, 'rb') as f:
+        vectorizer = pickle.load(f)
+    return model, vectorizer
+
+
+def read_texts(path, text_field='text', label_field=None):
+    """
+    Textes (et labels si `label_field`) d'un fichier de validation JSONL ou CSV
+    """
+    texts, labels = [], []
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            csv.field_size_limit(sys.maxsize)
+            records = csv.DictReader(f)
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        for record in records:
+            text = record.get(text_field)
+            if isinstance(text, str) and text.strip():
+                texts.append(text)
+                if label_field:
+                    labels.append(int(record[label_field]))
+    return texts, labels
+
+
+def check_variant(reference, scorer, texts, labels=None):
+    """
+    Compare un scoreur aux probabilités de référence (modèle scikit-learn) :
+    accord des labels, écart de probabilité, exactitude si les labels sont connus
+    """
+    expected_labels, expected = reference
+    predictions = scorer.predict_batch(texts)
+    predicted = np.array([prediction for prediction, _ in predictions])
+    probabilities = np.array([probs[1] for _, probs in predictions])
+    differences = np.abs(probabilities - expected)
+    result = {
+        'texts': len(texts),
+        'label_agreement': round(float((predicted == expected_labels).mean()), 6),
+        'label_flips': int((predicted != expected_labels).sum()),
+        'max_prob_diff': float(differences.max()),
+        'mean_prob_diff': float(differences.mean()),
+    }
+    if labels:
+        result['accuracy'] = round(float((predicted == np.asarray(labels)).mean()), 6)
+    return result
+
+
+def check_variants(texts, labels=None, precisions=PRECISIONS, release=None):
+    """
+    Exporte chaque précision dans un dossier temporaire et la compare au modèle
+    scikit-learn d'origine. Retourne {nom de la variante: résultat}
+    """
+    model, vectorizer = load_sklearn_models(release)
+    features = vectorizer.transform(texts)
+    reference = (model.predict(features), model.predict_proba(features)[:, 1])
+    
+    scorer = LinearScorer.from_sklearn(vectorizer, model)
+    results = {'pickle': check_variant(reference, scorer, texts, labels)}
+    if labels:
+        results['sklearn'] = {'accuracy': round(float((reference[0] == np.asarray(labels)).mean()), 6)}
+    with tempfile.TemporaryDirectory() as directory:
+        for precision in precisions:
+            path = os.path.join(directory, artifact_file(precision))
+            export_artifact(scorer, path, 'check', precision)
+            results[f'mmap-{precision}'] = check_variant(reference, load_artifact(path), texts, labels)
+    return results
+
+
+def _measure(fmt, path=None, iterations=200, release=None):
+    """Mesure le chargement dans le processus courant (appelé en sous-processus)"""
+    before = memory_usage()
+    start = time.perf_counter()
+    if fmt == 'mmap':
+        scorer = load_artifact(path or os.path.join(model_paths(release)[0], artifact_file()))
+    else:
+        model, vectorizer = load_sklearn_models(release)
+        scorer = LinearScorer.from_sklearn(vectorizer, model)
+    load_ms = (time.perf_counter() - start) * 1000
+    
+    # Première prédiction : touche les pages réellement utilisées
+    start = time.perf_counter()
+    scorer.predict('Scientists at Harvard Medical School publish peer-reviewed study')
+    first_ms = (time.perf_counter() - start) * 1000
+    
+    # Latence en régime établi, sur un article d'environ 2000 caractères
+    text = ' '.join(WARMUP_TEXTS * 8)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        scorer.predict(text)
+    predict_ms = (time.perf_counter() - start) * 1000 / iterations
+    
+    after = memory_usage()
+    return {
+        'format': fmt if fmt == 'pickle' else f'mmap-{scorer.precision}',
+        'load_ms': round(load_ms, 2),
+        'first_prediction_ms': round(first_ms, 3),
+        'predict_ms': round(predict_ms, 4),
+        'file_kb': round(os.path.getsize(path) / 1024, 1) if path else None,
+        'rss_mb': after,
+        'rss_delta_mb': {key: round(after[key] - before.get(key, 0), 1) for key in after},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Artefact de modèle mappable en mémoire")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    export = subparsers.add_parser('export', help="Convertir les .pkl en artefact mmap")
+    export.add_argument('--precision', choices=PRECISIONS, default='float64')
+    export.add_argument('--output', help="Chemin de l'artefact (dossier de la version par défaut)")
+    
+    check = subparsers.add_parser('check', help="Comparer les variantes au modèle d'origine")
+    check.add_argument('--data', required=True, help="Jeu de validation (.jsonl ou .csv)")
+    check.add_argument('--text-field', default='text')
+    check.add_argument('--label-field', help="Colonne du label (0 = fake, 1 = reliable), optionnelle")
+    check.add_argument('--precision', choices=PRECISIONS, nargs='+', default=list(PRECISIONS))
+    check.add_argument('--min-agreement', type=float, default=0.999,
+                       help="Part minimale de labels identiques au modèle d'origine")
+    check.add_argument('--max-prob-diff', type=float, default=0.01,
+                       help="Écart maximal toléré sur une probabilité")
+    
+    compare = subparsers.add_parser('compare', help="Comparer chargement, RSS et latence des variantes")
+    
+    measure = subparsers.add_parser('measure', help=argparse.SUPPRESS)
+    measure.add_argument('format', choices=['pickle', 'mmap'])
+    measure.add_argument('--path')
+    
+    for subparser in (export, check, compare, measure):
+        subparser.add_argument('--release', help="Version publiée (models/<nom>/, version active par défaut)")
+        
+    args = parser.parse_args(argv)
+    
+    if args.command == 'export':
+        directory, model_path, vectorizer_path = model_paths(args.release)
+        output = args.output or os.path.join(directory, artifact_file(args.precision))
+        model, vectorizer = load_sklearn_models(args.release)
+        scorer = LinearScorer.from_sklearn(vectorizer, model)
+        version = compute_model_version(model_path, vectorizer_path)
+        header = export_artifact(scorer, output, version, args.precision)
+        print(f"✅ Artefact écrit: {os.path.abspath(output)}")
+        print(f"   Version du modèle: {header['model_version']}")
+        print(f"   Termes: {header['n_features']}")
+        print(f"   Précision: {header['precision']}")
+        print(f"   Taille: {os.path.getsize(output) / 1024:.1f} Ko")
+        
+    elif args.command == 'check':
+        texts, labels = read_texts(args.data, args.text_field, args.label_field)
+        if not texts:
+            raise SystemExit(f"❌ Aucun texte dans {args.data} (champ {args.text_field!r})")
+        failed = []
+        for name, result in check_variants(texts, labels, args.precision, args.release).items():
+            print(json.dumps(dict(result, variant=name)))
+            if 'label_agreement' in result and (result['label_agreement'] < args.min_agreement
+                                                or result['max_prob_diff'] > args.max_prob_diff):
+                failed.append(name)
+        if failed:
+            print(f"❌ Variantes hors tolérance: {', '.join(failed)}")
+            return 1
+        print(f"✅ Toutes les variantes sont dans la tolérance ({len(texts)} textes)")
+        
+    elif args.command == 'compare':
+        # Chaque variante est mesurée dans un processus neuf (imports compris)
+        model, vectorizer = load_sklearn_models(args.release)
+        scorer = LinearScorer.from_sklearn(vectorizer, model)
+        with tempfile.TemporaryDirectory() as directory:
+            variants = [('pickle', None)]
+            for precision in PRECISIONS:
+                path = os.path.join(directory, artifact_file(precision))
+                export_artifact(scorer, path, 'compare', precision)
+                variants.append(('mmap', path))
+            for fmt, path in variants:
+                command = [sys.executable, os.path.abspath(__file__), 'measure', fmt]
+                if path:
+                    command += ['--path', path]
+                if args.release:
+                    command += ['--release', args.release]
+                output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+                print(output.strip())
+                
+    elif args.command == 'measure':
+        print(json.dumps(_measure(args.format, args.path, release=args.release)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""
+Point d'entrée ASGI avec micro-lots pour l'API FCC Fake News Detector
+
+Les appels POST /predict concurrents sont regroupés par l'ordonnanceur de
+micro-lots (voir batching.py) puis scorés en un seul lot. Le schéma des
+requêtes et des réponses est exactement celui de l'application Flask ; les
+autres routes (/, /health, /predict/batch, pré-requêtes CORS), ainsi que les
+appels /predict en MessagePack, sont servies par l'application Flask
+elle-même, appelée via un pont WSGI dans un thread.
+
+Lancement (depuis le dossier api/) :
+    pip install uvicorn
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from batching import MicroBatcher
+from governor import Overloaded
+import app as flask_api
+import formats
+
+logger = logging.getLogger('fcc.asgi')
+
+
+def score_batch(texts):
+    """
+    Score un micro-lot avec la version active du modèle, lue une seule fois :
+    retourne [(classe, probabilités, détails, quasi-doublon, version), ...]
+    """
+    current = flask_api.bundle
+    start = time.perf_counter()
+    predictions = flask_api.score_texts(texts, 'predict', current)
+    # Durée par texte : estimation de l'attente pour le contrôle d'admission
+    flask_api.governor.observe((time.perf_counter() - start) / len(texts))
+    return [prediction + (current.version,) for prediction in predictions]
+
+
+batcher = MicroBatcher(
+    score_batch,
+    max_batch_size=Config.MICROBATCH_MAX_SIZE,
+    max_wait_ms=Config.MICROBATCH_MAX_WAIT_MS
+)
+
+# La file d'attente des inférences est celle des micro-lots
+flask_api.admission_queue_depth.set_function(lambda: batcher.pending)
+
+
+# ============================================================
+# OUTILS HTTP
+# ============================================================
+
+async def read_body(receive, limit=None):
+    """
+    Lit le corps complet de la requête. Retourne None dès que le corps dépasse
+    `limit` octets (le reste n'est pas lu)
+    """
+    chunks = []
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if limit is not None and size > limit:
+            return None
+        chunks.append(chunk)
+        more_body = message.get('more_body', False)
+    return b''.join(chunks)
+
+
+async def send_response(send, status, body, headers):
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def encode_json(payload):
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+async def send_json(send, payload, status=200, body=None, headers=()):
+    """
+    Envoie une réponse JSON (mêmes en-têtes CORS que l'application Flask).
+    `headers` : en-têtes supplémentaires (nom, valeur). Retourne la taille du corps envoyé.
+    """
+    if body is None:
+        body = encode_json(payload)
+    await send_response(send, status, body, [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode('latin-1')),
+        (b'access-control-allow-origin', b'*'),
+    ] + [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers])
+    return len(body)
+
+
+def header_value(scope, name):
+    for key, value in scope.get('headers', []):
+        if key.lower() == name:
+            return value.decode('latin-1')
+    return ''
+
+
+def is_json(scope):
+    """Même règle que `request.is_json` de Flask"""
+    mimetype = header_value(scope, b'content-type').split(';')[0].strip().lower()
+    return mimetype == 'application/json' or (
+        mimetype.startswith('application/') and mimetype.endswith('+json'))
+
+
+def is_binary(scope):
+    """Requête ou réponse MessagePack (formats.py) : servie par Flask, hors micro-lots"""
+    return (formats.is_msgpack(header_value(scope, b'content-type'))
+            or 'msgpack' in header_value(scope, b'accept'))
+
+
+# ============================================================
+# PONT WSGI VERS L'APPLICATION FLASK
+# ============================================================
+
+def call_wsgi(scope, body):
+    """Exécute l'application Flask pour une requête ASGI (appelé dans un thread)"""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for key, value in scope.get('headers', []):
+        name = key.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            environ['HTTP_' + name] = value
+            
+    response = {}
+    
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1'))
+                               for k, v in headers]
+    
+    result = flask_api.app.wsgi_app(environ, start_response)
+    try:
+        content = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], content
+
+
+# ============================================================
+# ROUTES
+# ============================================================
+
+async def predict(scope, receive, send):
+    """POST /predict : même validation et même réponse que Flask, scoring en micro-lot"""
+    start = time.perf_counter()
+    flask_api.requests_in_flight.inc()
+    try:
+        body = await read_body(receive, Config.MAX_BODY_BYTES)
+        if body is None:
+            status, size = 413, await send_json(send, {
+                'error': f'Corps de requête trop volumineux (maximum {Config.MAX_BODY_BYTES} octets)'
+            }, 413)
+        else:
+            status, size = await predict_response(scope, body, send)
+    finally:
+        flask_api.requests_in_flight.dec()
+    flask_api.record_request('predict', status, len(body) if body is not None else None,
+                             size, time.perf_counter() - start)
+
+
+async def predict_response(scope, body, send):
+    """Valide, score et envoie la réponse. Retourne (statut, taille de la réponse)"""
+    # Vérifier que le modèle est chargé
+    if flask_api.bundle is None:
+        error, status = flask_api.model_unavailable()
+        return status, await send_json(send, error, status)
+        
+    # Vérifier que la requête contient du JSON
+    if not is_json(scope):
+        return 400, await send_json(send, {
+            'error': 'Content-Type doit être application/json'
+        }, 400)
+        
+    start = time.perf_counter()
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return 400, await send_json(send, {'error': 'JSON invalide'}, 400)
+        
+    text, error, status = flask_api.parse_text_payload(data)
+    if error is None:
+        top_k, error, status = flask_api.parse_explain(data)
+    if error is None:
+        fields, message = formats.parse_fields(data, formats.JSON)
+        if message is not None:
+            error, status = {'error': message}, 400
+    flask_api.stage_duration.observe(time.perf_counter() - start, 'predict', 'parse')
+    if error is not None:
+        return status, await send_json(send, error, status)
+        
+    # Contrôle d'admission : la file est celle des micro-lots, vidée par un seul thread
+    try:
+        flask_api.governor.check(batcher.pending)
+    except Overloaded as e:
+        flask_api.admission_rejected.inc(e.reason)
+        return 503, await send_json(send, {
+            'error': 'Serveur surchargé, réessayez plus tard',
+            'reason': e.reason,
+            'retry_after': e.retry_after
+        }, 503, headers=[('Retry-After', str(e.retry_after))])
+        
+    try:
+        start = time.perf_counter()
+        if top_k:
+            # Explication : hors micro-lot, dans un thread
+            current = flask_api.bundle
+            prediction, probabilities, details, explanation = await asyncio.get_running_loop().run_in_executor(
+                None, flask_api.explain_text, text, current, top_k)
+            near_duplicate, version = None, current.version
+        else:
+            prediction, probabilities, details, near_duplicate, version = await batcher.submit(text)
+        flask_api.record_prediction(text, 'predict', version, prediction, probabilities, details,
+                                    time.perf_counter() - start)
+        start = time.perf_counter()
+        result = formats.select(flask_api.build_result(text, prediction, probabilities, details,
+                                                       version, near_duplicate), fields)
+        if top_k:
+            result['explanation'] = explanation
+        response = encode_json(result)
+        flask_api.stage_duration.observe(time.perf_counter() - start, 'predict', 'response')
+        size = await send_json(send, None, body=response)
+        # Évaluation fantôme : dépôt après l'envoi de la réponse
+        flask_api.submit_shadow(text, prediction, probabilities)
+        return 200, size
+    except Exception as e:
+        logger.exception("❌ Erreur lors de la prédiction")
+        return 500, await send_json(send, {
+            'error': 'Erreur lors de la prédiction',
+            'details': str(e)
+        }, 500)
+
+
+async def forward(scope, receive, send):
+    """Toute autre route : servie par l'application Flask dans un thread"""
+    body = await read_body(receive)
+    loop = asyncio.get_running_loop()
+    status, headers, content = await loop.run_in_executor(None, call_wsgi, scope, body)
+    
+    # /health : ajouter les statistiques des micro-lots
+    if scope['path'] == '/health' and status == 200:
+        payload = json.loads(content)
+        payload['microbatch'] = batcher.stats()
+        return await send_json(send, payload)
+        
+    await send_response(send, status, content, headers)
+
+
+async def lifespan(scope, receive, send):
+    """Charge les modèles et démarre l'ordonnanceur au démarrage du serveur"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, flask_api.create_app)
+                await batcher.start()
+            except BaseException as e:
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await batcher.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """Application ASGI"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(scope, receive, send)
+    if scope['type'] != 'http':
+        return
+        
+    if scope['path'] == '/predict' and scope['method'] == 'POST' and not is_binary(scope):
+        return await predict(scope, receive, send)
+    return await forward(scope, receive, send)
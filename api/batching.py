@@ -0,0 +1,116 @@
+"""
+Ordonnanceur de micro-lots (asyncio) pour le mode de service ASGI
+
+Les requêtes /predict concurrentes sont placées dans une file ; la file est
+vidée en un seul lot dès qu'elle atteint `max_batch_size` éléments, ou au plus
+tard `max_wait_ms` millisecondes après l'arrivée du premier élément du lot.
+Le lot est scoré dans un thread dédié pour que la boucle d'événements continue
+d'accepter les requêtes suivantes pendant le calcul.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MicroBatcher:
+    """
+    Regroupe les appels concurrents à `submit()` en appels à `score_batch(textes)`
+    """
+    
+    def __init__(self, score_batch, max_batch_size=32, max_wait_ms=5):
+        self.score_batch = score_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self._queue = None
+        self._task = None
+        self._executor = None
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        
+    async def start(self):
+        """Démarre la tâche de vidage (dans la boucle d'événements courante)"""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='microbatch')
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            
+    async def stop(self):
+        """Arrête la tâche de vidage après avoir traité les éléments en attente"""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown(wait=True)
+        self._task = None
+        
+    async def submit(self, text):
+        """Ajoute un texte au prochain lot et attend son résultat"""
+        if self._task is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+        
+    async def _collect(self):
+        # Attend le premier élément, puis complète le lot jusqu'à la taille
+        # maximale ou jusqu'à l'échéance
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Éléments déjà en file : pas d'attente
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+        
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.score_batch, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            finally:
+                self.batches += 1
+                self.items += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+                for _ in batch:
+                    self._queue.task_done()
+                    
+    @property
+    def pending(self):
+        """Éléments en attente du prochain lot"""
+        return self._queue.qsize() if self._queue is not None else 0
+        
+    def stats(self):
+        """Statistiques des lots, exposées dans /health en mode ASGI"""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': round(self.max_wait * 1000, 3),
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'pending': self.pending,
+        }
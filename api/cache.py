@@ -0,0 +1,183 @@
+"""
+Cache de prédictions en mémoire pour l'API FCC Fake News Detector
+
+Les prédictions sont indexées par une empreinte (SHA-256) du texte normalisé
+et par la version du modèle. Le cache est borné en taille (éviction LRU) et en
+durée de vie (TTL). Les requêtes identiques simultanées sont regroupées : un
+seul calcul est lancé, les autres attendent son résultat (single-flight).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+# Caractères normalisés au plus par empreinte : au-delà, le texte est haché tel
+# quel (le découpage en mots d'un article de plusieurs Mo coûterait des dizaines de ms)
+NORMALIZE_MAX_CHARS = 20000
+
+
+def normalize_text(text):
+    """
+    Normalise un texte pour le cache : minuscules et espaces compactés
+    (sans effet sur la tokenisation TF-IDF, donc sans effet sur la prédiction)
+    """
+    return ' '.join(text.lower().split())
+
+
+def text_hash(text):
+    """
+    Empreinte SHA-256 (hexadécimale) du texte normalisé. Seuls les
+    NORMALIZE_MAX_CHARS premiers caractères sont normalisés, la suite est
+    ajoutée sans transformation : pour un texte long, la casse et les espaces
+    ne sont ignorés qu'au début.
+    """
+    digest = hashlib.sha256(normalize_text(text[:NORMALIZE_MAX_CHARS]).encode('utf-8'))
+    if len(text) > NORMALIZE_MAX_CHARS:
+        digest.update(b'\0')
+        digest.update(text[NORMALIZE_MAX_CHARS:].encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+class _InFlight:
+    """Calcul en cours pour une clé, partagé entre les requêtes concurrentes"""
+    
+    __slots__ = ('event', 'value', 'error')
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PredictionCache:
+    """
+    Cache LRU + TTL thread-safe avec regroupement des calculs concurrents
+    """
+    
+    def __init__(self, max_size=10000, ttl_seconds=3600, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clé -> (valeur, expiration)
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        
+    @staticmethod
+    def make_key(text, model_version):
+        """Clé de cache : version du modèle + empreinte du texte normalisé"""
+        return PredictionCache.key_for_hash(text_hash(text), model_version)
+        
+    @staticmethod
+    def key_for_hash(digest, model_version):
+        """Clé de cache d'un texte dont l'empreinte est déjà connue (historique)"""
+        return f"{model_version}:{digest}"
+        
+    def _lookup(self, key):
+        # Appelé avec le verrou : retourne (trouvé, valeur)
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+        
+    def _store(self, key, value):
+        # Appelé avec le verrou
+        if self.max_size <= 0:
+            return
+        expires_at = self._clock() + self.ttl_seconds if self.ttl_seconds else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            
+    def get(self, key):
+        """Retourne la valeur en cache ou None (compte un hit ou un miss)"""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            return None
+            
+    def put(self, key, value):
+        """Ajoute (ou remplace) une valeur dans le cache"""
+        with self._lock:
+            self._store(key, value)
+            
+    def get_or_compute(self, key, compute):
+        """
+        Retourne la valeur en cache, ou la calcule avec `compute()`.
+        Si le même calcul est déjà en cours dans un autre thread, attend
+        son résultat au lieu de le relancer.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                self.misses += 1
+                inflight = self._inflight[key] = _InFlight()
+                owner = True
+            else:
+                self.coalesced += 1
+                owner = False
+                
+        if not owner:
+            inflight.event.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.value
+            
+        try:
+            value = compute()
+        except Exception as e:
+            inflight.error = e
+            raise
+        else:
+            inflight.value = value
+            with self._lock:
+                self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight.event.set()
+            
+    def clear(self):
+        """Vide le cache (par exemple après un changement de modèle)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+            
+    def stats(self):
+        """Compteurs exposés dans /health"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'coalesced': self.coalesced,
+                'invalidations': self.invalidations,
+            }
@@ -17,10 +17,133 @@ class Config:
     MODEL_PATH = os.path.join(MODEL_DIR, 'fake_news_model.pkl')
     VECTORIZER_PATH = os.path.join(MODEL_DIR, 'tfidf_vectorizer.pkl')
     
+    # Artefact mappable en mémoire (généré par `python api/artifact.py export`)
+    ARTIFACT_PATH = os.path.join(MODEL_DIR, 'fake_news_model.mmap')
+    
+    # Format de chargement : 'pickle' (par défaut) ou 'mmap' (partagé entre workers)
+    MODEL_FORMAT = os.environ.get('FCC_MODEL_FORMAT', 'pickle')
+    
+    # Précision de l'artefact mmap : 'float64' (exacte), 'float32' ou 'int8'
+    # (variantes compactes, générées par `python api/artifact.py export --precision ...`)
+    MODEL_PRECISION = os.environ.get('FCC_MODEL_PRECISION', 'float64')
+    
+    # Rechargement à chaud : jeton de POST /admin/reload (endpoint désactivé si
+    # vide) et intervalle (s) de surveillance de models/CURRENT (0 : désactivée)
+    ADMIN_TOKEN = os.environ.get('FCC_ADMIN_TOKEN', '')
+    MODEL_WATCH_INTERVAL = float(os.environ.get('FCC_MODEL_WATCH_INTERVAL', 0))
+    
+    # Démarrage : charger les modèles dans un thread (create_app) pour que /health
+    # réponde tout de suite ; /ready passe à 200 une fois les modèles préchauffés
+    BACKGROUND_LOAD = os.environ.get('FCC_BACKGROUND_LOAD', '0') == '1'
+    
     # Configuration Flask
     DEBUG = True
-    HOST = '0.0.0.0'
-    PORT = 5000
+    HOST = os.environ.get('FCC_HOST', '0.0.0.0')
+    PORT = int(os.environ.get('FCC_PORT', 5000))
+    
+    # Serveur pré-forké (server.py)
+    WORKERS = int(os.environ.get('FCC_WORKERS', os.cpu_count() or 1))
+    MAX_REQUESTS = int(os.environ.get('FCC_MAX_REQUESTS', 10000))
+    MAX_REQUESTS_JITTER = int(os.environ.get('FCC_MAX_REQUESTS_JITTER', 1000))
+    GRACEFUL_TIMEOUT = float(os.environ.get('FCC_GRACEFUL_TIMEOUT', 30))
+    
+    # Prédiction par lot : nombre maximal d'articles par appel à /predict/batch
+    MAX_BATCH_SIZE = int(os.environ.get('FCC_MAX_BATCH_SIZE', 1000))
+    
+    # Limites d'entrée : taille du corps HTTP (413 au-delà) et longueur d'un texte
+    MAX_BODY_BYTES = int(os.environ.get('FCC_MAX_BODY_BYTES', 16 * 1024 * 1024))
+    MAX_TEXT_CHARS = int(os.environ.get('FCC_MAX_TEXT_CHARS', 2000000))
+    
+    # Textes longs (au-delà de LONG_TEXT_CHARS caractères) : 'truncate' (budget de
+    # tokens), 'chunk' (morceaux répartis sur le document, probabilités moyennées)
+    # ou 'full' (texte entier, coût proportionnel à la longueur)
+    LONG_TEXT_MODE = os.environ.get('FCC_LONG_TEXT_MODE', 'truncate')
+    LONG_TEXT_CHARS = int(os.environ.get('FCC_LONG_TEXT_CHARS', 20000))
+    TOKEN_BUDGET = int(os.environ.get('FCC_TOKEN_BUDGET', 5000))
+    CHUNK_TOKENS = int(os.environ.get('FCC_CHUNK_TOKENS', 1000))
+    
+    # Cascade : si la version publiée contient un second modèle
+    # (second_stage_model.pkl et second_stage_vectorizer.pkl), les textes dont la
+    # probabilité « Reliable News » du premier modèle tombe dans
+    # [CASCADE_LOW, CASCADE_HIGH] sont rescorés par ce second modèle
+    CASCADE_ENABLED = os.environ.get('FCC_CASCADE_ENABLED', '1') == '1'
+    CASCADE_LOW = float(os.environ.get('FCC_CASCADE_LOW', 0.35))
+    CASCADE_HIGH = float(os.environ.get('FCC_CASCADE_HIGH', 0.65))
+    
+    # Évaluation fantôme (shadow.py) : SHADOW_RELEASE est une version de models/
+    # (sous-dossier, sans la rendre active) scorée en arrière-plan sur une
+    # fraction SHADOW_SAMPLE_RATE des prédictions renvoyées, par SHADOW_WORKERS
+    # threads ; au-delà de SHADOW_QUEUE_SIZE textes en attente, les suivants
+    # sont abandonnés. Désactivée si SHADOW_RELEASE est vide.
+    SHADOW_RELEASE = os.environ.get('FCC_SHADOW_RELEASE', '')
+    SHADOW_SAMPLE_RATE = float(os.environ.get('FCC_SHADOW_SAMPLE_RATE', 0.05))
+    SHADOW_WORKERS = int(os.environ.get('FCC_SHADOW_WORKERS', 1))
+    SHADOW_QUEUE_SIZE = int(os.environ.get('FCC_SHADOW_QUEUE_SIZE', 1000))
+    
+    # Sessions d'édition (sessions.py) : brouillons rescorés de façon
+    # incrémentale (POST /sessions puis PATCH /sessions/<id>). Au plus
+    # SESSION_MAX_COUNT sessions par processus (la moins récente est évincée),
+    # expirées après SESSION_TTL_SECONDS sans utilisation ; un brouillon compte
+    # au plus SESSION_MAX_CHARS caractères.
+    SESSION_MAX_COUNT = int(os.environ.get('FCC_SESSION_MAX_COUNT', 256))
+    SESSION_TTL_SECONDS = int(os.environ.get('FCC_SESSION_TTL_SECONDS', 1800))
+    SESSION_MAX_CHARS = int(os.environ.get('FCC_SESSION_MAX_CHARS', 100000))
+    
+    # Rapport d'évaluation (evaluate.py) : métriques affichées par l'application
+    # Streamlit, recalculées sur un corpus étiqueté
+    EVALUATION_REPORT = os.environ.get('FCC_EVALUATION_REPORT', os.path.join(MODEL_DIR, 'evaluation.json'))
+    
+    # Explication des prédictions (option "explain" de /predict) : nombre de
+    # termes renvoyés par défaut et maximum
+    EXPLAIN_TOP_K = int(os.environ.get('FCC_EXPLAIN_TOP_K', 10))
+    EXPLAIN_MAX_K = int(os.environ.get('FCC_EXPLAIN_MAX_K', 50))
+    
+    # Cache de prédictions (empreinte du texte normalisé + version du modèle)
+    CACHE_ENABLED = os.environ.get('FCC_CACHE_ENABLED', '1') == '1'
+    CACHE_MAX_SIZE = int(os.environ.get('FCC_CACHE_MAX_SIZE', 10000))
+    CACHE_TTL_SECONDS = int(os.environ.get('FCC_CACHE_TTL_SECONDS', 3600))
+    
+    # Historique des prédictions (store.py, SQLite) : désactivé si STORE_PATH est
+    # vide. Écriture par lots en arrière-plan ; au démarrage, les STORE_WARM_SIZE
+    # dernières prédictions de la version active préremplissent le cache.
+    # Rétention : STORE_RETENTION_DAYS jours et STORE_MAX_ROWS lignes au plus.
+    STORE_PATH = os.environ.get('FCC_STORE_PATH', '')
+    STORE_BATCH_SIZE = int(os.environ.get('FCC_STORE_BATCH_SIZE', 500))
+    STORE_FLUSH_SECONDS = float(os.environ.get('FCC_STORE_FLUSH_SECONDS', 1.0))
+    STORE_QUEUE_SIZE = int(os.environ.get('FCC_STORE_QUEUE_SIZE', 10000))
+    STORE_WARM_SIZE = int(os.environ.get('FCC_STORE_WARM_SIZE', 10000))
+    STORE_RETENTION_DAYS = float(os.environ.get('FCC_STORE_RETENTION_DAYS', 30))
+    STORE_MAX_ROWS = int(os.environ.get('FCC_STORE_MAX_ROWS', 1000000))
+    STORE_COMPACT_SECONDS = float(os.environ.get('FCC_STORE_COMPACT_SECONDS', 3600))
+    
+    # Quasi-doublons (dedup.py) : un texte dont la similarité de Jaccard estimée
+    # avec un article récemment scoré atteint DEDUP_THRESHOLD reçoit son verdict.
+    # Seuls les textes d'au moins DEDUP_MIN_TOKENS mots sont indexés.
+    DEDUP_ENABLED = os.environ.get('FCC_DEDUP_ENABLED', '1') == '1'
+    DEDUP_THRESHOLD = float(os.environ.get('FCC_DEDUP_THRESHOLD', 0.8))
+    DEDUP_MAX_SIZE = int(os.environ.get('FCC_DEDUP_MAX_SIZE', 5000))
+    DEDUP_TTL_SECONDS = int(os.environ.get('FCC_DEDUP_TTL_SECONDS', 3600))
+    DEDUP_MIN_TOKENS = int(os.environ.get('FCC_DEDUP_MIN_TOKENS', 100))
+    
+    # Gouverneur de ressources (governor.py) : threads BLAS/OpenMP par processus
+    # (0 : pas de limite), inférences simultanées par processus (0 : pas de
+    # contrôle d'admission), puis requêtes en attente et attente estimée (ms)
+    # au-delà desquelles une requête est refusée (503 + Retry-After)
+    INFERENCE_THREADS = int(os.environ.get('FCC_INFERENCE_THREADS', 1))
+    MAX_CONCURRENT_INFERENCES = int(os.environ.get('FCC_MAX_CONCURRENT_INFERENCES', 4))
+    ADMISSION_MAX_QUEUE = int(os.environ.get('FCC_ADMISSION_MAX_QUEUE', 64))
+    ADMISSION_MAX_WAIT_MS = float(os.environ.get('FCC_ADMISSION_MAX_WAIT_MS', 1000))
+    
+    # Mode ASGI (asgi.py) : micro-lots de /predict
+    MICROBATCH_MAX_SIZE = int(os.environ.get('FCC_MICROBATCH_MAX_SIZE', 32))
+    MICROBATCH_MAX_WAIT_MS = float(os.environ.get('FCC_MICROBATCH_MAX_WAIT_MS', 5))
+    
+    # Journalisation (logs.py) : niveau, format ('text' ou 'json'), fraction des
+    # requêtes journalisées et seuil (ms) au-delà duquel une requête est toujours journalisée
+    LOG_LEVEL = os.environ.get('FCC_LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.environ.get('FCC_LOG_FORMAT', 'text')
+    LOG_SAMPLE_RATE = float(os.environ.get('FCC_LOG_SAMPLE_RATE', 0.01))
+    SLOW_REQUEST_MS = float(os.environ.get('FCC_SLOW_REQUEST_MS', 500))
     
     # Labels
     LABELS = {
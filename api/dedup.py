@@ -0,0 +1,287 @@
+"""
+Index de quasi-doublons (MinHash + LSH) pour l'API FCC Fake News Detector
+
+Les dépêches reprises par plusieurs médias ne diffèrent souvent que par la
+signature, un chapeau ou un pied de page : le cache exact (cache.py) les
+manque. Chaque article récemment scoré est résumé par une signature MinHash
+de ses 3-grammes de mots (à une seule permutation : un hachage par n-gramme,
+réparti en `num_perm` cases) ; un texte dont la similarité de Jaccard estimée
+avec un article indexé atteint le seuil reçoit le même verdict, sans être scoré.
+
+Les signatures sont découpées en bandes (LSH) : seuls les articles partageant
+au moins une bande avec le texte sont comparés. L'index est borné en taille
+(les plus anciens sont évincés d'abord) et en durée de vie (TTL), et vidé à
+chaque changement de modèle.
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# Article indexé le plus proche d'un texte : identifiant, similarité estimée,
+# verdict (classe, probabilités)
+NearDuplicate = namedtuple('NearDuplicate', ['doc_id', 'similarity', 'verdict'])
+
+# Constantes (impaires) de combinaison des hachages de mots en hachage de
+# n-gramme et de mélange des bits (MurmurHash3)
+_SHINGLE_MULTIPLIER = 0x9E3779B97F4A7C15
+_MIX_MULTIPLIERS = (0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53)
+
+# Case de signature sans n-gramme, et décalage des cases recopiées par densification
+_EMPTY = 0xFFFFFFFF
+_DENSIFY_OFFSET = 0x9E3779B1
+
+# Longueur moyenne maximale d'un mot (espace compris) : seuls les
+# max_tokens × _MAX_CHARS_PER_TOKEN premiers caractères sont découpés
+_MAX_CHARS_PER_TOKEN = 16
+
+
+def choose_bands(num_perm, threshold, recall=0.99):
+    """
+    Découpage LSH (bandes, lignes par bande) de `num_perm` valeurs : le plus de
+    lignes par bande (donc le moins de faux candidats) tel qu'un texte de
+    similarité `threshold` reste candidat avec une probabilité >= `recall`
+    """
+    for rows in range(num_perm, 0, -1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class _Entry:
+    """Article indexé"""
+    
+    __slots__ = ('doc_id', 'signature', 'band_keys', 'verdict', 'version', 'expires_at')
+    
+    def __init__(self, doc_id, signature, band_keys, verdict, version, expires_at):
+        self.doc_id = doc_id
+        self.signature = signature
+        self.band_keys = band_keys
+        self.verdict = verdict
+        self.version = version
+        self.expires_at = expires_at
+
+
+class NearDuplicateIndex:
+    """
+    Index MinHash/LSH des articles récemment scorés, partagé entre threads.
+    Un index de taille maximale nulle est désactivé (aucune signature calculée).
+    Les textes de moins de `min_tokens` mots ne sont pas indexés (la similarité
+    y est peu fiable et le scoring déjà bon marché) ; au-delà de `max_tokens`
+    mots, seul le début du texte est signé.
+    """
+    
+    def __init__(self, threshold=0.8, max_size=5000, ttl_seconds=3600, num_perm=64,
+                 shingle_size=3, min_tokens=100, max_tokens=5000, clock=time.monotonic):
+        if num_perm < 2 or num_perm & (num_perm - 1):
+            raise ValueError(f"num_perm doit être une puissance de 2 (reçu {num_perm})")
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.min_tokens = max(min_tokens, shingle_size)
+        self.max_tokens = max_tokens
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        self._bin_bits = num_perm.bit_length() - 1
+        self._clock = clock
+        
+        self._entries = OrderedDict()
+        self._buckets = [{} for _ in range(self.bands)]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        
+    @property
+    def enabled(self):
+        return self.max_size > 0
+        
+    def signature(self, text):
+        """Signature MinHash (uint32 x num_perm) du texte, ou None s'il n'est pas indexable"""
+        if not self.enabled:
+            return None
+        # numpy n'est importé qu'au premier texte indexable, pas à l'import de l'API
+        import numpy as np
+        
+        # Coût borné pour un texte très long : découpage du début seulement
+        tokens = text[:self.max_tokens * _MAX_CHARS_PER_TOKEN].lower().split()
+        if len(tokens) < self.min_tokens:
+            return None
+        del tokens[self.max_tokens:]
+        
+        # Hachage 64 bits de chaque n-gramme de mots, puis mélange (finaliseur de MurmurHash3)
+        hashes = np.fromiter(map(hash, tokens), dtype=np.int64, count=len(tokens)).view(np.uint64)
+        count = len(hashes) - self.shingle_size + 1
+        shingles = hashes[:count].copy()
+        for offset in range(1, self.shingle_size):
+            shingles *= np.uint64(_SHINGLE_MULTIPLIER)
+            shingles += hashes[offset:offset + count]
+        for multiplier in _MIX_MULTIPLIERS:
+            shingles ^= shingles >> np.uint64(33)
+            shingles *= np.uint64(multiplier)
+        shingles ^= shingles >> np.uint64(33)
+        
+        # Une seule permutation : les bits de poids fort choisissent la case,
+        # la signature garde le minimum des 32 bits de poids faible par case
+        bins = (shingles >> np.uint64(64 - self._bin_bits)).astype(np.intp)
+        signature = np.full(self.num_perm, _EMPTY, dtype=np.uint32)
+        np.minimum.at(signature, bins, shingles.astype(np.uint32))
+        
+        # Densification : une case vide reprend la case remplie suivante (circulairement)
+        filled = np.flatnonzero(signature != _EMPTY)
+        if len(filled) < self.num_perm:
+            positions = np.arange(self.num_perm)
+            source = filled[np.searchsorted(filled, positions) % len(filled)]
+            distance = ((source - positions) % self.num_perm).astype(np.uint32)
+            signature = signature[source] + distance * np.uint32(_DENSIFY_OFFSET)
+        return signature
+        
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+        
+    def _remove(self, key):
+        # Appelé avec le verrou
+        entry = self._entries.pop(key)
+        for bucket, band_key in zip(self._buckets, entry.band_keys):
+            keys = bucket[band_key]
+            keys.discard(key)
+            if not keys:
+                del bucket[band_key]
+                
+    def _purge_expired(self, now):
+        # Appelé avec le verrou : les entrées sont rangées par date d'ajout
+        if not self.ttl_seconds:
+            return
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now:
+                break
+            self._remove(key)
+            self.expirations += 1
+            
+    def lookup(self, signature, model_version):
+        """
+        Article indexé le plus similaire (même version du modèle, similarité
+        >= seuil) sous forme de NearDuplicate, ou None
+        """
+        if signature is None:
+            return None
+        with self._lock:
+            self._purge_expired(self._clock())
+            match = self._closest(signature, model_version)
+            if match is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return match
+            
+    def lookup_batch(self, signatures, model_version):
+        """
+        Quasi-doublons de textes scorés ensemble, dans l'ordre : chaque texte
+        est comparé à l'index, puis aux textes précédents du lot restés sans
+        correspondance (ils seront scorés puis indexés). Retourne pour chaque
+        signature un NearDuplicate de l'index, un couple (position du texte
+        précédent, similarité) ou None
+        """
+        with self._lock:
+            self._purge_expired(self._clock())
+            results = [self._closest(signature, model_version) if signature is not None else None
+                       for signature in signatures]
+                       
+        # Textes du lot entre eux, hors verrou : mêmes bandes LSH que l'index,
+        # seuls les textes partageant une bande sont comparés
+        buckets = [{} for _ in range(self.bands)]
+        for position, signature in enumerate(signatures):
+            if signature is None or results[position] is not None:
+                continue
+            band_keys = self._band_keys(signature)
+            candidates = set()
+            for bucket, band_key in zip(buckets, band_keys):
+                candidates.update(bucket.get(band_key, ()))
+            for earlier in sorted(candidates):
+                similarity = int((signatures[earlier] == signature).sum()) / self.num_perm
+                if similarity >= self.threshold and (results[position] is None or similarity > results[position][1]):
+                    results[position] = (earlier, similarity)
+            if results[position] is None:
+                # Texte scoré : candidat pour les textes suivants du lot
+                for bucket, band_key in zip(buckets, band_keys):
+                    bucket.setdefault(band_key, []).append(position)
+                    
+        hits = sum(result is not None for result in results)
+        with self._lock:
+            self.hits += hits
+            self.misses += sum(signature is not None for signature in signatures) - hits
+        return results
+        
+    def _closest(self, signature, model_version):
+        # Appelé avec le verrou : article indexé le plus similaire ou None
+        candidates = set()
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            keys = bucket.get(band_key)
+            if keys:
+                candidates.update(keys)
+                
+        best_key, best_similarity = None, 0.0
+        for key in candidates:
+            entry = self._entries[key]
+            if entry.version != model_version:
+                continue
+            similarity = int((entry.signature == signature).sum()) / self.num_perm
+            if similarity >= self.threshold and similarity > best_similarity:
+                best_key, best_similarity = key, similarity
+                
+        if best_key is None:
+            return None
+        entry = self._entries[best_key]
+        return NearDuplicate(entry.doc_id, best_similarity, entry.verdict)
+        
+    def add(self, key, doc_id, signature, verdict, model_version):
+        """
+        Indexe un article scoré. `key` identifie le texte (une nouvelle version
+        du même texte remplace l'ancienne), `doc_id` est renvoyé aux textes
+        qui lui ressemblent.
+        """
+        if signature is None:
+            return
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            now = self._clock()
+            if key in self._entries:
+                self._remove(key)
+            expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+            self._entries[key] = _Entry(doc_id, signature, band_keys, verdict, model_version, expires_at)
+            for bucket, band_key in zip(self._buckets, band_keys):
+                bucket.setdefault(band_key, set()).add(key)
+                
+            self._purge_expired(now)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+                
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets = [{} for _ in range(self.bands)]
+            
+    def __len__(self):
+        return len(self._entries)
+        
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
@@ -0,0 +1,135 @@
+"""
+Formats d'échange des endpoints de prédiction : JSON (par défaut) ou MessagePack
+
+Les pipelines internes envoient des lots volumineux et ne lisent que le label
+et les probabilités. Avec `Content-Type: application/msgpack`, le corps de la
+requête est décodé par MessagePack ; avec `Accept: application/msgpack`, la
+réponse est encodée par MessagePack et /predict/batch la renvoie en colonnes
+(une liste par champ, dans l'ordre d'entrée) plutôt qu'en objets par texte.
+Les valeurs binaires ne sont pas arrondies : probabilités et confiance entre
+0 et 1, flottants sur 4 octets.
+
+Le champ `fields` de la requête (JSON ou binaire) choisit les champs renvoyés
+pour chaque texte, par exemple ["prediction_code", "probabilities"] pour se
+passer de `text_preview` et `text_length`.
+
+MessagePack est une dépendance optionnelle (`pip install msgpack`) : sans
+elle, seules les requêtes JSON sont acceptées.
+"""
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+MSGPACK_TYPES = (MSGPACK, 'application/x-msgpack')
+
+# Champs d'un résultat sélectionnables par `fields`
+FIELDS = ('prediction', 'prediction_code', 'confidence', 'probabilities', 'text_length', 'text_preview')
+
+# Champs renvoyés sans `fields` : tous en JSON (format historique), le strict
+# nécessaire en binaire
+DEFAULT_FIELDS = {JSON: FIELDS, MSGPACK: ('prediction_code', 'probabilities')}
+
+
+def available():
+    """True si MessagePack est installé"""
+    return msgpack is not None
+
+
+def is_msgpack(mimetype):
+    return (mimetype or '').split(';')[0].strip().lower() in MSGPACK_TYPES
+
+
+def negotiate(accept):
+    """
+    Format de la réponse d'après l'en-tête Accept (objet MIMEAccept de
+    werkzeug) : JSON sauf si le client préfère MessagePack. None si le client
+    n'accepte que MessagePack et qu'il n'est pas installé (406).
+    """
+    if not available():
+        if accept.best_match(MSGPACK_TYPES) and not accept.best_match([JSON]):
+            return None
+        return JSON
+    return MSGPACK if accept.best_match((JSON,) + MSGPACK_TYPES) in MSGPACK_TYPES else JSON
+
+
+def decode(body):
+    """Corps MessagePack -> objet Python. Lève ValueError si le corps est invalide."""
+    if msgpack is None:
+        raise ValueError("MessagePack n'est pas installé sur le serveur (pip install msgpack)")
+    try:
+        return msgpack.unpackb(body, raw=False, strict_map_key=True)
+    except Exception as e:
+        raise ValueError(f'MessagePack invalide ({e})') from None
+
+
+def encode(payload):
+    """Objet Python -> octets MessagePack (flottants sur 4 octets)"""
+    return msgpack.packb(payload, use_single_float=True)
+
+
+def parse_fields(data, mimetype):
+    """
+    Champ `fields` de la requête : liste de noms parmi FIELDS.
+    Retourne (tuple de champs, None) ou (None, message d'erreur)
+    """
+    fields = data.get('fields') if isinstance(data, dict) else None
+    if fields is None:
+        return DEFAULT_FIELDS[mimetype], None
+    if (not isinstance(fields, list) or not fields
+            or not all(isinstance(field, str) and field in FIELDS for field in fields)):
+        return None, f'Le champ "fields" doit être une liste non vide de champs parmi {", ".join(FIELDS)}'
+    return tuple(field for field in FIELDS if field in fields), None
+
+
+def select(result, fields):
+    """Retire d'un résultat (build_result) les champs de FIELDS non demandés"""
+    if len(fields) == len(FIELDS):
+        return result
+    for field in FIELDS:
+        if field not in fields:
+            result.pop(field, None)
+    return result
+
+
+def record(text, prediction, probabilities, fields, labels):
+    """Résultat binaire d'un texte, limité à `fields` : valeurs brutes, non arrondies"""
+    code = int(prediction)
+    fake, reliable = float(probabilities[0]), float(probabilities[1])
+    result = {}
+    if 'prediction' in fields:
+        result['prediction'] = labels.get(code, labels[0])
+    if 'prediction_code' in fields:
+        result['prediction_code'] = code
+    if 'confidence' in fields:
+        result['confidence'] = max(fake, reliable)
+    if 'probabilities' in fields:
+        result['probabilities'] = {'fake': fake, 'reliable': reliable}
+    if 'text_length' in fields:
+        result['text_length'] = len(text)
+    if 'text_preview' in fields:
+        result['text_preview'] = text[:100] + '...' if len(text) > 100 else text
+    return result
+
+
+def columns(rows, count, fields, labels):
+    """
+    Résultats en colonnes pour `count` textes : `rows` est une liste de
+    (indice, texte, classe, probabilités). Les textes en erreur ont None dans
+    chaque colonne.
+    """
+    table = {field: [None] * count for field in fields if field != 'probabilities'}
+    if 'probabilities' in fields:
+        table['probabilities'] = {'fake': [None] * count, 'reliable': [None] * count}
+        
+    for index, text, prediction, probabilities in rows:
+        for field, value in record(text, prediction, probabilities, fields, labels).items():
+            if field == 'probabilities':
+                table['probabilities']['fake'][index] = value['fake']
+                table['probabilities']['reliable'][index] = value['reliable']
+            else:
+                table[field][index] = value
+    return table
@@ -0,0 +1,196 @@
+"""
+Gouverneur de ressources des workers d'inférence
+
+Threads : les bibliothèques de calcul (BLAS d'OpenBLAS/MKL, OpenMP de
+scikit-learn) démarrent par défaut un thread par cœur dans chaque processus ;
+avec plusieurs workers sur la même machine, ces pools se disputent les cœurs.
+`limit_threads` fixe leur taille par processus : variables d'environnement
+pour les bibliothèques pas encore chargées, threadpoolctl pour celles qui le
+sont déjà.
+
+Contrôle d'admission : au plus `max_concurrent` inférences simultanées par
+processus ; les suivantes attendent leur tour dans une file bornée. Une
+requête est refusée tout de suite (Overloaded, soit 503 + Retry-After) si la
+file est pleine ou si l'attente estimée (file x durée moyenne d'une
+inférence) dépasse `max_wait_seconds`, et refusée après coup si elle a
+effectivement attendu plus longtemps. Sous surcharge, les clients sont
+prévenus immédiatement au lieu d'attendre leur délai d'expiration.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Variables lues au chargement des bibliothèques de calcul
+THREAD_VARIABLES = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'BLIS_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+)
+
+
+def set_thread_environment(threads):
+    """
+    Taille des pools de threads des bibliothèques chargées plus tard (à
+    appeler avant l'import de numpy). 0 : environnement inchangé
+    """
+    if threads > 0:
+        for name in THREAD_VARIABLES:
+            os.environ[name] = str(threads)
+
+
+def limit_threads(threads):
+    """
+    Limite à `threads` les pools BLAS/OpenMP du processus, y compris ceux
+    des bibliothèques déjà chargées. Retourne la liste des pools limités
+    ({'api', 'library', 'num_threads'}), vide si `threads` vaut 0 ou si
+    threadpoolctl n'est pas installé.
+    """
+    if threads <= 0:
+        return []
+    set_thread_environment(threads)
+    try:
+        from threadpoolctl import threadpool_info, threadpool_limits
+    except ImportError:
+        return []
+    # Hors d'un bloc `with`, la limite reste en place pour tout le processus
+    threadpool_limits(limits=threads)
+    return [{'api': pool['internal_api'], 'library': os.path.basename(pool['filepath']),
+             'num_threads': pool['num_threads']} for pool in threadpool_info()]
+
+
+class Overloaded(Exception):
+    """
+    Requête refusée par le contrôle d'admission. `reason` vaut 'queue' (file
+    pleine), 'wait' (attente estimée trop longue) ou 'timeout' (attente
+    effective trop longue) ; `retry_after` est le délai conseillé en secondes.
+    """
+    
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Serveur surchargé ({reason}), réessayez dans {retry_after} s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ResourceGovernor:
+    """
+    Contrôle d'admission des inférences d'un processus, partagé entre threads.
+    `max_concurrent` nul : pas de limite (toutes les requêtes sont admises).
+    La durée moyenne d'inférence d'un texte est une moyenne mobile
+    exponentielle ; l'attente estimée compte les textes en file (un lot de
+    /predict/batch pèse autant que ses textes).
+    """
+    
+    def __init__(self, max_concurrent=4, max_queue=64, max_wait_seconds=1.0, smoothing=0.1,
+                 clock=time.monotonic):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.smoothing = smoothing
+        self._clock = clock
+        
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent > 0 else None
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.waiting_texts = 0
+        self.admitted = 0
+        self.rejected = Counter()
+        self.mean_service_seconds = 0.0
+        
+    @property
+    def enabled(self):
+        return self._slots is not None
+        
+    def observe(self, seconds):
+        """Ajoute la durée d'inférence d'un texte à la moyenne mobile"""
+        with self._lock:
+            if self.mean_service_seconds:
+                self.mean_service_seconds += self.smoothing * (seconds - self.mean_service_seconds)
+            else:
+                self.mean_service_seconds = seconds
+                
+    def estimated_wait(self, queued, concurrency, texts=1):
+        """Attente estimée (s) d'une requête de `texts` textes arrivant derrière `queued` textes"""
+        return (queued + texts) * self.mean_service_seconds / max(concurrency, 1)
+        
+    def _reject(self, reason, wait):
+        # Appelé avec le verrou
+        self.rejected[reason] += 1
+        return Overloaded(reason, max(1, math.ceil(wait)))
+        
+    def check(self, queued, concurrency=1):
+        """
+        Admission sans attente, pour une file gérée ailleurs (micro-lots du mode
+        ASGI, un texte par requête) : lève Overloaded si `queued` textes attendent
+        déjà au-delà des limites, sinon compte la requête comme admise
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            wait = self.estimated_wait(queued, concurrency)
+            if queued >= self.max_queue:
+                raise self._reject('queue', wait)
+            if wait > self.max_wait_seconds:
+                raise self._reject('wait', wait)
+            self.admitted += 1
+            
+    @contextmanager
+    def admit(self, texts=1):
+        """
+        Occupe un créneau d'inférence pendant le bloc `with`, après une attente
+        éventuelle dans la file. Lève Overloaded si la requête est refusée.
+        `texts` : nombre de textes scorés dans le bloc (la moyenne est par texte).
+        """
+        if not self.enabled:
+            yield
+            return
+        with self._lock:
+            if self.active >= self.max_concurrent:
+                wait = self.estimated_wait(self.waiting_texts, self.max_concurrent, texts)
+                if self.waiting >= self.max_queue:
+                    raise self._reject('queue', wait)
+                if wait > self.max_wait_seconds:
+                    raise self._reject('wait', wait)
+            self.waiting += 1
+            self.waiting_texts += texts
+            
+        acquired = self._slots.acquire(timeout=self.max_wait_seconds)
+        with self._lock:
+            self.waiting -= 1
+            self.waiting_texts -= texts
+            if not acquired:
+                raise self._reject('timeout', self.estimated_wait(self.waiting_texts, self.max_concurrent, texts))
+            self.active += 1
+            self.admitted += 1
+            
+        start = self._clock()
+        try:
+            yield
+        finally:
+            duration = self._clock() - start
+            with self._lock:
+                self.active -= 1
+            self._slots.release()
+            self.observe(duration / max(texts, 1))
+            
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'max_wait_ms': round(self.max_wait_seconds * 1000, 3),
+                'active': self.active,
+                'queue_depth': self.waiting,
+                'queued_texts': self.waiting_texts,
+                'admitted': self.admitted,
+                'rejected': dict(self.rejected),
+                'mean_service_ms': round(self.mean_service_seconds * 1000, 3),
+            }
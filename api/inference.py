@@ -0,0 +1,459 @@
+"""
+Moteur d'inférence compilé pour la détection de Fake News
+
+Construit UNE SEULE FOIS, au chargement, un scoreur linéaire compact à partir
+du TfidfVectorizer et de la LogisticRegression picklés : le vocabulaire, les
+poids IDF et les coefficients sont fusionnés dans une seule table
+terme → (idf, idf × coefficient). Une prédiction se fait ensuite en un seul
+passage sur les termes du texte (logit, probabilité et label ensemble), sans
+passer par la machinerie générique de scikit-learn ni appeler deux fois le
+modèle (predict puis predict_proba).
+
+Cascade : un second modèle, plus coûteux, peut reprendre les seuls textes
+dont la probabilité donnée par le scoreur compilé tombe dans une bande
+d'incertitude (voir Cascade).
+"""
+
+import hashlib
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
+
+# Modes de traitement des textes longs (voir LongTextPolicy)
+LONG_TEXT_MODES = ('full', 'truncate', 'chunk')
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+def _word_boundary(text, position, limit):
+    """Avance `position` jusqu'à la fin du mot en cours (sans dépasser `limit`)"""
+    while 0 < position < limit and _is_word_char(text[position - 1]) and _is_word_char(text[position]):
+        position += 1
+    return position
+
+
+def compute_model_version(*paths):
+    """
+    Calcule une version courte du modèle à partir du contenu des fichiers
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class LinearScorer:
+    """
+    Scoreur TF-IDF (normalisation l2) + régression logistique binaire
+    
+    Reproduit `model.predict_proba(vectorizer.transform([text]))` pour
+    l'analyseur 'word' de scikit-learn (minuscules, token_pattern, n-grammes).
+    """
+    
+    def __init__(self, weights, intercept, classes=(0, 1),
+                 token_pattern=r"(?u)\b\w\w+\b", lowercase=True,
+                 ngram_range=(1, 1), stop_words=None):
+        # Table fusionnée : terme -> (idf, idf * coefficient)
+        self.weights = weights
+        self.n_features = len(weights) if weights is not None else 0
+        self.intercept = float(intercept)
+        self.classes = tuple(int(c) for c in classes)
+        self.token_pattern = re.compile(token_pattern)
+        self.lowercase = lowercase
+        self.ngram_range = tuple(ngram_range)
+        self.stop_words = frozenset(stop_words) if stop_words else None
+        
+    @classmethod
+    def from_sklearn(cls, vectorizer, model):
+        """
+        Compile le scoreur depuis un TfidfVectorizer et une LogisticRegression
+        entraînés. Lève ValueError si la configuration n'est pas reproductible.
+        """
+        unsupported = []
+        if vectorizer.analyzer != 'word':
+            unsupported.append(f"analyzer={vectorizer.analyzer!r}")
+        if vectorizer.tokenizer is not None or vectorizer.preprocessor is not None:
+            unsupported.append("tokenizer/preprocessor personnalisé")
+        if vectorizer.strip_accents is not None:
+            unsupported.append(f"strip_accents={vectorizer.strip_accents!r}")
+        if vectorizer.binary or vectorizer.sublinear_tf:
+            unsupported.append("binary/sublinear_tf")
+        if vectorizer.norm != 'l2':
+            unsupported.append(f"norm={vectorizer.norm!r}")
+        if len(model.classes_) != 2 or model.coef_.shape[0] != 1:
+            unsupported.append("modèle non binaire")
+        if unsupported:
+            raise ValueError("Configuration non supportée par le scoreur compilé: "
+                             + ", ".join(unsupported))
+                             
+        coef = model.coef_[0]
+        if vectorizer.use_idf:
+            idf = vectorizer.idf_
+        else:
+            idf = [1.0] * len(coef)
+            
+        weights = {
+            term: (float(idf[index]), float(idf[index] * coef[index]))
+            for term, index in vectorizer.vocabulary_.items()
+        }
+        
+        return cls(
+            weights,
+            model.intercept_[0],
+            classes=model.classes_,
+            token_pattern=vectorizer.token_pattern,
+            lowercase=vectorizer.lowercase,
+            ngram_range=vectorizer.ngram_range,
+            stop_words=vectorizer.get_stop_words(),
+        )
+        
+    def analyzer_params(self):
+        """Paramètres de tokenisation et de décision (hors table de poids)"""
+        return {
+            'intercept': self.intercept,
+            'classes': list(self.classes),
+            'token_pattern': self.token_pattern.pattern,
+            'lowercase': self.lowercase,
+            'ngram_range': list(self.ngram_range),
+            'stop_words': sorted(self.stop_words) if self.stop_words else None,
+        }
+        
+    def tokenize(self, text):
+        """Découpe le texte en tokens (unigrammes) comme scikit-learn"""
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_pattern.findall(text)
+        if self.stop_words:
+            tokens = [token for token in tokens if token not in self.stop_words]
+        return tokens
+        
+    def iter_tokens(self, text, start=0, end=None, window_chars=16384):
+        """
+        Tokenise `text[start:end]` par fenêtres de `window_chars` caractères,
+        coupées entre deux mots : le coût est proportionnel au nombre de tokens
+        consommés, pas à la longueur du texte
+        """
+        end = len(text) if end is None else end
+        position = start
+        while position < end:
+            stop = min(position + window_chars, end)
+            # Ne pas couper un mot : reculer jusqu'au dernier séparateur
+            if stop < end:
+                cut = stop
+                while cut > position and _is_word_char(text[cut - 1]) and _is_word_char(text[cut]):
+                    cut -= 1
+                if cut > position:
+                    stop = cut
+            yield from self.tokenize(text[position:stop])
+            position = stop
+            
+    def count_terms(self, text):
+        """Compte les n-grammes du texte (équivalent d'une ligne de CountVectorizer)"""
+        return self.count_tokens(self.tokenize(text))
+        
+    def count_tokens(self, tokens):
+        """Compte les n-grammes d'une liste de tokens"""
+        min_n, max_n = self.ngram_range
+        counts = Counter()
+        for n in range(min_n, max_n + 1):
+            if n == 1:
+                counts.update(tokens)
+            else:
+                counts.update(map(' '.join, zip(*[tokens[i:] for i in range(n)])))
+        return counts
+        
+    def term_entries(self, terms):
+        """{terme: (idf, idf × coefficient)} pour les termes du vocabulaire parmi `terms`"""
+        weights = self.weights
+        return {term: weights[term] for term in terms if term in weights}
+        
+    def decision(self, counts):
+        """Logit de la classe positive pour des comptes de termes"""
+        weights = self.weights
+        dot = 0.0
+        squared_norm = 0.0
+        for term, count in counts.items():
+            entry = weights.get(term)
+            if entry is not None:
+                idf, weight = entry
+                dot += count * weight
+                value = count * idf
+                squared_norm += value * value
+                
+        # Normalisation l2 appliquée au produit scalaire plutôt qu'au vecteur
+        if squared_norm > 0.0:
+            dot /= math.sqrt(squared_norm)
+        return self.intercept + dot
+        
+    def contributions(self, counts):
+        """
+        Contribution de chaque terme du vocabulaire présent au logit :
+        [(terme, tfidf × coefficient), ...]. Même parcours que decision(),
+        en O(nombre de termes du texte) ; la somme plus l'intercept donne le logit.
+        """
+        weights = self.weights
+        terms = []
+        squared_norm = 0.0
+        for term, count in counts.items():
+            entry = weights.get(term)
+            if entry is not None:
+                idf, weight = entry
+                terms.append((term, count * weight))
+                value = count * idf
+                squared_norm += value * value
+                
+        if squared_norm > 0.0:
+            scale = 1.0 / math.sqrt(squared_norm)
+            terms = [(term, contribution * scale) for term, contribution in terms]
+        return terms
+        
+    def score_counts(self, counts):
+        """
+        Retourne (classe prédite, (probabilité classe 0, probabilité classe 1))
+        """
+        return self.score_logit(self.decision(counts))
+        
+    def score_logit(self, logit):
+        """(classe prédite, probabilités) à partir du logit de la classe positive"""
+        # Sigmoïde numériquement stable
+        if logit >= 0:
+            positive = 1.0 / (1.0 + math.exp(-logit))
+        else:
+            exp_logit = math.exp(logit)
+            positive = exp_logit / (1.0 + exp_logit)
+            
+        prediction = self.classes[1] if logit > 0 else self.classes[0]
+        return prediction, (1.0 - positive, positive)
+        
+    def predict(self, text):
+        """Prédiction pour un texte : (classe, (p_fake, p_reliable))"""
+        return self.score_counts(self.count_terms(text))
+        
+    def predict_batch(self, texts):
+        """Prédictions pour une liste de textes, dans l'ordre"""
+        return [self.score_counts(self.count_terms(text)) for text in texts]
+
+
+class SklearnScorer:
+    """
+    Scoreur générique : vectorizer scikit-learn quelconque (n-grammes de
+    caractères, analyseur personnalisé...) suivi d'un modèle binaire doté de
+    `predict_proba`. Plus lent que LinearScorer ; sert de second étage de la
+    cascade quand le modèle ne peut pas être compilé.
+    """
+    
+    def __init__(self, vectorizer, model):
+        if len(model.classes_) != 2:
+            raise ValueError("Le second modèle doit être binaire")
+        self.vectorizer = vectorizer
+        self.model = model
+        self.classes = tuple(int(c) for c in model.classes_)
+        
+    def predict_batch(self, texts):
+        """Prédictions pour une liste de textes : [(classe, (p classe 0, p classe 1)), ...]"""
+        probabilities = self.model.predict_proba(self.vectorizer.transform(texts))
+        return [(self.classes[1] if row[1] > row[0] else self.classes[0], (float(row[0]), float(row[1])))
+                for row in probabilities]
+                
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+
+def compile_scorer(vectorizer, model):
+    """Scoreur compilé (LinearScorer) si la configuration le permet, sinon SklearnScorer"""
+    try:
+        return LinearScorer.from_sklearn(vectorizer, model)
+    except (ValueError, AttributeError):
+        return SklearnScorer(vectorizer, model)
+
+
+class Cascade:
+    """
+    Cascade à deux étages
+    
+    Le scoreur compilé répond seul tant que sa probabilité de la classe 1
+    (Reliable News) est hors de la bande d'incertitude [low, high] : la
+    plupart des articles sont classés avec une confiance élevée. Les textes
+    ambigus sont rescorés par le second étage (limités à `max_chars`
+    caractères, son coût étant proportionnel au texte), dont le verdict
+    remplace celui du premier. Une bande vide (low > high) désactive la cascade.
+    
+    Le taux d'escalade et la durée du second étage sont comptés (`stats`)
+    pour régler la bande entre coût et précision ; les compteurs sont
+    partagés entre threads.
+    """
+    
+    def __init__(self, low=0.35, high=0.65, max_chars=20000):
+        self.low = low
+        self.high = high
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self.scored = 0
+        self.escalated = 0
+        self.second_stage_seconds = 0.0
+        
+    @property
+    def enabled(self):
+        return self.low <= self.high
+        
+    def uncertain(self, probabilities):
+        return self.low <= probabilities[1] <= self.high
+        
+    def route(self, second_stage, text, prediction, probabilities):
+        """
+        Verdict final d'un texte scoré par le premier étage :
+        (classe, probabilités, étage ayant répondu : 1 ou 2)
+        """
+        if second_stage is None or not self.enabled:
+            return prediction, probabilities, 1
+        with self._lock:
+            self.scored += 1
+        if not self.uncertain(probabilities):
+            return prediction, probabilities, 1
+        start = time.perf_counter()
+        prediction, probabilities = second_stage.predict(text[:self.max_chars])
+        duration = time.perf_counter() - start
+        with self._lock:
+            self.escalated += 1
+            self.second_stage_seconds += duration
+        return prediction, probabilities, 2
+        
+    def stats(self):
+        with self._lock:
+            scored, escalated, seconds = self.scored, self.escalated, self.second_stage_seconds
+        return {
+            'enabled': self.enabled,
+            'band': [self.low, self.high],
+            'scored': scored,
+            'escalated': escalated,
+            'escalation_rate': round(escalated / scored, 4) if scored else 0.0,
+            'second_stage_mean_ms': round(seconds / escalated * 1000, 3) if escalated else None,
+        }
+
+
+def top_contributions(contributions, top_k):
+    """
+    Les `top_k` termes qui poussent le plus vers la classe 1 et vers la classe 0,
+    par influence décroissante : (vers classe 1, vers classe 0)
+    """
+    # Tri complet (en C) plus rapide que deux tas tant que les termes sont peu nombreux
+    if len(contributions) <= 1024:
+        ordered = sorted(contributions, key=itemgetter(1))
+        largest, smallest = ordered[:-top_k - 1:-1], ordered[:top_k]
+    else:
+        largest = heapq.nlargest(top_k, contributions, key=itemgetter(1))
+        smallest = heapq.nsmallest(top_k, contributions, key=itemgetter(1))
+    return ([item for item in largest if item[1] > 0],
+            [item for item in smallest if item[1] < 0])
+
+
+class LongTextPolicy:
+    """
+    Traitement à coût borné des textes longs
+    
+    Au-delà de `threshold_chars` caractères :
+        truncate  seuls les `token_budget` premiers tokens sont scorés ; la
+                  tokenisation s'arrête dès que le budget est atteint
+        chunk     le texte est découpé en `token_budget // chunk_tokens` zones
+                  réparties sur tout le document ; au plus `chunk_tokens`
+                  tokens sont scorés au début de chaque zone, puis les
+                  probabilités des morceaux sont moyennées
+        full      aucun traitement particulier (coût proportionnel au texte)
+    Dans les deux premiers modes, le coût d'une prédiction ne dépend plus de
+    la longueur du document.
+    """
+    
+    def __init__(self, mode='truncate', threshold_chars=20000, token_budget=5000, chunk_tokens=1000):
+        if mode not in LONG_TEXT_MODES:
+            raise ValueError(f"Mode de texte long inconnu: {mode!r} (attendu: {', '.join(LONG_TEXT_MODES)})")
+        self.mode = mode
+        self.threshold_chars = int(threshold_chars)
+        self.token_budget = max(1, int(token_budget))
+        self.chunk_tokens = max(1, min(int(chunk_tokens), self.token_budget))
+        
+    def applies(self, text):
+        return self.mode != 'full' and len(text) > self.threshold_chars
+        
+    def count(self, scorer, text):
+        """
+        Retourne ([comptes de termes par morceau], détails) ; les détails sont
+        renvoyés au client (champ `long_text`)
+        """
+        if self.mode == 'truncate':
+            tokens = list(islice(scorer.iter_tokens(text), self.token_budget + 1))
+            truncated = len(tokens) > self.token_budget
+            tokens = tokens[:self.token_budget]
+            return [scorer.count_tokens(tokens)], {
+                'mode': 'truncate',
+                'truncated': truncated,
+                'chunks': 1,
+                'tokens_scored': len(tokens),
+            }
+            
+        # Zones régulièrement espacées, bornes alignées sur les fins de mots
+        length = len(text)
+        zones = self.token_budget // self.chunk_tokens
+        bounds = [_word_boundary(text, length * i // zones, length) for i in range(zones)] + [length]
+        counts = []
+        truncated = False
+        scored = 0
+        for start, end in zip(bounds, bounds[1:]):
+            if start >= end:
+                continue
+            tokens = list(islice(scorer.iter_tokens(text, start, end), self.chunk_tokens + 1))
+            if len(tokens) > self.chunk_tokens:
+                truncated = True
+                tokens = tokens[:self.chunk_tokens]
+            if tokens:
+                counts.append(scorer.count_tokens(tokens))
+                scored += len(tokens)
+        return counts or [Counter()], {
+            'mode': 'chunk',
+            'truncated': truncated,
+            'chunks': len(counts),
+            'tokens_scored': scored,
+        }
+        
+    @staticmethod
+    def combine(scorer, counts):
+        """Score chaque morceau et moyenne les probabilités"""
+        if len(counts) == 1:
+            return scorer.score_counts(counts[0])
+        positive = sum(scorer.score_counts(chunk)[1][1] for chunk in counts) / len(counts)
+        prediction = scorer.classes[1] if positive > 0.5 else scorer.classes[0]
+        return prediction, (1.0 - positive, positive)
+        
+    @classmethod
+    def explain(cls, scorer, counts):
+        """
+        (classe, probabilités, contributions par terme) en un seul passage sur
+        les termes : le logit est la somme des contributions plus l'intercept.
+        En mode chunk, les contributions sont moyennées sur les morceaux.
+        """
+        if len(counts) == 1:
+            contributions = scorer.contributions(counts[0])
+            logit = scorer.intercept + math.fsum(weight for _, weight in contributions)
+            return scorer.score_logit(logit) + (contributions,)
+        merged = Counter()
+        for chunk in counts:
+            for term, contribution in scorer.contributions(chunk):
+                merged[term] += contribution / len(counts)
+        return cls.combine(scorer, counts) + (list(merged.items()),)
+        
+    def predict(self, scorer, text):
+        """(classe, probabilités, détails) ; détails = None pour un texte court"""
+        if not self.applies(text):
+            prediction, probabilities = scorer.predict(text)
+            return prediction, probabilities, None
+        counts, details = self.count(scorer, text)
+        prediction, probabilities = self.combine(scorer, counts)
+        return prediction, probabilities, details
@@ -0,0 +1,253 @@
+"""
+Chargement des modèles, partagé par l'API, le serveur et les outils en ligne
+de commande
+
+`load_bundle()` lit les fichiers .pkl (ou l'artefact mmap) et retourne un
+ModelBundle : modèle, vectorizer, scoreur compilé, version et format. Les
+messages de progression passent par la fonction `log` (print par défaut), ce
+qui permet aux outils qui écrivent leurs résultats sur stdout de les rediriger.
+
+Versions publiées : chaque version est un sous-dossier de models/ contenant
+les mêmes fichiers (models/2026-10-01/fake_news_model.pkl, ...). Le fichier
+models/CURRENT contient le nom de la version active. Sans fichier CURRENT,
+les fichiers placés directement dans models/ sont utilisés.
+
+Second étage de la cascade (optionnel) : second_stage_model.pkl et
+second_stage_vectorizer.pkl, à côté des fichiers du modèle principal. Il est
+inclus dans la version du modèle, donc dans les clés du cache.
+"""
+
+import os
+import pickle
+import time
+from collections import namedtuple
+
+from inference import LinearScorer, compile_scorer, compute_model_version
+
+MODEL_FILE = 'fake_news_model.pkl'
+VECTORIZER_FILE = 'tfidf_vectorizer.pkl'
+ARTIFACT_FILE = 'fake_news_model.mmap'
+SECOND_STAGE_MODEL_FILE = 'second_stage_model.pkl'
+SECOND_STAGE_VECTORIZER_FILE = 'second_stage_vectorizer.pkl'
+CURRENT_FILE = 'CURRENT'
+
+# Textes de préchauffage, scorés avant qu'une version ne reçoive du trafic
+WARMUP_TEXTS = [
+    "Scientists at Harvard Medical School have published a peer-reviewed study on cancer treatment.",
+    "SHOCKING: Government hiding the truth, share before it gets deleted!!!",
+    "The central bank raised interest rates by a quarter point on Tuesday.",
+]
+
+ModelBundle = namedtuple(
+    'ModelBundle',
+    ['model', 'vectorizer', 'scorer', 'version', 'format', 'load_time_ms', 'release', 'second_stage'],
+    defaults=(None, None)
+)
+
+
+def memory_usage():
+    """
+    Mémoire résidente du processus en Mo : totale, privée (anonyme) et
+    partagée avec le page cache (fichiers mappés). Linux uniquement.
+    """
+    usage = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'RssAnon', 'RssFile'):
+                    usage[key] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        import resource
+        usage['VmRSS'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return usage
+
+
+def artifact_file(precision='float64'):
+    """Nom du fichier d'artefact mmap d'une précision (fake_news_model.int8.mmap, ...)"""
+    if precision == 'float64':
+        return ARTIFACT_FILE
+    return ARTIFACT_FILE.replace('.mmap', f'.{precision}.mmap')
+
+
+def load_mapped_scorer(artifact_path, expected_version, log=print):
+    """
+    Charge le scoreur depuis l'artefact mmap. Retourne None (repli sur les
+    .pkl) si l'artefact est absent, illisible ou généré depuis d'autres .pkl
+    """
+    log(f"⏳ Chargement de l'artefact mmap: {artifact_path}")
+    if not os.path.exists(artifact_path):
+        log("⚠️  Artefact introuvable, repli sur les fichiers .pkl")
+        log("💡 Générez-le avec: python api/artifact.py export")
+        return None
+        
+    # Import différé : numpy n'est chargé que pour le format mmap
+    from artifact import load_artifact
+    try:
+        mapped = load_artifact(artifact_path)
+    except Exception as e:
+        log(f"⚠️  Artefact illisible ({e}), repli sur les fichiers .pkl")
+        return None
+        
+    if mapped.model_version != expected_version:
+        log(f"⚠️  Artefact obsolète (version {mapped.model_version}, "
+            f"attendue {expected_version}), repli sur les fichiers .pkl")
+        return None
+        
+    log(f"✅ Artefact mappé ({mapped.n_features} termes)!")
+    return mapped
+
+
+def load_bundle(model_path, vectorizer_path, model_format='pickle',
+                artifact_path=None, log=print, release=None):
+    """
+    Charge le modèle, le vectorizer et le scoreur compilé.
+    Lève une exception si les fichiers sont absents ou illisibles.
+    """
+    start = time.perf_counter()
+    
+    # Version du modèle : empreinte des fichiers, utilisée dans les clés du cache
+    version = compute_model_version(model_path, vectorizer_path)
+    
+    model = vectorizer = scorer = None
+    
+    # Format mmap : artefact partagé entre workers via le page cache
+    if model_format == 'mmap' and artifact_path:
+        scorer = load_mapped_scorer(artifact_path, version, log)
+        # Variante compacte : précision indiquée dans le format (mmap-float32, mmap-int8)
+        if scorer is not None and scorer.precision != 'float64':
+            model_format = f'mmap-{scorer.precision}'
+            
+    if scorer is None:
+        model_format = 'pickle'
+        
+        # Charger le modèle
+        log("⏳ Chargement du modèle...")
+        with open(model_path, 'rb') as f:
+            model = pickle.load(f)
+        log("✅ Modèle chargé avec succès!")
+        
+        # Charger le vectorizer
+        log("⏳ Chargement du vectorizer...")
+        with open(vectorizer_path, 'rb') as f:
+            vectorizer = pickle.load(f)
+        log("✅ Vectorizer chargé avec succès!")
+        
+        # Compiler le scoreur (vocabulaire + IDF + coefficients fusionnés)
+        log("⏳ Compilation du scoreur...")
+        scorer = LinearScorer.from_sklearn(vectorizer, model)
+        log(f"✅ Scoreur compilé ({scorer.n_features} termes)!")
+        
+    load_time_ms = (time.perf_counter() - start) * 1000
+    return ModelBundle(model, vectorizer, scorer, version, model_format, load_time_ms, release)
+
+
+# ============================================================
+# VERSIONS PUBLIÉES
+# ============================================================
+
+def current_release(models_dir):
+    """Nom de la version active (contenu de models/CURRENT), ou None"""
+    try:
+        with open(os.path.join(models_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def release_dir(models_dir, release):
+    """
+    Dossier d'une version. Lève ValueError pour un nom invalide et
+    FileNotFoundError si la version n'existe pas
+    """
+    if release is None:
+        return models_dir
+    if release in ('.', '..') or os.sep in release or '/' in release:
+        raise ValueError(f"Nom de version invalide: {release!r}")
+    path = os.path.join(models_dir, release)
+    for name in (MODEL_FILE, VECTORIZER_FILE):
+        if not os.path.exists(os.path.join(path, name)):
+            raise FileNotFoundError(f"Version {release!r} incomplète: {name} absent de {path}")
+    return path
+
+
+def list_releases(models_dir):
+    """Versions publiées (sous-dossiers contenant un modèle), triées par nom"""
+    return sorted(
+        name for name in os.listdir(models_dir)
+        if os.path.isfile(os.path.join(models_dir, name, MODEL_FILE))
+    )
+
+
+def set_current_release(models_dir, release):
+    """Change la version active de façon atomique (None : fichiers de models/)"""
+    path = os.path.join(models_dir, CURRENT_FILE)
+    if release is None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return
+    release_dir(models_dir, release)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(release + '\n')
+    os.replace(tmp_path, path)
+
+
+def load_second_stage(directory, log=print):
+    """
+    Charge le second étage de la cascade d'un dossier de modèles. Retourne
+    (scoreur, [chemins des fichiers]), ou None si les fichiers sont absents.
+    """
+    paths = [os.path.join(directory, SECOND_STAGE_MODEL_FILE),
+             os.path.join(directory, SECOND_STAGE_VECTORIZER_FILE)]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+        
+    log("⏳ Chargement du second étage de la cascade...")
+    with open(paths[0], 'rb') as f:
+        model = pickle.load(f)
+    with open(paths[1], 'rb') as f:
+        vectorizer = pickle.load(f)
+    scorer = compile_scorer(vectorizer, model)
+    log(f"✅ Second étage chargé ({type(model).__name__}, {type(scorer).__name__})!")
+    return scorer, paths
+
+
+def load_release(models_dir, release=None, model_format='pickle', log=print, precision='float64',
+                 second_stage=True):
+    """
+    Charge une version publiée (par défaut celle de models/CURRENT).
+    `precision` choisit l'artefact mmap (float64, float32 ou int8). Avec
+    `second_stage`, charge aussi le second étage de la cascade s'il est présent.
+    Lève FileNotFoundError si les fichiers sont absents.
+    """
+    if release is None:
+        release = current_release(models_dir)
+    directory = release_dir(models_dir, release)
+    model_path = os.path.join(directory, MODEL_FILE)
+    vectorizer_path = os.path.join(directory, VECTORIZER_FILE)
+    
+    log(f"📂 Dossier models: {os.path.abspath(directory)}"
+        + (f" (version {release})" if release else ""))
+    for path in (model_path, vectorizer_path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Fichier introuvable: {path}")
+            
+    bundle = load_bundle(model_path, vectorizer_path, model_format,
+                         os.path.join(directory, artifact_file(precision)), log=log, release=release)
+    loaded = load_second_stage(directory, log) if second_stage else None
+    if loaded is not None:
+        # Le verdict dépend aussi du second étage : il entre dans la version
+        scorer, paths = loaded
+        bundle = bundle._replace(second_stage=scorer,
+                                 version=compute_model_version(model_path, vectorizer_path, *paths))
+    return bundle
+
+
+def warm_up(scorer, texts=WARMUP_TEXTS, second_stage=None):
+    """Score quelques textes : caches Python et pages de l'artefact mmap chauffés"""
+    scorer.predict_batch(texts)
+    if second_stage is not None:
+        second_stage.predict_batch(texts)
@@ -0,0 +1,120 @@
+"""
+Journalisation structurée et non bloquante de l'API
+
+Les enregistrements des loggers `fcc.*` passent par une file (QueueHandler) :
+le thread qui journalise ne fait que déposer l'enregistrement, un thread
+d'écriture (QueueListener) formate et écrit sur stderr. Deux formats :
+    text  horodatage, niveau, message puis champs `clé=valeur`
+    json  un objet JSON par ligne
+
+Les champs structurés se passent dans `extra={'fields': {...}}`.
+Après un fork (serveur pré-forké), le processus enfant redémarre son propre
+thread d'écriture.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+ROOT_LOGGER = 'fcc'
+
+_listener = None
+_settings = None
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formate un enregistrement et ses champs en texte ou en JSON"""
+    
+    def __init__(self, fmt='text'):
+        super().__init__()
+        self.fmt = fmt
+        
+    def format(self, record):
+        fields = getattr(record, 'fields', None) or {}
+        message = record.getMessage()
+        if self.fmt == 'json':
+            payload = {
+                'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created))
+                      + f'.{int(record.msecs):03d}',
+                'level': record.levelname,
+                'logger': record.name,
+                'pid': record.process,
+                'message': message,
+            }
+            payload.update(fields)
+            if record.exc_info:
+                payload['exception'] = self.formatException(record.exc_info)
+            return json.dumps(payload, ensure_ascii=False, default=str)
+            
+        line = f'{self.formatTime(record)} {record.levelname:<7} {message}'
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+class _StandardStreamHandler(logging.StreamHandler):
+    """Écrit sur sys.stderr tel qu'il est au moment de l'écriture (redirections comprises)"""
+    
+    def __init__(self):
+        logging.Handler.__init__(self)
+        
+    @property
+    def stream(self):
+        return sys.stderr
+
+
+def _start(level, fmt):
+    global _listener
+    records = queue.SimpleQueue()
+    writer = _StandardStreamHandler()
+    writer.setFormatter(StructuredFormatter(fmt))
+    
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.handlers = [QueueHandler(records)]
+    logger.setLevel(level)
+    logger.propagate = False
+    
+    _listener = QueueListener(records, writer)
+    _listener.start()
+
+
+def setup_logging(level='INFO', fmt='text'):
+    """
+    Configure les loggers `fcc.*` (appel idempotent : seul le premier appel
+    démarre le thread d'écriture, les suivants mettent à jour la configuration)
+    """
+    global _settings
+    if _listener is not None and _settings == (level, fmt):
+        return
+    if _listener is not None:
+        _listener.stop()
+    _settings = (level, fmt)
+    _start(level, fmt)
+
+
+def shutdown_logging():
+    """Vide la file et arrête le thread d'écriture (à appeler avant os._exit)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    # Le thread d'écriture du parent n'existe pas dans l'enfant : en démarrer un
+    # nouveau, avec une file neuve
+    global _listener
+    if _listener is not None:
+        _listener = None
+        _start(*_settings)
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+atexit.register(shutdown_logging)
@@ -0,0 +1,206 @@
+"""
+Métriques au format texte Prometheus, sans dépendance externe
+
+Compteurs, jauges et histogrammes thread-safe, pensés pour rester actifs en
+charge : une observation coûte une recherche dichotomique dans les bornes de
+l'histogramme et une prise de verrou. Les séries sont indexées par le tuple des
+valeurs d'étiquettes, passées en arguments positionnels :
+
+    requests = registry.counter('fcc_requests_total', 'Requêtes HTTP', ['endpoint', 'status'])
+    requests.inc('predict', '200')
+
+Chaque processus a ses propres métriques (avec le serveur pré-forké, chaque
+worker expose les siennes).
+"""
+
+import bisect
+import math
+import threading
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Bornes par défaut (secondes) : de 100 µs à 10 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Tailles (octets) : de 256 o à 16 Mo
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = 'untyped'
+    
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        self._function = None
+        
+    def _check(self, labelvalues):
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} attend les étiquettes {self.labelnames}")
+        return tuple(str(value) for value in labelvalues)
+        
+    def set_function(self, function):
+        """Valeur lue à chaque export (métrique sans étiquette uniquement)"""
+        if self.labelnames:
+            raise ValueError(f"{self.name} a des étiquettes")
+        self._function = function
+        
+    def samples(self):
+        """Retourne [(suffixe, étiquettes, valeur), ...]"""
+        if self._function is not None:
+            return [('', '', self._function())]
+        with self._lock:
+            items = list(self._values.items())
+        return [('', _format_labels(self.labelnames, labels), value) for labels, value in items]
+        
+    def render(self):
+        documentation = self.documentation.replace('\\', '\\\\').replace('\n', '\\n')
+        lines = [f'# HELP {self.name} {documentation}',
+                 f'# TYPE {self.name} {self.kind}']
+        for suffix, labels, value in self.samples():
+            lines.append(f'{self.name}{suffix}{labels} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    """Compteur monotone"""
+    kind = 'counter'
+    
+    def inc(self, *labelvalues, amount=1):
+        key = self._check(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            
+    def value(self, *labelvalues):
+        with self._lock:
+            return self._values.get(self._check(labelvalues), 0)
+
+
+class Gauge(_Metric):
+    """Valeur instantanée (requêtes en cours, temps de chargement, ...)"""
+    kind = 'gauge'
+    
+    def set(self, value, *labelvalues):
+        key = self._check(labelvalues)
+        with self._lock:
+            self._values[key] = value
+            
+    def inc(self, *labelvalues, amount=1):
+        key = self._check(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            
+    def dec(self, *labelvalues, amount=1):
+        self.inc(*labelvalues, amount=-amount)
+        
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            
+    def value(self, *labelvalues):
+        with self._lock:
+            return self._values.get(self._check(labelvalues), 0)
+
+
+class Histogram(_Metric):
+    """
+    Histogramme à bornes fixes. Chaque série stocke les effectifs par
+    intervalle (non cumulés), la somme et le nombre d'observations ; les
+    effectifs cumulés sont calculés à l'export.
+    """
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        
+    def observe(self, value, *labelvalues):
+        key = self._check(labelvalues)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # [effectifs par intervalle (+Inf en dernier), somme]
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+            
+    def snapshot(self, *labelvalues):
+        """(effectifs cumulés par borne, somme, nombre) d'une série"""
+        with self._lock:
+            series = self._values.get(self._check(labelvalues))
+            if series is None:
+                return [0] * (len(self.buckets) + 1), 0.0, 0
+            counts, total = list(series[0]), series[1]
+        cumulative = []
+        running = 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+        
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(series[0]), series[1]) for labels, series in self._values.items()]
+        samples = []
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        for labels, counts, total in items:
+            running = 0
+            for bound, count in zip(bounds, counts):
+                running += count
+                samples.append(('_bucket', _format_labels(self.labelnames, labels, [('le', bound)]), running))
+            formatted = _format_labels(self.labelnames, labels)
+            samples.append(('_sum', formatted, total))
+            samples.append(('_count', formatted, running))
+        return samples
+
+
+class MetricsRegistry:
+    """Ensemble des métriques d'un processus, exportées par `render()`"""
+    
+    def __init__(self):
+        self._metrics = []
+        
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+        
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+        
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+        
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+        
+    def render(self):
+        """Texte d'exposition Prometheus (format 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,311 @@
+"""
+Serveur de production pré-forké pour l'API FCC Fake News Detector
+
+Le processus maître charge et préchauffe les modèles UNE SEULE FOIS (start_up),
+ouvre la socket d'écoute, puis forke N workers. Les workers héritent du modèle,
+du vectorizer et du scoreur en copy-on-write : rien n'est rechargé. Le ramasse-
+miettes est gelé (gc.freeze) avant le fork pour que les objets du modèle ne
+soient pas recopiés lors des collections.
+
+Signaux gérés par le maître :
+    SIGTERM / SIGINT  arrêt propre (les requêtes en cours se terminent)
+    SIGHUP            redémarrage propre : rechargement des modèles, nouvelle
+                      génération de workers, puis arrêt des anciens
+POST /admin/reload (dans un worker) envoie SIGHUP au maître ; avec
+FCC_MODEL_WATCH_INTERVAL, le maître surveille aussi models/CURRENT.
+Chaque worker est recyclé après MAX_REQUESTS requêtes (+ une part aléatoire).
+
+Lancement (depuis la racine du projet) :
+    python api/server.py --workers 4
+"""
+
+import argparse
+import errno
+import gc
+import logging
+import os
+import random
+import selectors
+import signal
+import socket
+import sys
+import time
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from loader import current_release, set_current_release
+from logs import shutdown_logging
+import app as flask_api
+
+logger = logging.getLogger('fcc.server')
+
+
+class QuietHandler(WSGIRequestHandler):
+    """Gestionnaire de requêtes sans log par requête sur la sortie standard"""
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class WorkerServer(WSGIServer):
+    """Serveur WSGI d'un worker, branché sur la socket d'écoute héritée du maître"""
+    
+    def __init__(self, listener, wsgi_app):
+        super().__init__(listener.getsockname()[:2], QuietHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = listener
+        self.server_name, self.server_port = listener.getsockname()[:2]
+        self.setup_environ()
+        self.set_app(wsgi_app)
+
+
+def create_listener(host, port, backlog=2048):
+    """Ouvre la socket d'écoute partagée par tous les workers"""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(backlog)
+    # Non bloquante : plusieurs workers attendent sur la même socket
+    listener.setblocking(False)
+    return listener
+
+
+def worker_loop(listener, max_requests):
+    """
+    Boucle d'un worker : sert des requêtes jusqu'au signal d'arrêt ou jusqu'au
+    recyclage. Retourne le nombre de requêtes traitées.
+    """
+    stopping = []
+    
+    def stop(signum, frame):
+        stopping.append(signum)
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGQUIT, lambda signum, frame: os._exit(1))
+    
+    server = WorkerServer(listener, flask_api.app)
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    
+    handled = 0
+    while not stopping and (not max_requests or handled < max_requests):
+        # Attente bornée pour vérifier régulièrement le signal d'arrêt
+        if not selector.select(timeout=0.5):
+            continue
+        try:
+            connection, address = listener.accept()
+        except (BlockingIOError, InterruptedError):
+            continue  # connexion prise par un autre worker
+        connection.setblocking(True)
+        handled += 1
+        try:
+            server.process_request(connection, address)
+        except Exception:
+            server.handle_error(connection, address)
+            server.shutdown_request(connection)
+    
+    selector.close()
+    return handled
+
+
+class Master:
+    """Processus maître : charge les modèles, forke et supervise les workers"""
+    
+    def __init__(self, host, port, workers, max_requests, max_requests_jitter, graceful_timeout):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.listener = None
+        self.pid = None
+        self.generation = 0
+        self.current = {}    # pid -> génération, workers de la génération courante
+        self.retiring = {}   # pid -> échéance, anciens workers en cours d'arrêt
+        self.stopping = False
+        self.restart_requested = False
+        
+    def spawn_worker(self):
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            max_requests += random.randint(0, self.max_requests_jitter)
+            
+        pid = os.fork()
+        if pid == 0:
+            # Processus worker
+            code = 0
+            try:
+                random.seed()
+                worker_loop(self.listener, max_requests)
+            except Exception:
+                logger.exception(f"❌ Worker {os.getpid()} arrêté sur erreur")
+                code = 1
+            finally:
+                # os._exit saute atexit : vider l'historique et le journal explicitement
+                if flask_api.prediction_store is not None:
+                    flask_api.prediction_store.close()
+                shutdown_logging()
+                os._exit(code)
+                
+        self.current[pid] = self.generation
+        return pid
+        
+    def spawn_generation(self):
+        """Prépare la mémoire partagée puis forke une génération complète de workers"""
+        self.generation += 1
+        # Geler les objets existants (modèle compris) : le GC ne les touchera plus,
+        # leurs pages restent partagées en copy-on-write
+        gc.collect()
+        gc.freeze()
+        for _ in range(self.workers):
+            self.spawn_worker()
+            
+    def retire(self, pids):
+        """Demande un arrêt propre aux workers donnés"""
+        deadline = time.monotonic() + self.graceful_timeout
+        for pid in pids:
+            self.current.pop(pid, None)
+            self.retiring[pid] = deadline
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.retiring.pop(pid, None)
+                
+    def reap(self):
+        """Récupère les workers terminés ; relance ceux de la génération courante"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.retiring.pop(pid, None)
+            if pid in self.current:
+                del self.current[pid]
+                if not self.stopping:
+                    # Recyclage (MAX_REQUESTS atteint) ou arrêt inattendu
+                    self.spawn_worker()
+                    
+    def kill_overdue(self):
+        now = time.monotonic()
+        for pid, deadline in list(self.retiring.items()):
+            if now >= deadline:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                self.retiring.pop(pid, None)
+                
+    def restart(self):
+        """Redémarrage propre : recharge les modèles puis remplace les workers"""
+        logger.info("🔄 Redémarrage propre demandé (SIGHUP)")
+        gc.unfreeze()
+        
+        # En cas d'échec du chargement, garder les modèles et les workers actuels
+        previous = flask_api.bundle
+        try:
+            flask_api.activate_bundle(flask_api.load_release_bundle())
+            flask_api.prefill_cache()
+        except Exception:
+            logger.exception("⚠️  Rechargement impossible, les workers actuels sont conservés")
+            set_current_release(Config.MODEL_DIR, previous.release)
+            gc.freeze()
+            return
+        
+        old = list(self.current)
+        self.spawn_generation()
+        self.retire(old)
+        
+    def request_reload(self):
+        """Appelé dans un worker : demande au maître un redémarrage propre"""
+        os.kill(self.pid, signal.SIGHUP)
+        return True
+        
+    def release_changed(self):
+        """Vrai si models/CURRENT désigne une autre version que la version active"""
+        return current_release(Config.MODEL_DIR) != flask_api.bundle.release
+        
+    def run(self):
+        flask_api.start_up()
+        # POST /admin/reload dans un worker : recharger via le maître
+        self.pid = os.getpid()
+        flask_api.reload_trigger = self.request_reload
+        self.listener = create_listener(self.host, self.port)
+        
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_restart)
+        
+        logger.info("🌐 DÉMARRAGE DU SERVEUR PRÉ-FORKÉ (SIGHUP = redémarrage propre)", extra={'fields': {
+            'host': self.host,
+            'port': self.port,
+            'workers': self.workers,
+            'max_requests': self.max_requests or 'désactivé',
+            'master_pid': os.getpid(),
+        }})
+        
+        self.spawn_generation()
+        
+        watch_interval = Config.MODEL_WATCH_INTERVAL
+        next_watch = time.monotonic() + watch_interval
+        while not self.stopping:
+            if watch_interval > 0 and time.monotonic() >= next_watch:
+                next_watch = time.monotonic() + watch_interval
+                if self.release_changed():
+                    logger.info("👀 Nouvelle version demandée dans models/CURRENT")
+                    self.restart_requested = True
+            if self.restart_requested:
+                self.restart_requested = False
+                self.restart()
+            self.reap()
+            self.kill_overdue()
+            time.sleep(0.2)
+            
+        # Arrêt propre : laisser les workers finir leurs requêtes en cours
+        logger.info("🛑 Arrêt des workers...")
+        self.retire(list(self.current))
+        while self.retiring:
+            self.reap()
+            self.kill_overdue()
+            time.sleep(0.1)
+        self.listener.close()
+        logger.info("✅ Serveur arrêté")
+        
+    def _on_stop(self, signum, frame):
+        self.stopping = True
+        
+    def _on_restart(self, signum, frame):
+        self.restart_requested = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur pré-forké de l'API FCC Fake News Detector")
+    parser.add_argument('--host', default=Config.HOST)
+    parser.add_argument('--port', type=int, default=Config.PORT)
+    parser.add_argument('--workers', type=int, default=Config.WORKERS)
+    parser.add_argument('--max-requests', type=int, default=Config.MAX_REQUESTS)
+    parser.add_argument('--max-requests-jitter', type=int, default=Config.MAX_REQUESTS_JITTER)
+    parser.add_argument('--graceful-timeout', type=float, default=Config.GRACEFUL_TIMEOUT)
+    args = parser.parse_args(argv)
+    
+    if args.workers < 1:
+        parser.error("--workers doit être >= 1")
+        
+    try:
+        Master(args.host, args.port, args.workers, args.max_requests,
+               args.max_requests_jitter, args.graceful_timeout).run()
+    except OSError as e:
+        if e.errno == errno.EADDRINUSE:
+            logger.error(f"❌ Port {args.port} déjà utilisé")
+            sys.exit(1)
+        raise
+
+
+if __name__ == '__main__':
+    main()
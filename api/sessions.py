@@ -0,0 +1,311 @@
+"""
+Sessions d'édition : rescoring incrémental d'un brouillon
+
+Un rédacteur qui revérifie un long brouillon après quelques retouches ne
+devrait pas payer la tokenisation de tout l'article à chaque analyse. Une
+session garde l'état de scoring du brouillon (DraftScorer) :
+    - le texte, découpé en blocs d'environ `block_chars` caractères terminés
+      par un blanc (aucun token ne chevauche deux blocs) ;
+    - les tokens de chaque bloc ;
+    - les comptes des n-grammes du vocabulaire, le produit scalaire avec les
+      poids du modèle et le carré de la norme TF-IDF qui en découlent.
+Une modification (remplacement de `text[start:end]`) ne retokenise que les
+blocs touchés. Les n-grammes à cheval sur leurs bords sont recomptés à partir
+des `n - 1` tokens voisins, et seuls les termes dont le compte change mettent
+à jour le produit scalaire et la norme. Le logit obtenu est celui d'un
+rescoring complet du texte (aux arrondis près ; les sommes sont recalculées
+exactement toutes les `resync_every` modifications).
+
+Les sessions (SessionStore) sont bornées en nombre (éviction LRU) et expirent
+après `ttl_seconds` sans modification.
+"""
+
+import math
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# Taille visée d'un bloc (caractères) : coût d'une retouche isolée
+BLOCK_CHARS = 2048
+
+_SPACE = re.compile(r'\s')
+
+
+class _Block:
+    __slots__ = ('text', 'tokens')
+    
+    def __init__(self, text, tokens):
+        self.text = text
+        self.tokens = tokens
+
+
+class DraftScorer:
+    """
+    État de scoring incrémental d'un brouillon pour un scoreur compilé
+    (LinearScorer ou MappedScorer). Avec un autre scoreur (SklearnScorer),
+    les modifications sont appliquées au texte et chaque prédiction le rescore
+    en entier.
+    """
+    
+    def __init__(self, scorer, text='', block_chars=BLOCK_CHARS, resync_every=64):
+        self.scorer = scorer
+        self.block_chars = max(1, block_chars)
+        self.resync_every = resync_every
+        self.incremental = hasattr(scorer, 'term_entries')
+        # Tokens voisins nécessaires pour recompter les n-grammes d'un bord
+        self._context = scorer.ngram_range[1] - 1 if self.incremental else 0
+        self.blocks = []
+        self.length = 0
+        self.counts = {}    # terme du vocabulaire -> compte
+        self._entries = {}  # terme du vocabulaire -> (idf, idf × coefficient)
+        self.dot = 0.0
+        self.squared_norm = 0.0
+        self.updates = 0
+        self.replace(0, 0, text)
+        
+    def __len__(self):
+        return self.length
+        
+    @property
+    def text(self):
+        return ''.join(block.text for block in self.blocks)
+        
+    def _split(self, text):
+        """Blocs d'environ `block_chars` caractères, coupés juste après un blanc"""
+        blocks = []
+        start = 0
+        while start < len(text):
+            space = _SPACE.search(text, start + self.block_chars - 1)
+            stop = space.end() if space is not None else len(text)
+            block = text[start:stop]
+            blocks.append(_Block(block, self.scorer.tokenize(block) if self.incremental else None))
+            start = stop
+        return blocks
+        
+    def _locate(self, position, index=0, offset=0):
+        """(indice, début) du bloc contenant le caractère `position` (dernier bloc en fin de texte)"""
+        blocks = self.blocks
+        while index < len(blocks) - 1 and offset + len(blocks[index].text) <= position:
+            offset += len(blocks[index].text)
+            index += 1
+        return index, offset
+        
+    def _neighbours(self, index, step):
+        """Jusqu'à `_context` tokens avant (step=-1) ou après (step=1) le bloc `index` exclu"""
+        tokens = []
+        index += step
+        while self._context and 0 <= index < len(self.blocks) and len(tokens) < self._context:
+            missing = self._context - len(tokens)
+            block_tokens = self.blocks[index].tokens
+            tokens = block_tokens[-missing:] + tokens if step < 0 else tokens + block_tokens[:missing]
+            index += step
+        return tokens[-self._context:] if step < 0 else tokens[:self._context]
+        
+    def replace(self, start, end, text):
+        """
+        Remplace `self.text[start:end]` par `text` et met à jour les comptes.
+        Lève ValueError si l'intervalle sort du brouillon.
+        Retourne le nombre de caractères retokenisés.
+        """
+        if not 0 <= start <= end <= self.length:
+            raise ValueError(f"Intervalle [{start}, {end}) hors du texte ({self.length} caractères)")
+        if self.blocks:
+            first, offset = self._locate(start)
+            last, _ = self._locate(end, first, offset)
+        else:
+            first, last, offset = 0, -1, 0
+        old_blocks = self.blocks[first:last + 1]
+        region = ''.join(block.text for block in old_blocks)
+        new_blocks = self._split(region[:start - offset] + text + region[end - offset:])
+        
+        if self.incremental:
+            before = self._neighbours(first, -1)
+            after = self._neighbours(last, 1)
+            old_tokens = [token for block in old_blocks for token in block.tokens]
+            new_tokens = [token for block in new_blocks for token in block.tokens]
+            delta = self.scorer.count_tokens(before + new_tokens + after)
+            delta.subtract(self.scorer.count_tokens(before + old_tokens + after))
+            self._apply(delta)
+            
+        self.blocks[first:last + 1] = new_blocks
+        self.length += len(text) - (end - start)
+        return sum(len(block.text) for block in new_blocks)
+        
+    def _apply(self, delta):
+        changed = [term for term, difference in delta.items() if difference]
+        entries = self._entries
+        entries.update(self.scorer.term_entries([term for term in changed if term not in entries]))
+        counts = self.counts
+        for term in changed:
+            entry = entries.get(term)
+            if entry is None:
+                continue
+            idf, weight = entry
+            old = counts.get(term, 0)
+            new = old + delta[term]
+            self.dot += (new - old) * weight
+            self.squared_norm += (new * new - old * old) * idf * idf
+            if new:
+                counts[term] = new
+            else:
+                del counts[term]
+                del entries[term]
+                
+        self.updates += 1
+        if not counts:
+            self.dot = self.squared_norm = 0.0
+        elif self.updates % self.resync_every == 0:
+            self.resync()
+            
+    def resync(self):
+        """Recalcule exactement le produit scalaire et la norme à partir des comptes"""
+        entries = self._entries
+        self.dot = math.fsum(count * entries[term][1] for term, count in self.counts.items())
+        self.squared_norm = math.fsum((count * entries[term][0]) ** 2 for term, count in self.counts.items())
+        
+    def decision(self):
+        """Logit de la classe positive pour le brouillon courant (scoreur compilé)"""
+        if self.squared_norm > 0.0:
+            return self.scorer.intercept + self.dot / math.sqrt(self.squared_norm)
+        return self.scorer.intercept + self.dot
+        
+    def predict(self):
+        """(classe, (p_fake, p_reliable)) du brouillon courant"""
+        if not self.incremental:
+            return self.scorer.predict(self.text)
+        return self.scorer.score_logit(self.decision())
+
+
+def apply_edits(draft, edits, max_chars=None):
+    """
+    Applique une liste de modifications {'start', 'end', 'text'} au brouillon,
+    dans l'ordre (positions relatives au texte déjà modifié). Toutes les
+    modifications sont vérifiées avant la première : en cas d'erreur
+    (ValueError), le brouillon est inchangé. Retourne le nombre de caractères
+    retokenisés.
+    """
+    if not isinstance(edits, list):
+        raise ValueError("Le champ \"edits\" doit être une liste de modifications {start, end, text}")
+    length = len(draft)
+    for position, edit in enumerate(edits):
+        if not isinstance(edit, dict):
+            raise ValueError(f"Modification {position} : objet {{start, end, text}} attendu")
+        start, end, text = edit.get('start'), edit.get('end'), edit.get('text', '')
+        if type(start) is not int or type(end) is not int or not isinstance(text, str):
+            raise ValueError(f"Modification {position} : entiers 'start' et 'end' et chaîne 'text' attendus")
+        if not 0 <= start <= end <= length:
+            raise ValueError(f"Modification {position} : intervalle [{start}, {end}) hors du texte ({length} caractères)")
+        length += len(text) - (end - start)
+    if max_chars is not None and length > max_chars:
+        raise ValueError(f"Brouillon trop long ({length} caractères, maximum {max_chars})")
+        
+    return sum(draft.replace(edit['start'], edit['end'], edit.get('text', '')) for edit in edits)
+
+
+def diff_span(old, new):
+    """
+    Plus petite modification {'start', 'end', 'text'} transformant `old` en
+    `new` (préfixe et suffixe communs retirés), ou None si les textes sont égaux
+    """
+    if old == new:
+        return None
+    # Recherches dichotomiques : comparaisons de tranches (en C) plutôt que caractère par caractère
+    low, high = 0, min(len(old), len(new))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[:middle] == new[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+    low, high = 0, min(len(old), len(new)) - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[len(old) - middle:] == new[len(new) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    suffix = low
+    return {'start': prefix, 'end': len(old) - suffix, 'text': new[prefix:len(new) - suffix]}
+
+
+class DraftSession:
+    """Brouillon d'un client : état de scoring, version du modèle et révision"""
+    
+    def __init__(self, session_id, draft, version, expires_at):
+        self.id = session_id
+        self.draft = draft
+        self.version = version
+        self.revision = 0
+        self.expires_at = expires_at
+        # Une modification à la fois par session (deux onglets, requêtes rejouées)
+        self.lock = threading.Lock()
+
+
+class SessionStore:
+    """
+    Sessions d'édition en mémoire, thread-safe : au plus `max_sessions`
+    (la moins récemment utilisée est évincée), expirées après `ttl_seconds`
+    sans utilisation
+    """
+    
+    def __init__(self, max_sessions=256, ttl_seconds=1800, clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+        
+    def _expire(self):
+        # Appelé avec le verrou : les moins récemment utilisées sont en tête
+        now = self._clock()
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.expires_at > now:
+                break
+            del self._sessions[session.id]
+            self.expirations += 1
+            
+    def create(self, draft, version):
+        """Ouvre une session pour un brouillon et la retourne"""
+        session = DraftSession(secrets.token_urlsafe(16), draft, version, self._clock() + self.ttl_seconds)
+        with self._lock:
+            self._expire()
+            self._sessions[session.id] = session
+            self.created += 1
+            while len(self._sessions) > max(self.max_sessions, 1):
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return session
+        
+    def get(self, session_id):
+        """Session active (son expiration est repoussée) ou None"""
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.expires_at = self._clock() + self.ttl_seconds
+                self._sessions.move_to_end(session_id)
+            return session
+            
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+            
+    def stats(self):
+        with self._lock:
+            self._expire()
+            return {
+                'active': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'ttl_seconds': self.ttl_seconds,
+                'chars': sum(len(session.draft) for session in self._sessions.values()),
+                'created': self.created,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
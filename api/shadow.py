@@ -0,0 +1,197 @@
+"""
+Évaluation fantôme d'un modèle candidat sur le trafic réel
+
+Une fraction `sample_rate` des prédictions renvoyées est confiée, après la
+réponse, à un pool de threads qui rescore le texte avec le modèle candidat et
+compare les deux verdicts : taux d'accord, dérive de la probabilité « Reliable
+News » et latence du candidat. La requête ne fait que déposer le texte dans une
+file bornée ; si la file est pleine (surcharge), le texte est abandonné
+(compté dans `dropped`) plutôt que de ralentir le trafic principal.
+
+Priorité au trafic principal : tant que `busy()` est vrai (requêtes en cours
+dans le processus), les threads attendent avant de scorer, au plus
+`max_defer_seconds` par texte. Sous charge soutenue, la file se remplit et
+les textes suivants sont abandonnés ; le candidat n'utilise que le temps libre.
+
+Comme pour l'historique (store.py), après un fork chaque processus démarre ses
+propres threads au premier dépôt.
+"""
+
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger('fcc.shadow')
+
+# Latences récentes du candidat gardées pour les percentiles
+LATENCY_WINDOW = 1000
+
+# Intervalle (s) de vérification de `busy()` pendant l'attente d'un temps libre
+IDLE_POLL_SECONDS = 0.002
+
+
+class ShadowScorer:
+    """
+    Compare le modèle candidat (`candidate`, un ModelBundle) au modèle
+    principal. `predict(candidate, text)` retourne (classe, probabilités,
+    détails), avec le même traitement des textes longs que le modèle principal.
+    `on_result(drift, seconds)` est appelé après chaque comparaison
+    (métriques) ; `busy()` indique si le trafic principal occupe le processus.
+    """
+    
+    def __init__(self, candidate, predict, sample_rate=0.05, workers=1, queue_size=1000,
+                 on_result=None, busy=None, max_defer_seconds=1.0, rng=random.random):
+        self.candidate = candidate
+        self.predict = predict
+        self.sample_rate = sample_rate
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.on_result = on_result
+        self.busy = busy
+        self.max_defer_seconds = max_defer_seconds
+        self._rng = rng
+        
+        self._lock = threading.Lock()
+        self._queue = None
+        self._threads = []
+        self._pid = None
+        self.reset()
+        
+    def reset(self):
+        """Remet les statistiques à zéro (changement du modèle principal)"""
+        with self._lock:
+            self.sampled = 0
+            self.dropped = 0
+            self.errors = 0
+            self.compared = 0
+            self.agreed = 0
+            self.flips = {'fake_to_reliable': 0, 'reliable_to_fake': 0}
+            self.drift_sum = 0.0
+            self.abs_drift_sum = 0.0
+            self.max_abs_drift = 0.0
+            self.seconds_sum = 0.0
+            self.deferred_seconds = 0.0
+            self._latencies = deque(maxlen=LATENCY_WINDOW)
+            
+    def _ensure_workers(self):
+        # Appelé avec le verrou : démarre les threads du processus courant
+        if self._threads and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._queue = queue.Queue(self.queue_size)
+        self._threads = [threading.Thread(target=self._run, args=(self._queue,),
+                                          name=f'shadow-{i}', daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+            
+    def submit(self, text, prediction, probabilities):
+        """
+        Confie une prédiction principale à l'évaluation fantôme, pour une
+        fraction `sample_rate` des appels, sans attendre. Retourne True si le
+        texte a été déposé.
+        """
+        if self.sample_rate <= 0 or self._rng() >= self.sample_rate:
+            return False
+        with self._lock:
+            self._ensure_workers()
+            pending = self._queue
+            self.sampled += 1
+        try:
+            pending.put_nowait((text, int(prediction), float(probabilities[1])))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+        
+    def _wait_until_idle(self):
+        if self.busy is None:
+            return
+        start = time.monotonic()
+        deadline = start + self.max_defer_seconds
+        while self.busy() and time.monotonic() < deadline:
+            time.sleep(IDLE_POLL_SECONDS)
+        with self._lock:
+            self.deferred_seconds += time.monotonic() - start
+            
+    def _run(self, pending):
+        while True:
+            text, prediction, reliable = pending.get()
+            try:
+                self._wait_until_idle()
+                start = time.perf_counter()
+                candidate_prediction, candidate_probabilities, _ = self.predict(self.candidate, text)
+                seconds = time.perf_counter() - start
+                self._record(prediction, reliable, int(candidate_prediction),
+                             float(candidate_probabilities[1]), seconds)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                logger.exception("⚠️  Évaluation fantôme impossible")
+            finally:
+                pending.task_done()
+                
+    def _record(self, prediction, reliable, candidate_prediction, candidate_reliable, seconds):
+        agree = candidate_prediction == prediction
+        drift = candidate_reliable - reliable
+        with self._lock:
+            self.compared += 1
+            if agree:
+                self.agreed += 1
+            elif candidate_prediction == 1:
+                self.flips['fake_to_reliable'] += 1
+            else:
+                self.flips['reliable_to_fake'] += 1
+            self.drift_sum += drift
+            self.abs_drift_sum += abs(drift)
+            self.max_abs_drift = max(self.max_abs_drift, abs(drift))
+            self.seconds_sum += seconds
+            self._latencies.append(seconds)
+        if self.on_result is not None:
+            self.on_result(drift, seconds)
+            
+    def flush(self, timeout=None):
+        """Attend que les textes déjà déposés soient comparés"""
+        with self._lock:
+            pending = self._queue if self._pid == os.getpid() else None
+        if pending is None:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while pending.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            time.sleep(0.01)
+            
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            compared = self.compared
+            pending = self._queue
+            return {
+                'candidate_version': self.candidate.version,
+                'candidate_release': self.candidate.release,
+                'sample_rate': self.sample_rate,
+                'pending': pending.qsize() if pending is not None else 0,
+                'sampled': self.sampled,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'compared': compared,
+                'agreement_rate': round(self.agreed / compared, 4) if compared else None,
+                'flips': dict(self.flips),
+                # Probabilité « Reliable News » du candidat moins celle du modèle principal
+                'mean_drift': round(self.drift_sum / compared, 6) if compared else None,
+                'mean_abs_drift': round(self.abs_drift_sum / compared, 6) if compared else None,
+                'max_abs_drift': round(self.max_abs_drift, 6),
+                # Attente moyenne d'un temps libre avant scoring
+                'mean_defer_ms': round(self.deferred_seconds / compared * 1000, 3) if compared else None,
+                'candidate_mean_ms': round(self.seconds_sum / compared * 1000, 3) if compared else None,
+                'candidate_p50_ms': (round(latencies[len(latencies) // 2] * 1000, 3)
+                                     if latencies else None),
+                'candidate_p99_ms': (round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3)
+                                     if latencies else None),
+            }
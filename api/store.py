@@ -0,0 +1,273 @@
+"""
+Historique persistant des prédictions de l'API (SQLite)
+
+Chaque prédiction renvoyée est enregistrée : empreinte du texte normalisé,
+version du modèle, label, probabilités, détails du texte long et durée. Les
+threads de requête ne font que déposer l'enregistrement dans une file bornée ;
+un thread d'écriture regroupe les insertions par transactions (au plus
+`batch_size` lignes ou `flush_seconds` d'attente). Si la file est pleine,
+l'enregistrement est abandonné (compté dans `dropped`) plutôt que de ralentir
+la requête.
+
+Au démarrage, les dernières prédictions de la version active servent à
+préremplir le cache (`latest`). Le thread d'écriture applique aussi la
+politique de rétention (`compact`) : suppression des lignes plus anciennes que
+`retention_days` puis des plus anciennes au-delà de `max_rows`, et restitution
+des pages libérées (auto_vacuum incrémental).
+
+Le fichier SQLite (mode WAL) peut être partagé par les workers du serveur
+pré-forké : après un fork, chaque processus démarre son propre thread
+d'écriture au premier enregistrement.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from cache import text_hash
+
+logger = logging.getLogger('fcc.store')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    text_hash TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    prediction INTEGER NOT NULL,
+    probability_fake REAL NOT NULL,
+    probability_reliable REAL NOT NULL,
+    long_text TEXT,
+    duration_ms REAL
+);
+CREATE INDEX IF NOT EXISTS predictions_version_hash ON predictions (model_version, text_hash);
+CREATE INDEX IF NOT EXISTS predictions_created ON predictions (created);
+"""
+
+INSERT = """
+INSERT INTO predictions (created, text_hash, model_version, endpoint, prediction,
+                         probability_fake, probability_reliable, long_text, duration_ms)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Signal d'arrêt du thread d'écriture
+_STOP = object()
+
+
+class PredictionStore:
+    """
+    Historique SQLite des prédictions, alimenté par un thread d'écriture par
+    processus. Les compteurs (`written`, `batches`, `dropped`, `errors`,
+    `compacted`) sont partagés entre threads et lus ensemble par `stats`.
+    """
+    
+    def __init__(self, path, batch_size=500, flush_seconds=1.0, queue_size=10000,
+                 retention_days=30, max_rows=1000000, compact_seconds=3600):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.queue_size = queue_size
+        self.retention_days = retention_days
+        self.max_rows = max_rows
+        self.compact_seconds = compact_seconds
+        
+        self._lock = threading.Lock()
+        self._queue = None
+        self._writer = None
+        self._pid = None
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self.compacted = 0
+        
+        with closing(self._connect()) as connection:
+            # auto_vacuum doit être choisi avant la création des tables
+            connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            connection.executescript(SCHEMA)
+            
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+        
+    # ------------------------------------------------------------
+    # Écriture (thread de requête, puis thread d'écriture)
+    # ------------------------------------------------------------
+    
+    def _ensure_writer(self):
+        # Appelé avec le verrou : démarre le thread d'écriture du processus courant
+        if self._writer is not None and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._queue = queue.Queue(self.queue_size)
+        self._writer = threading.Thread(target=self._run, args=(self._queue,),
+                                        name='prediction-store', daemon=True)
+        self._writer.start()
+        
+    def record(self, text, model_version, endpoint, prediction, probabilities, details=None,
+               duration_ms=None):
+        """
+        Dépose une prédiction dans la file d'écriture sans attendre (l'empreinte
+        du texte est calculée par le thread d'écriture). Retourne False si la
+        file est pleine et que l'enregistrement est abandonné.
+        """
+        with self._lock:
+            self._ensure_writer()
+            records = self._queue
+        try:
+            records.put_nowait((time.time(), text, model_version, endpoint, int(prediction),
+                                float(probabilities[0]), float(probabilities[1]), details, duration_ms))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+        
+    def _run(self, records):
+        connection = self._connect()
+        last_compaction = None
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = records.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    records.task_done()
+                    break
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_seconds
+                    
+            if batch:
+                self._write(connection, batch)
+                for _ in batch:
+                    records.task_done()
+                    
+            if self.compact_seconds and (last_compaction is None
+                                         or time.monotonic() - last_compaction >= self.compact_seconds):
+                last_compaction = time.monotonic()
+                try:
+                    self.compact(connection)
+                except sqlite3.Error:
+                    logger.exception("⚠️  Compaction de l'historique impossible")
+        connection.close()
+        
+    def _write(self, connection, batch):
+        try:
+            rows = [
+                (created, text_hash(text), version, endpoint, prediction, fake, reliable,
+                 json.dumps(details) if details is not None else None, duration_ms)
+                for created, text, version, endpoint, prediction, fake, reliable, details, duration_ms in batch
+            ]
+            with connection:
+                connection.executemany(INSERT, rows)
+        except Exception:
+            with self._lock:
+                self.errors += len(batch)
+            logger.exception("⚠️  Écriture de l'historique des prédictions impossible")
+            return
+        with self._lock:
+            self.written += len(rows)
+            self.batches += 1
+        
+    def flush(self, timeout=None):
+        """Attend que les enregistrements déjà déposés soient écrits"""
+        with self._lock:
+            records = self._queue if self._pid == os.getpid() else None
+        if records is None:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while records.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            time.sleep(0.01)
+            
+    def close(self, timeout=10):
+        """Écrit les enregistrements en attente puis arrête le thread d'écriture"""
+        with self._lock:
+            writer, records = self._writer, self._queue
+            if writer is None or self._pid != os.getpid():
+                return
+            self._writer = self._queue = None
+        records.put(_STOP)
+        writer.join(timeout)
+        
+    # ------------------------------------------------------------
+    # Lecture et rétention
+    # ------------------------------------------------------------
+    
+    def latest(self, model_version, limit):
+        """
+        Dernière prédiction de chaque texte pour une version du modèle, de la
+        plus récente à la plus ancienne (au plus `limit`) :
+        [(empreinte, classe, [p_fake, p_reliable], détails), ...]
+        """
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                """
+                SELECT text_hash, prediction, probability_fake, probability_reliable, long_text
+                FROM predictions
+                WHERE id IN (SELECT MAX(id) FROM predictions WHERE model_version = ? GROUP BY text_hash)
+                ORDER BY id DESC LIMIT ?
+                """, (model_version, limit)).fetchall()
+        return [(digest, prediction, [fake, reliable], json.loads(details) if details else None)
+                for digest, prediction, fake, reliable, details in rows]
+                
+    def compact(self, connection=None):
+        """
+        Applique la rétention : lignes de plus de `retention_days` jours, puis
+        les plus anciennes au-delà de `max_rows`. Retourne le nombre de lignes supprimées.
+        """
+        own = connection is None
+        connection = connection or self._connect()
+        try:
+            with connection:
+                deleted = 0
+                if self.retention_days:
+                    cutoff = time.time() - self.retention_days * 86400
+                    deleted += connection.execute(
+                        "DELETE FROM predictions WHERE created < ?", (cutoff,)).rowcount
+                if self.max_rows:
+                    deleted += connection.execute(
+                        "DELETE FROM predictions WHERE id <= "
+                        "(SELECT id FROM predictions ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                        (self.max_rows,)).rowcount
+            if deleted:
+                connection.execute("PRAGMA incremental_vacuum").fetchall()
+        finally:
+            if own:
+                connection.close()
+        with self._lock:
+            self.compacted += deleted
+        return deleted
+        
+    def count(self):
+        with closing(self._connect()) as connection:
+            return connection.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+            
+    def stats(self):
+        with self._lock:
+            records = self._queue
+            return {
+                'path': self.path,
+                'pending': records.qsize() if records is not None else 0,
+                'written': self.written,
+                'batches': self.batches,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'compacted': self.compacted,
+            }
@@ -4,10 +4,27 @@ Détection de fake news avec Machine Learning
 """
 
 import streamlit as st
-import pickle
+import hashlib
+import io
+import json
 import os
+import sys
+from collections import Counter
 from pathlib import Path
 
+# Moteur d'inférence partagé avec l'API (api/inference.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+from inference import Cascade, LongTextPolicy
+from config import Config
+from loader import load_release
+from sessions import DraftScorer, diff_span
+
+# Scoring par blocs partagé avec le script de scoring en masse
+import bulk_score
+
+# Nombre de lignes scorées entre deux mises à jour de la barre de progression
+FILE_CHUNK_SIZE = 1000
+
 # Configuration de la page
 st.set_page_config(
     page_title="FCC Fake News Detector",
@@ -35,28 +52,127 @@ st.markdown("""
 # Cache pour charger les modèles une seule fois
 @st.cache_resource
 def load_models():
-    """Charge le modèle et le vectorizer"""
+    """
+    Charge la version publiée active (models/CURRENT) avec le chemin de
+    chargement de l'API : scoreur compilé, second étage et version du modèle
+    """
     try:
-        # Chemins absolus des modèles basés sur l'emplacement du script
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(base_dir, 'models', 'fake_news_model.pkl')
-        vectorizer_path = os.path.join(base_dir, 'models', 'tfidf_vectorizer.pkl')
-        
-        # Charger le modèle
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
-        
-        # Charger le vectorizer
-        with open(vectorizer_path, 'rb') as f:
-            vectorizer = pickle.load(f)
-        
-        return model, vectorizer
+        bundle = load_release(Config.MODEL_DIR, model_format=Config.MODEL_FORMAT, log=lambda message: None,
+                              precision=Config.MODEL_PRECISION, second_stage=Config.CASCADE_ENABLED)
+        # Même version que l'API : comparée à celle du rapport d'évaluation
+        return bundle.scorer, bundle.second_stage, bundle.version
     except Exception as e:
         st.error(f"Erreur lors du chargement des modèles: {e}")
-        return None, None
+        return None, None, None
 
 # Charger les modèles
-model, vectorizer = load_models()
+scorer, second_stage, model_version = load_models()
+
+# Même traitement des textes longs et même cascade que l'API : les articles
+# ambigus passent au second modèle
+long_text_policy = LongTextPolicy(
+    mode=Config.LONG_TEXT_MODE,
+    threshold_chars=Config.LONG_TEXT_CHARS,
+    token_budget=Config.TOKEN_BUDGET,
+    chunk_tokens=Config.CHUNK_TOKENS
+)
+cascade = Cascade(low=Config.CASCADE_LOW, high=Config.CASCADE_HIGH, max_chars=Config.LONG_TEXT_CHARS)
+
+
+def analyze_article(article_text):
+    """
+    Prédiction incrémentale du texte saisi : l'état de scoring du brouillon
+    (sessions.DraftScorer) est gardé dans la session Streamlit. Après une
+    retouche, seul le passage modifié est retokenisé. Comme pour les sessions
+    de l'API, un article long suit long_text_policy (prédiction complète).
+    Le verdict final (cascade comprise) est gardé par révision du brouillon :
+    un rerun déclenché par un widget ne rescore rien. Retourne (classe,
+    [p_fake, p_reliable], étage de la cascade qui a répondu)
+    """
+    draft = st.session_state.get('draft')
+    if draft is None or draft.scorer is not scorer:
+        draft = st.session_state['draft'] = DraftScorer(scorer, article_text)
+        st.session_state['draft_revision'] = st.session_state.get('draft_revision', 0) + 1
+    else:
+        edit = diff_span(draft.text, article_text)
+        if edit is not None:
+            draft.replace(edit['start'], edit['end'], edit['text'])
+            st.session_state['draft_revision'] += 1
+    revision = st.session_state['draft_revision']
+    cached = st.session_state.get('draft_result')
+    if cached is not None and cached[0] == revision:
+        return cached[1]
+        
+    if not draft.incremental or long_text_policy.applies(article_text):
+        prediction, probabilities, _ = long_text_policy.predict(scorer, article_text)
+    else:
+        prediction, probabilities = draft.predict()
+    prediction, probabilities, stage = cascade.route(second_stage, article_text, prediction, probabilities)
+    result = int(prediction), [float(p) for p in probabilities], stage
+    st.session_state['draft_result'] = (revision, result)
+    return result
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def score_uploaded_file(content_hash, _content, fmt, text_field, id_field):
+    """
+    Score un fichier téléversé par blocs, avec le scoreur compilé et le même
+    traitement des textes longs que l'API et bulk_score.py. Le résultat est
+    mis en cache par empreinte du contenu (`_content` n'est pas haché par
+    Streamlit) et par champs choisis : un fichier déjà analysé n'est pas rescoré.
+    """
+    text = _content.decode('utf-8-sig')
+    # Estimation du nombre de lignes pour la barre de progression
+    total = max(text.count('\n') - (1 if fmt == 'csv' else 0), 1)
+    progress = st.progress(0.0, text="Analyse du fichier...")
+    rows = []
+    for chunk_rows in bulk_score.iter_scored_chunks(io.StringIO(text, newline=''), fmt, text_field, id_field,
+                                                    chunk_size=FILE_CHUNK_SIZE, scorer=scorer,
+                                                    second_stage=second_stage):
+        rows.extend(chunk_rows)
+        progress.progress(min(len(rows) / total, 1.0), text=f"{len(rows):,} lignes analysées")
+    progress.empty()
+    return rows
+
+@st.cache_data(show_spinner=False)
+def load_evaluation(path, modified):
+    """
+    Rapport d'évaluation (evaluate.py), relu quand le fichier change
+    (`modified`) ; None s'il est illisible
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def evaluation_report():
+    """Rapport d'évaluation du modèle (Config.EVALUATION_REPORT), ou None s'il n'existe pas"""
+    try:
+        modified = os.path.getmtime(Config.EVALUATION_REPORT)
+    except OSError:
+        return None
+    return load_evaluation(Config.EVALUATION_REPORT, modified)
+
+
+def show_performance(report):
+    """Accuracy et moyennes pondérées precision / recall / F1 du rapport d'évaluation"""
+    if report is None:
+        st.info("Aucun rapport d'évaluation : lancez `python evaluate.py <corpus étiqueté>`")
+        return
+    if report['meta']['model_version'] != model_version:
+        st.warning(f"⚠️ Rapport calculé pour une autre version du modèle ({report['meta']['model_version']})")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Accuracy", f"{report['accuracy']:.2%}")
+        st.metric("Precision", f"{report['weighted_avg']['precision']:.2%}")
+    with col2:
+        st.metric("Recall", f"{report['weighted_avg']['recall']:.2%}")
+        st.metric("F1-Score", f"{report['weighted_avg']['f1']:.2%}")
+
+
+evaluation = evaluation_report()
 
 # Header
 st.title("🛡️ FCC Fake News Detector")
@@ -66,9 +182,10 @@ st.markdown("---")
 # Sidebar avec infos
 with st.sidebar:
     st.header("📊 Informations")
-    st.markdown("""
+    accuracy = f"{evaluation['accuracy']:.2%}" if evaluation is not None else "non évaluée"
+    st.markdown(f"""
     **Modèle:** Logistic Regression  
-    **Précision:** 98.34%  
+    **Accuracy:** {accuracy}  
     **Features:** TF-IDF (5000)  
     **Dataset:** 32,456 articles
     """)
@@ -85,20 +202,14 @@ with st.sidebar:
     st.markdown("---")
     
     st.header("📈 Performances")
-    col1, col2 = st.columns(2)
-    with col1:
-        st.metric("Accuracy", "98.34%")
-        st.metric("Precision", "98.34%")
-    with col2:
-        st.metric("Recall", "98.34%")
-        st.metric("F1-Score", "98.34%")
+    show_performance(evaluation)
 
 # Main content
-if model is not None and vectorizer is not None:
+if scorer is not None:
     st.success("✅ Modèles chargés avec succès !")
     
     # Tabs pour organiser le contenu
-    tab1, tab2, tab3 = st.tabs(["📰 Analyse", "🧪 Exemples", "📚 Documentation"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📰 Analyse", "📂 Fichier", "🧪 Exemples", "📚 Documentation"])
     
     with tab1:
         st.header("Analyser un article")
@@ -119,10 +230,19 @@ if model is not None and vectorizer is not None:
             clear_button = st.button("🗑️ Effacer", use_container_width=True)
         
         if clear_button:
+            st.session_state.pop('analyzed_text', None)
+            st.session_state.pop('draft', None)
+            st.session_state.pop('draft_result', None)
             st.rerun()
         
-        # Analyse
+        # Le texte analysé reste affiché lors des reruns suivants (autres widgets)
         if analyze_button:
+            st.session_state['analyzed_text'] = article_text
+        analyzed_text = st.session_state.get('analyzed_text')
+        
+        # Analyse
+        if analyzed_text is not None:
+            article_text = analyzed_text
             if not article_text.strip():
                 st.warning("⚠️ Veuillez entrer un texte à analyser.")
             elif len(article_text.strip()) < 20:
@@ -130,12 +250,8 @@ if model is not None and vectorizer is not None:
             else:
                 with st.spinner("Analyse en cours..."):
                     try:
-                        # Vectorisation
-                        text_vectorized = vectorizer.transform([article_text])
-                        
-                        # Prédiction
-                        prediction = model.predict(text_vectorized)[0]
-                        probabilities = model.predict_proba(text_vectorized)[0]
+                        # Seul le passage modifié depuis l'analyse précédente est retokenisé
+                        prediction, probabilities, stage = analyze_article(article_text)
                         
                         # Résultats
                         st.markdown("---")
@@ -153,6 +269,8 @@ if model is not None and vectorizer is not None:
                         else:
                             st.success(f"### ✅ {label}")
                             st.success(f"**Confiance : {confidence:.2f}%**")
+                        if stage == 2:
+                            st.caption("🔁 Article ambigu pour le premier modèle : verdict du second modèle")
                         
                         # Métriques
                         col1, col2, col3 = st.columns(3)
@@ -186,6 +304,51 @@ if model is not None and vectorizer is not None:
                         st.error(f"❌ Erreur lors de l'analyse: {e}")
     
     with tab2:
+        st.header("📂 Analyser un fichier")
+        st.markdown("Téléversez un fichier CSV ou JSONL (un article par ligne) : il est analysé par blocs "
+                    f"de {FILE_CHUNK_SIZE} lignes, puis les résultats sont téléchargeables.")
+        
+        uploaded = st.file_uploader("Fichier d'articles", type=['csv', 'jsonl'])
+        col1, col2 = st.columns(2)
+        with col1:
+            text_field = st.text_input("Champ du texte", value="text")
+        with col2:
+            id_field = st.text_input("Champ de l'identifiant", value="id")
+        
+        if uploaded is not None:
+            content = uploaded.getvalue()
+            fmt = bulk_score.detect_format(uploaded.name, None)
+            try:
+                rows = score_uploaded_file(hashlib.sha256(content).hexdigest(), content, fmt,
+                                           text_field, id_field)
+            except (UnicodeDecodeError, ValueError) as e:
+                st.error(f"❌ Fichier illisible: {e}")
+                rows = None
+            
+            if rows is not None:
+                labels = Counter(row['prediction'] for row in rows if 'error' not in row)
+                errors = sum(1 for row in rows if 'error' in row)
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Fake News", f"{labels['Fake News']:,}")
+                with col2:
+                    st.metric("Reliable News", f"{labels['Reliable News']:,}")
+                with col3:
+                    st.metric("Lignes en erreur", f"{errors:,}")
+                
+                st.dataframe(rows[:1000], use_container_width=True)
+                if len(rows) > 1000:
+                    st.caption(f"Aperçu des 1000 premières lignes sur {len(rows):,}")
+                
+                output_format = st.radio("Format du fichier de résultats", ['csv', 'jsonl'], horizontal=True)
+                st.download_button(
+                    "⬇️ Télécharger les résultats",
+                    data=bulk_score.format_rows(rows, output_format),
+                    file_name=f"{Path(uploaded.name).stem}_scores.{output_format}",
+                    mime='text/csv' if output_format == 'csv' else 'application/jsonl'
+                )
+    
+    with tab3:
         st.header("🧪 Exemples prédéfinis")
         st.markdown("Testez rapidement avec ces exemples :")
         
@@ -209,7 +372,7 @@ if model is not None and vectorizer is not None:
                     disabled=True
                 )
     
-    with tab3:
+    with tab4:
         st.header("📚 Documentation")
         
         st.subheader("🤖 Comment ça fonctionne ?")
@@ -247,13 +410,34 @@ if model is not None and vectorizer is not None:
         
         st.subheader("🎯 Performances du modèle")
         
-        perf_col1, perf_col2 = st.columns(2)
-        with perf_col1:
-            st.metric("Accuracy", "98.34%", delta="Excellent")
-            st.metric("Precision", "98.34%", delta="Excellent")
-        with perf_col2:
-            st.metric("Recall", "98.34%", delta="Excellent")
-            st.metric("F1-Score", "98.34%", delta="Excellent")
+        show_performance(evaluation)
+        if evaluation is not None:
+            meta, throughput = evaluation['meta'], evaluation['throughput']
+            st.caption(f"{evaluation['count']:,} articles évalués le {meta['created'][:10]} "
+                       f"({os.path.basename(meta['dataset'])}), {throughput['rows_per_s']:,.0f} articles/s "
+                       f"avec {throughput['workers']} worker(s)")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("ROC AUC", f"{evaluation['roc_auc']:.4f}" if evaluation['roc_auc'] is not None else "n/a")
+            with col2:
+                st.metric("Log-loss", f"{evaluation['log_loss']:.4f}")
+            with col3:
+                st.metric("Erreur de calibration", f"{evaluation['expected_calibration_error']:.4f}")
+            
+            with st.expander("📋 Détail par classe et matrice de confusion"):
+                st.dataframe([dict(classe=name, **metrics) for name, metrics in evaluation['classes'].items()],
+                             use_container_width=True)
+                labels = evaluation['confusion_matrix']['labels']
+                st.markdown("Matrice de confusion (lignes : classe réelle, colonnes : classe prédite)")
+                st.dataframe([dict({'réel': label}, **dict(zip(labels, row)))
+                              for label, row in zip(labels, evaluation['confusion_matrix']['matrix'])],
+                             use_container_width=True)
+            with st.expander("📈 Courbe ROC et calibration"):
+                if evaluation['roc_curve']:
+                    st.line_chart({'fpr': [point['fpr'] for point in evaluation['roc_curve']],
+                                   'tpr': [point['tpr'] for point in evaluation['roc_curve']]},
+                                  x='fpr', y='tpr')
+                st.dataframe(evaluation['calibration'], use_container_width=True)
         
         st.markdown("---")
         
@@ -0,0 +1,303 @@
+"""
+Benchmark hors-ligne du chemin d'inférence, étape par étape
+
+Mesure séparément chaque étape d'une prédiction, sans serveur :
+    transform       vectorizer.transform (scikit-learn)
+    predict         model.predict sur la matrice TF-IDF
+    predict_proba   model.predict_proba sur la matrice TF-IDF
+    scorer          scoreur compilé (chemin réellement utilisé par l'API)
+    explain         scoreur compilé + 10 termes les plus influents (option
+                    "explain" de /predict) : le surcoût est l'écart avec scorer
+    dedup           signature MinHash + recherche d'un quasi-doublon déjà indexé
+                    (verdict repris) : doit rester sous transform + scorer
+    json            construction des résultats + sérialisation JSON
+    msgpack         résultats en colonnes (label et probabilités) + sérialisation
+                    MessagePack, réponse binaire de /predict/batch (si msgpack
+                    est installé) ; json et msgpack indiquent aussi la taille
+                    de la réponse (payload_bytes)
+    request         requête complète via le client de test Flask
+                    (/predict pour un texte, /predict/batch au-delà)
+
+Deux balayages : longueur du texte (du tweet à l'article de 50 Ko, un texte
+par appel) puis taille de lot (1 à 1024 textes d'une longueur fixe). Les
+textes sont générés de façon déterministe depuis le vocabulaire du vectorizer.
+
+Les résultats (p50/p95/p99 en ms, débit en textes/s) sont écrits en JSON et
+comparés à une référence enregistrée : toute étape dont le p50 dépasse la
+référence de plus de `--tolerance` fait échouer l'exécution (code de sortie 1).
+
+Usage (depuis la racine du projet) :
+    python benchmarks/bench_inference.py --output results.json
+    python benchmarks/bench_inference.py --save-baseline    # nouvelle référence
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BASE_DIR, 'api'))
+
+from config import Config
+from cache import PredictionCache
+from dedup import NearDuplicateIndex
+import formats
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+STAGES = ['transform', 'predict', 'predict_proba', 'scorer', 'explain', 'dedup', 'json', 'request']
+if formats.available():
+    STAGES.insert(STAGES.index('json') + 1, 'msgpack')
+# Étapes de sérialisation : la taille de la réponse est relevée avec la durée
+PAYLOAD_STAGES = ('json', 'msgpack')
+DEFAULT_LENGTHS = [280, 1000, 5000, 20000, 50000]
+DEFAULT_BATCH_SIZES = [1, 8, 64, 256, 1024]
+
+
+# ============================================================
+# DONNÉES ET MESURE
+# ============================================================
+
+def make_texts(vocabulary, length, count, seed):
+    """Textes déterministes d'environ `length` caractères tirés du vocabulaire"""
+    rng = random.Random(f'{seed}:{length}:{count}')
+    texts = []
+    for _ in range(count):
+        words = []
+        size = 0
+        while size <= length:
+            word = rng.choice(vocabulary)
+            words.append(word)
+            size += len(word) + 1
+        texts.append(' '.join(words)[:length])
+    return texts
+
+
+def measure(function, min_iterations, min_seconds, max_iterations, warmup=2):
+    """
+    Appelle `function` jusqu'à avoir au moins `min_iterations` mesures et
+    `min_seconds` de temps cumulé (au plus `max_iterations`). Retourne les
+    durées en millisecondes.
+    """
+    for _ in range(warmup):
+        function()
+    samples = []
+    total = 0.0
+    while len(samples) < max_iterations and (len(samples) < min_iterations or total < min_seconds):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed * 1000)
+        total += elapsed
+    return samples
+
+
+def summarize(samples, batch_size):
+    values = np.asarray(samples)
+    mean_ms = float(values.mean())
+    return {
+        'iterations': len(samples),
+        'mean_ms': round(mean_ms, 4),
+        'p50_ms': round(float(np.percentile(values, 50)), 4),
+        'p95_ms': round(float(np.percentile(values, 95)), 4),
+        'p99_ms': round(float(np.percentile(values, 99)), 4),
+        'throughput_per_s': round(batch_size * 1000 / mean_ms, 1) if mean_ms > 0 else None,
+    }
+
+
+# ============================================================
+# ÉTAPES
+# ============================================================
+
+def load_api():
+    """Charge l'API Flask (format pickle : le modèle scikit-learn est nécessaire)"""
+    Config.MODEL_FORMAT = 'pickle'
+    # Pas de journal échantillonné pendant les mesures
+    Config.LOG_SAMPLE_RATE = 0
+    import app as flask_api
+    flask_api.load_models()
+    # Cache et quasi-doublons désactivés : chaque requête mesurée passe par le scoring
+    flask_api.prediction_cache = PredictionCache(max_size=0, ttl_seconds=0)
+    flask_api.near_duplicates = NearDuplicateIndex(max_size=0)
+    return flask_api
+
+
+def stage_functions(flask_api, client, texts):
+    """Une fonction sans argument par étape, pour le lot de textes donné"""
+    vectorizer, model, scorer = flask_api.vectorizer, flask_api.model, flask_api.scorer
+    current = flask_api.bundle
+    features = vectorizer.transform(texts)
+    predictions = scorer.predict_batch(texts)
+    headers = {'Content-Type': 'application/json'}
+    
+    # Index où chaque texte mesuré est déjà présent : la recherche aboutit
+    index = NearDuplicateIndex(threshold=Config.DEDUP_THRESHOLD, min_tokens=Config.DEDUP_MIN_TOKENS,
+                               max_tokens=Config.TOKEN_BUDGET)
+    for i, (text, prediction) in enumerate(zip(texts, predictions)):
+        index.add(i, i, index.signature(text), prediction, current.version)
+        
+    def dedup():
+        return [index.lookup(index.signature(text), current.version) for text in texts]
+    
+    if len(texts) == 1:
+        path, payload = '/predict', json.dumps({'text': texts[0]})
+    else:
+        path, payload = '/predict/batch', json.dumps({'texts': texts})
+        
+    def request():
+        response = client.post(path, data=payload, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f'{path} a répondu {response.status_code}')
+            
+    return {
+        'transform': lambda: vectorizer.transform(texts),
+        'predict': lambda: model.predict(features),
+        'predict_proba': lambda: model.predict_proba(features),
+        'scorer': lambda: scorer.predict_batch(texts),
+        'explain': lambda: [flask_api.explain_text(text, current, 10) for text in texts],
+        'dedup': dedup,
+        'json': lambda: json.dumps([flask_api.build_result(text, prediction, probabilities)
+                                    for text, (prediction, probabilities) in zip(texts, predictions)]),
+        'msgpack': lambda: formats.encode(formats.columns(
+            [(i, text, prediction, probabilities) for i, (text, (prediction, probabilities))
+             in enumerate(zip(texts, predictions))],
+            len(texts), formats.DEFAULT_FIELDS[formats.MSGPACK], Config.LABELS)),
+        'request': request,
+    }
+
+
+def run_benchmarks(args):
+    flask_api = load_api()
+    # Les lots mesurés peuvent dépasser la limite de production
+    Config.MAX_BATCH_SIZE = max([Config.MAX_BATCH_SIZE] + args.batch_sizes)
+    client = flask_api.app.test_client()
+    vocabulary = sorted(flask_api.vectorizer.vocabulary_)
+    
+    cases = [(length, 1) for length in args.lengths]
+    cases += [(args.batch_text_length, size) for size in args.batch_sizes
+              if (args.batch_text_length, size) not in cases]
+    
+    results = {}
+    for length, batch_size in cases:
+        texts = make_texts(vocabulary, length, batch_size, args.seed)
+        functions = stage_functions(flask_api, client, texts)
+        for stage in args.stages:
+            samples = measure(functions[stage], args.min_iterations, args.min_seconds, args.max_iterations)
+            result = {'stage': stage, 'text_length': length, 'batch_size': batch_size}
+            result.update(summarize(samples, batch_size))
+            if stage in PAYLOAD_STAGES:
+                payload = functions[stage]()
+                result['payload_bytes'] = len(payload.encode('utf-8') if isinstance(payload, str) else payload)
+            results[f'{stage}/len={length}/batch={batch_size}'] = result
+            print(f"{stage:>14} {length:>7} {batch_size:>6} {result['p50_ms']:>10.3f} "
+                  f"{result['p95_ms']:>10.3f} {result['p99_ms']:>10.3f} {result['throughput_per_s']:>12,.0f}"
+                  + (f" {result['payload_bytes']:>12,} o" if 'payload_bytes' in result else ''))
+    
+    import sklearn
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'model_version': flask_api.model_version,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+
+
+# ============================================================
+# COMPARAISON À LA RÉFÉRENCE
+# ============================================================
+
+def compare(current, baseline, tolerance, min_delta_ms):
+    """
+    Retourne la liste des régressions : cas dont le p50 dépasse celui de la
+    référence de plus de `tolerance` (relatif) ET de `min_delta_ms` (absolu,
+    pour ignorer le bruit des étapes de quelques microsecondes)
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+        delta = result['p50_ms'] - reference['p50_ms']
+        if delta > min_delta_ms and result['p50_ms'] > reference['p50_ms'] * (1 + tolerance):
+            regressions.append({
+                'case': name,
+                'baseline_p50_ms': reference['p50_ms'],
+                'p50_ms': result['p50_ms'],
+                'ratio': round(result['p50_ms'] / reference['p50_ms'], 2),
+            })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--lengths', type=int, nargs='+', default=DEFAULT_LENGTHS,
+                        help="Longueurs de texte (caractères) mesurées avec un texte par appel")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=DEFAULT_BATCH_SIZES)
+    parser.add_argument('--batch-text-length', type=int, default=2000,
+                        help="Longueur des textes du balayage par taille de lot")
+    parser.add_argument('--min-iterations', type=int, default=20)
+    parser.add_argument('--min-seconds', type=float, default=0.5)
+    parser.add_argument('--max-iterations', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Fichier JSON de résultats (optionnel)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Référence à comparer")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Enregistrer les résultats comme nouvelle référence")
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help="Ralentissement relatif toléré sur le p50 (0.3 = +30%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=0.05,
+                        help="Écart absolu minimal (ms) pour compter une régression")
+    args = parser.parse_args(argv)
+    
+    print(f"{'étape':>14} {'taille':>7} {'lot':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'textes/s':>12}")
+    current = run_benchmarks(args)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+            
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Référence enregistrée: {args.baseline}")
+        return 0
+        
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️  Pas de référence ({args.baseline}), comparaison ignorée")
+        return 0
+        
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    for key in ('cpu_count', 'python', 'sklearn', 'model_version'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"⚠️  Référence mesurée avec un autre environnement ({key}: "
+                  f"{baseline['meta'].get(key)} → {current['meta'].get(key)})")
+    
+    regressions = compare(current, baseline, args.tolerance, args.min_delta_ms)
+    if not regressions:
+        print(f"\n✅ Aucune régression (tolérance {args.tolerance:.0%} sur le p50)")
+        return 0
+        
+    print(f"\n❌ {len(regressions)} régression(s) de performance :")
+    for regression in regressions:
+        print(f"   {regression['case']}: {regression['baseline_p50_ms']:.3f} ms → "
+              f"{regression['p50_ms']:.3f} ms (x{regression['ratio']})")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
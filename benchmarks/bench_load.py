@@ -0,0 +1,459 @@
+"""
+Test de charge de l'API : balayage de débit et de concurrence
+
+Démarre l'API localement dans l'un des modes de service, puis l'interroge avec
+un client asyncio en boucle ouverte : les requêtes /predict partent selon un
+processus de Poisson au débit demandé, sans attendre les réponses
+précédentes. Au plus `concurrency` requêtes sont en vol ; les suivantes
+attendent leur tour et cette attente compte dans leur latence (pas
+d'omission coordonnée). Les textes suivent un mélange réaliste de longueurs,
+du tweet à l'article long.
+
+Pour chaque niveau de concurrence, le débit offert augmente palier par palier
+(x`--growth`) jusqu'à saturation : débit obtenu inférieur à 90 % du débit
+offert, p99 au-delà de `--max-p99-ms` ou taux d'erreur au-delà de
+`--max-error-rate`. Le point de saturation retenu est le débit du dernier
+palier sain.
+
+Modes de service :
+    flask    application Flask dans ce processus (serveur werkzeug multi-thread ;
+             partage le GIL avec le client, à réserver aux comparaisons rapides)
+    server   serveur pré-forké (api/server.py) dans un sous-processus
+    asgi     uvicorn + micro-lots (api/asgi.py) dans un sous-processus
+    url      API déjà lancée (--url), par exemple sur une autre machine
+
+Le cache et l'index des quasi-doublons sont désactivés dans l'API démarrée
+(sauf `--cache`) : chaque requête passe par le scoring.
+
+Avec `--shadow VERSION`, l'API démarrée score aussi en arrière-plan une
+fraction `--shadow-rate` des requêtes avec cette version de models/
+(évaluation fantôme) : comparer aux mêmes paliers sans `--shadow` mesure
+son effet sur la latence des réponses.
+
+Usage (depuis la racine du projet) :
+    python benchmarks/bench_load.py --mode server --workers 2 --output server.json
+    python benchmarks/bench_load.py --mode asgi --concurrency 8 64 --duration 5
+    python benchmarks/bench_load.py --mode server --workers 1 --rates 100 200 --shadow 2026-11-01
+    python benchmarks/bench_load.py --mode url --url http://10.0.0.5:5000 --rates 50 100 200
+"""
+
+import argparse
+import asyncio
+import http.client
+import importlib
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import numpy as np
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+API_DIR = os.path.join(BASE_DIR, 'api')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_inference import make_texts
+
+MODES = ['flask', 'server', 'asgi', 'url']
+
+# Longueur des textes (caractères) et part des requêtes
+DEFAULT_MIX = '280:0.45,1000:0.25,3000:0.2,10000:0.08,30000:0.02'
+
+# Textes différents par longueur (tirés au hasard à chaque requête)
+TEXTS_PER_LENGTH = 20
+
+# Un palier est saturé si le débit obtenu est inférieur à cette part du débit envoyé
+MIN_THROUGHPUT_RATIO = 0.9
+
+
+# ============================================================
+# TEXTES
+# ============================================================
+
+def parse_mix(value):
+    """'280:0.5,2000:0.5' -> [(280, 0.5), (2000, 0.5)] (poids normalisés)"""
+    mix = []
+    for part in value.split(','):
+        length, _, weight = part.partition(':')
+        mix.append((int(length), float(weight or 1)))
+    total = sum(weight for _, weight in mix)
+    if not mix or total <= 0 or any(length <= 0 or weight < 0 for length, weight in mix):
+        raise ValueError(f"Mélange de longueurs invalide: {value!r}")
+    return [(length, round(weight / total, 6)) for length, weight in mix]
+
+
+def load_vocabulary():
+    """Unigrammes du vocabulaire du modèle (les textes générés touchent les vrais poids)"""
+    sys.path.insert(0, API_DIR)
+    from config import Config
+    from loader import load_release
+    
+    bundle = load_release(Config.MODEL_DIR, model_format='pickle', log=lambda message: None)
+    return sorted(term for term in bundle.scorer.weights if ' ' not in term)
+
+
+def make_payloads(vocabulary, mix, seed):
+    """{longueur: [corps JSON encodés]} pour chaque longueur du mélange"""
+    return {
+        length: [json.dumps({'text': text}).encode('utf-8')
+                 for text in make_texts(vocabulary, length, TEXTS_PER_LENGTH, seed)]
+        for length, _ in mix
+    }
+
+
+# ============================================================
+# CLIENT HTTP ASYNCIO
+# ============================================================
+
+async def post(host, port, path, body):
+    """POST JSON sur une connexion neuve ; retourne le code de statut HTTP"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1') + body)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = None
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        if length is None:
+            await reader.read()
+        else:
+            await reader.readexactly(length)
+        return status
+    finally:
+        writer.close()
+
+
+async def run_step(url, payloads, mix, rate, concurrency, duration, timeout=30, seed=0):
+    """
+    Un palier en boucle ouverte : arrivées de Poisson à `rate` requêtes/s
+    pendant `duration` secondes. Retourne le résumé du palier.
+    """
+    target = urlsplit(url)
+    host, port = target.hostname, target.port or 80
+    path = (target.path.rstrip('/') or '') + '/predict'
+    rng = random.Random(f'{seed}:{rate}:{concurrency}')
+    lengths = [length for length, _ in mix]
+    weights = [weight for _, weight in mix]
+    slots = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    latencies = []
+    statuses = Counter()
+    
+    async def send(scheduled, body):
+        async with slots:
+            try:
+                status = await asyncio.wait_for(post(host, port, path, body), timeout)
+            except asyncio.TimeoutError:
+                status = 'timeout'
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+                status = 'connection'
+        # Latence depuis l'instant d'arrivée prévu (attente d'un créneau comprise)
+        latencies.append(loop.time() - scheduled)
+        statuses[status] += 1
+        
+    start = loop.time()
+    arrival = start
+    tasks = []
+    while True:
+        arrival += rng.expovariate(rate)
+        if arrival - start >= duration:
+            break
+        delay = arrival - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        length = rng.choices(lengths, weights)[0]
+        tasks.append(asyncio.ensure_future(send(arrival, rng.choice(payloads[length]))))
+    await asyncio.gather(*tasks)
+    return summarize_step(rate, concurrency, latencies, statuses, duration, loop.time() - start)
+
+
+def summarize_step(rate, concurrency, latencies, statuses, duration, elapsed):
+    """
+    Résumé d'un palier. Le débit obtenu (réponses 200 par seconde jusqu'à la
+    dernière réponse) se compare au débit effectivement envoyé : le tirage de
+    Poisson s'écarte du débit offert sur un palier court.
+    """
+    sent = sum(statuses.values())
+    ok = statuses.get(200, 0)
+    values = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        'offered_rps': rate,
+        'concurrency': concurrency,
+        'sent': sent,
+        'sent_rps': round(sent / duration, 1),
+        'ok': ok,
+        'error_rate': round((sent - ok) / sent, 4) if sent else 0.0,
+        'errors': {str(status): count for status, count in statuses.items() if status != 200},
+        'throughput_rps': round(ok / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(float(np.percentile(values, 50)), 2),
+        'p99_ms': round(float(np.percentile(values, 99)), 2),
+        'max_ms': round(float(values.max()), 2),
+        'seconds': round(elapsed, 3),
+    }
+
+
+def is_saturated(step, max_p99_ms, max_error_rate):
+    """Raisons de saturation d'un palier (liste vide si le palier est sain)"""
+    reasons = []
+    if step['throughput_rps'] < step['sent_rps'] * MIN_THROUGHPUT_RATIO:
+        reasons.append('throughput')
+    if step['p99_ms'] > max_p99_ms:
+        reasons.append('p99')
+    if step['error_rate'] > max_error_rate:
+        reasons.append('errors')
+    return reasons
+
+
+def sweep_rates(args):
+    """Débits offerts : liste explicite, ou progression géométrique bornée"""
+    if args.rates:
+        return sorted(args.rates)
+    rates = []
+    rate = args.start_rate
+    while rate <= args.max_rate:
+        rates.append(round(rate, 1))
+        rate *= args.growth
+    return rates
+
+
+async def sweep(url, payloads, mix, args, report=print):
+    """Balayage débit x concurrence ; s'arrête au premier palier saturé de chaque concurrence"""
+    steps = []
+    saturation = []
+    for concurrency in args.concurrency:
+        last_healthy = None
+        saturated_at = None
+        for rate in sweep_rates(args):
+            step = await run_step(url, payloads, mix, rate, concurrency, args.duration,
+                                  args.timeout, args.seed)
+            step['saturated'] = is_saturated(step, args.max_p99_ms, args.max_error_rate)
+            steps.append(step)
+            report(step)
+            if step['saturated']:
+                saturated_at = step
+                break
+            last_healthy = step
+        saturation.append({
+            'concurrency': concurrency,
+            'max_sustainable_rps': last_healthy['throughput_rps'] if last_healthy else None,
+            'p99_ms_at_max': last_healthy['p99_ms'] if last_healthy else None,
+            'saturated_at_rps': saturated_at['offered_rps'] if saturated_at else None,
+            'reasons': saturated_at['saturated'] if saturated_at else [],
+        })
+    return steps, saturation
+
+
+# ============================================================
+# DÉMARRAGE DE L'API
+# ============================================================
+
+def api_environment(cache, shadow=None, shadow_rate=1.0):
+    """Variables d'environnement de l'API mesurée"""
+    env = dict(os.environ, FCC_LOG_SAMPLE_RATE='0', FCC_LOG_LEVEL='WARNING', FCC_MODEL_WATCH_INTERVAL='0')
+    if not cache:
+        env.update(FCC_CACHE_ENABLED='0', FCC_DEDUP_ENABLED='0')
+    if shadow:
+        env.update(FCC_SHADOW_RELEASE=shadow, FCC_SHADOW_SAMPLE_RATE=str(shadow_rate))
+    return env
+
+
+def fetch_health(url, timeout=5):
+    """Contenu de /health, ou None si l'API ne répond pas"""
+    parts = urlsplit(url)
+    try:
+        connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        connection.request('GET', '/health')
+        return json.loads(connection.getresponse().read())
+    except (OSError, ValueError):
+        return None
+
+
+def wait_until_ready(port, timeout=120, process=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"L'API s'est arrêtée au démarrage (code {process.returncode})")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/ready')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("L'API n'est pas prête à temps")
+
+
+class LocalAPI:
+    """API démarrée pour la durée du test (contexte `with`), à l'adresse `url`"""
+    
+    def __init__(self, mode, port, workers, cache=False, shadow=None, shadow_rate=1.0):
+        self.mode = mode
+        self.port = port
+        self.workers = workers
+        self.env = api_environment(cache, shadow, shadow_rate)
+        self.url = f'http://127.0.0.1:{port}'
+        self._process = None
+        self._server = None
+        
+    def __enter__(self):
+        if self.mode == 'flask':
+            # La configuration, déjà importée par bench_inference, est relue avec l'environnement du test
+            os.environ.update(self.env)
+            sys.path.insert(0, API_DIR)
+            import config
+            importlib.reload(config)
+            import app as flask_api
+            from werkzeug.serving import make_server
+            
+            flask_api.create_app(background=False)
+            logging.getLogger('werkzeug').setLevel(logging.WARNING)
+            self._server = make_server('127.0.0.1', self.port, flask_api.app, threaded=True)
+            threading.Thread(target=self._server.serve_forever, name='bench-api', daemon=True).start()
+            wait_until_ready(self.port)
+            return self
+            
+        if self.mode == 'server':
+            command = [sys.executable, '-W', 'ignore', os.path.join(API_DIR, 'server.py'),
+                       '--workers', str(self.workers), '--port', str(self.port), '--max-requests', '0']
+        else:
+            command = [sys.executable, '-W', 'ignore', '-m', 'uvicorn', 'asgi:app',
+                       '--port', str(self.port), '--log-level', 'warning', '--no-access-log']
+            if self.workers > 1:
+                command += ['--workers', str(self.workers)]
+        self._process = subprocess.Popen(command, cwd=API_DIR, env=self.env,
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_ready(self.port, process=self._process)
+        except BaseException:
+            self.__exit__()
+            raise
+        return self
+        
+    def __exit__(self, *exc_info):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+
+
+# ============================================================
+# PROGRAMME PRINCIPAL
+# ============================================================
+
+def print_step(step):
+    reasons = ','.join(step['saturated']) or '-'
+    print(f"{step['concurrency']:>6} {step['offered_rps']:>9.1f} {step['throughput_rps']:>9.1f} "
+          f"{step['p50_ms']:>9.2f} {step['p99_ms']:>9.2f} {step['error_rate'] * 100:>7.2f}% {reasons:>12}",
+          flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', choices=MODES, default='server')
+    parser.add_argument('--url', help="Adresse de l'API (mode url)")
+    parser.add_argument('--workers', type=int, default=2, help="Workers (modes server et asgi)")
+    parser.add_argument('--port', type=int, default=5098)
+    parser.add_argument('--cache', action='store_true', help="Garder le cache et les quasi-doublons actifs")
+    parser.add_argument('--shadow', metavar='VERSION', help="Version de models/ scorée en évaluation fantôme")
+    parser.add_argument('--shadow-rate', type=float, default=1.0, help="Fraction des requêtes rescorées (--shadow)")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16],
+                        help="Requêtes en vol au plus (un balayage de débit par valeur)")
+    parser.add_argument('--rates', type=float, nargs='+', help="Débits offerts (req/s), au lieu de la progression")
+    parser.add_argument('--start-rate', type=float, default=25)
+    parser.add_argument('--growth', type=float, default=1.5)
+    parser.add_argument('--max-rate', type=float, default=5000)
+    parser.add_argument('--duration', type=float, default=10, help="Durée d'un palier (s)")
+    parser.add_argument('--timeout', type=float, default=30, help="Délai maximal d'une requête (s)")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Longueurs de texte et poids, longueur:poids,...")
+    parser.add_argument('--max-p99-ms', type=float, default=1000)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Fichier JSON de résultats (optionnel)")
+    args = parser.parse_args(argv)
+    
+    if args.mode == 'url' and not args.url:
+        parser.error("--url est requis en mode url")
+    if args.shadow and args.mode == 'url':
+        parser.error("--shadow s'applique à l'API démarrée par le test (modes flask, server et asgi)")
+    if args.growth <= 1 or args.duration <= 0 or min(args.concurrency) < 1:
+        parser.error("--growth doit être > 1, --duration > 0 et --concurrency >= 1")
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+        
+    def run(url):
+        payloads = make_payloads(load_vocabulary(), mix, args.seed)
+        print(f"{'conc.':>6} {'offert':>9} {'obtenu':>9} {'p50 ms':>9} {'p99 ms':>9} {'erreurs':>8} {'saturation':>12}")
+        return asyncio.run(sweep(url, payloads, mix, args, report=print_step))
+        
+    shadow = None
+    if args.mode == 'url':
+        steps, saturation = run(args.url)
+    else:
+        with LocalAPI(args.mode, args.port, args.workers, args.cache, args.shadow, args.shadow_rate) as api:
+            steps, saturation = run(api.url)
+            if args.shadow:
+                # Statistiques du worker qui répond (une par processus en mode pré-forké)
+                shadow = (fetch_health(api.url) or {}).get('shadow')
+                if shadow is None:
+                    print(f"\n⚠️  Évaluation fantôme inactive : version {args.shadow!r} introuvable dans models/ ?")
+                else:
+                    print(f"\n👥 Évaluation fantôme : {shadow['compared']} comparaisons, "
+                          f"{shadow['dropped']} abandonnées, accord {shadow['agreement_rate']}, "
+                          f"candidat p50 {shadow['candidate_p50_ms']} ms")
+                    
+    
+    print("\n🎯 Point de saturation")
+    for point in saturation:
+        healthy = (f"{point['max_sustainable_rps']:,.1f} req/s soutenues (p99 {point['p99_ms_at_max']:.1f} ms)"
+                   if point['max_sustainable_rps'] is not None else "aucun palier sain")
+        saturated = (f"saturé à {point['saturated_at_rps']:,.1f} req/s ({', '.join(point['reasons'])})"
+                     if point['saturated_at_rps'] is not None else "saturation non atteinte")
+        print(f"   concurrence {point['concurrency']:>4} : {healthy}, {saturated}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'mode': args.mode,
+                    'workers': args.workers if args.mode in ('server', 'asgi') else None,
+                    'cache': args.cache,
+                    'shadow': {'release': args.shadow, 'sample_rate': args.shadow_rate,
+                               'stats': shadow} if args.shadow else None,
+                    'mix': mix,
+                    'duration_s': args.duration,
+                    'python': platform.python_version(),
+                    'cpu_count': os.cpu_count(),
+                },
+                'steps': steps,
+                'saturation': saturation,
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
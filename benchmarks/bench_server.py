@@ -0,0 +1,133 @@
+"""
+Benchmark du serveur pré-forké : débit en fonction du nombre de workers
+
+Pour chaque nombre de workers, lance `api/server.py` dans un sous-processus,
+envoie des requêtes /predict depuis un pool de threads clients, puis mesure le
+débit et la mémoire de chaque worker (PSS et mémoire privée, qui montrent la
+part réellement partagée en copy-on-write avec le maître).
+
+Usage (depuis la racine du projet) :
+    python benchmarks/bench_server.py --workers 1 2 4 --requests 2000 --concurrency 16
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+ARTICLE = ("Scientists at Harvard Medical School have published a groundbreaking "
+           "peer-reviewed study on cancer treatment. The research team conducted "
+           "extensive clinical trials over five years with promising results. ")
+
+
+def wait_until_ready(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/health')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Le serveur n'a pas démarré à temps")
+
+
+def memory_of(pid):
+    """PSS et mémoire privée (Mo) d'un processus, depuis /proc/<pid>/smaps_rollup"""
+    usage = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                    usage[key] = int(value.split()[0]) / 1024
+    except OSError:
+        return {}
+    return {
+        'rss_mb': round(usage.get('Rss', 0), 1),
+        'pss_mb': round(usage.get('Pss', 0), 1),
+        'private_mb': round(usage.get('Private_Clean', 0) + usage.get('Private_Dirty', 0), 1),
+    }
+
+
+def children_of(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def run_step(workers, port, requests, concurrency):
+    server = subprocess.Popen(
+        [sys.executable, '-W', 'ignore', os.path.join(BASE_DIR, 'api', 'server.py'),
+         '--workers', str(workers), '--port', str(port), '--max-requests', '0'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(port)
+        headers = {'Content-Type': 'application/json'}
+        
+        # Texte unique par requête : le cache ne fausse pas la mesure
+        def send(i):
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            payload = json.dumps({'text': f'{ARTICLE} ref {i}'})
+            connection.request('POST', '/predict', payload, headers)
+            return connection.getresponse().status
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            statuses = list(pool.map(send, range(requests)))
+        elapsed = time.perf_counter() - start
+        
+        worker_memory = [memory_of(pid) for pid in children_of(server.pid)]
+        return {
+            'workers': workers,
+            'requests': requests,
+            'concurrency': concurrency,
+            'errors': sum(1 for status in statuses if status != 200),
+            'seconds': round(elapsed, 3),
+            'throughput_rps': round(requests / elapsed, 1),
+            'master_memory': memory_of(server.pid),
+            'worker_memory': worker_memory,
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--output', help="Fichier JSON de résultats (optionnel)")
+    args = parser.parse_args(argv)
+    
+    results = []
+    print(f"{'workers':>8} {'req/s':>10} {'erreurs':>8} {'PSS/worker':>11} {'privé/worker':>13}")
+    for workers in args.workers:
+        result = run_step(workers, args.port, args.requests, args.concurrency)
+        results.append(result)
+        memory = result['worker_memory'] or [{}]
+        pss = sum(m.get('pss_mb', 0) for m in memory) / len(memory)
+        private = sum(m.get('private_mb', 0) for m in memory) / len(memory)
+        print(f"{workers:>8} {result['throughput_rps']:>10} {result['errors']:>8} "
+              f"{pss:>9.1f}Mo {private:>11.1f}Mo")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'cpu_count': os.cpu_count(), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Mesure du démarrage à froid de l'API
+
+Lance un processus Python neuf (`python -X importtime`) qui importe l'API puis
+appelle create_app() : chargement des modèles et préchauffage. Affiche :
+    - la durée de chaque phase (import, load, warmup) et le temps jusqu'à
+      « prêt » depuis le lancement du processus (état de /ready) ;
+    - les imports les plus coûteux (durée cumulée, sous-modules compris).
+
+Usage (depuis la racine du projet) :
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --model-format mmap --top 15 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+API_DIR = os.path.join(BASE_DIR, 'api')
+
+# Exécuté dans le processus mesuré : l'état de démarrage est écrit en JSON sur stdout
+CHILD_CODE = (
+    "import json, sys; sys.path.insert(0, {api_dir!r}); "
+    "import app; app.create_app(background=False); "
+    "print(json.dumps(app.startup))"
+)
+
+
+def parse_importtime(lines):
+    """
+    Analyse la sortie de `-X importtime`. Retourne
+    [{'module', 'self_ms', 'cumulative_ms', 'depth'}, ...]
+    """
+    imports = []
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        imports.append({
+            'module': name.strip(),
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+            # Deux espaces d'indentation par niveau d'import imbriqué
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return imports
+
+
+def top_imports(imports, count):
+    """Imports directs (niveau 0) les plus coûteux, durée cumulée décroissante"""
+    top_level = [entry for entry in imports if entry['depth'] == 0]
+    return sorted(top_level, key=lambda entry: entry['cumulative_ms'], reverse=True)[:count]
+
+
+def run_child(model_format):
+    env = dict(os.environ, FCC_MODEL_FORMAT=model_format, FCC_LOG_LEVEL='WARNING')
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-W', 'ignore', '-c', CHILD_CODE.format(api_dir=API_DIR)],
+        capture_output=True, text=True, env=env, cwd=API_DIR
+    )
+    wall_seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise SystemExit(f"❌ Le démarrage a échoué :\n{completed.stderr[-2000:]}")
+    startup = json.loads(completed.stdout.strip().splitlines()[-1])
+    return startup, parse_importtime(completed.stderr.splitlines()), wall_seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model-format', choices=['pickle', 'mmap'], default='pickle')
+    parser.add_argument('--top', type=int, default=10, help="Nombre d'imports affichés")
+    parser.add_argument('--output', help="Fichier JSON de résultats (optionnel)")
+    args = parser.parse_args(argv)
+    
+    startup, imports, wall_seconds = run_child(args.model_format)
+    
+    print(f"🚀 Démarrage ({args.model_format})")
+    for phase in ('import', 'load', 'warmup'):
+        print(f"   {phase:<8} {startup[f'{phase}_seconds'] * 1000:>9.1f} ms")
+    print(f"   {'prêt':<8} {startup['ready_seconds'] * 1000:>9.1f} ms depuis le lancement du processus")
+    print(f"   (processus mesuré, sortie comprise : {wall_seconds * 1000:.0f} ms)")
+    
+    print("\n📦 Imports les plus coûteux (cumulé, ms)")
+    top = top_imports(imports, args.top)
+    for entry in top:
+        print(f"   {entry['cumulative_ms']:>9.1f}  {entry['module']}")
+        
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'model_format': args.model_format, 'startup': startup,
+                       'wall_seconds': round(wall_seconds, 4), 'top_imports': top}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,363 @@
+"""
+Scoring en masse de corpus JSONL/CSV - FCC Fake News Detector
+
+Lit un fichier (ou stdin) par blocs de taille fixe, score chaque bloc en lot
+avec le même chargement de modèles que l'API (api/loader.py), répartit les
+blocs sur un pool de processus et écrit les résultats en flux, dans l'ordre
+d'entrée. La mémoire reste constante : seuls quelques blocs sont en vol.
+
+Un fichier de reprise (<sortie>.checkpoint) est mis à jour après chaque bloc
+écrit ; `--resume` repart du dernier bloc terminé après un arrêt brutal.
+
+Exemples :
+    python bulk_score.py articles.jsonl -o scores.jsonl --workers 4
+    cat articles.csv | python bulk_score.py - --format csv --text-field content > scores.jsonl
+    python bulk_score.py articles.jsonl -o scores.jsonl --resume
+"""
+
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+
+from config import Config
+from inference import Cascade, LongTextPolicy
+from loader import load_release
+
+# Scoreur du processus courant et second étage de la cascade éventuel
+# (hérités du parent par fork, ou chargés par l'initialiseur du pool)
+_scorer = None
+_second_stage = None
+
+# Même traitement des textes longs que l'API
+_long_text_policy = LongTextPolicy(
+    mode=Config.LONG_TEXT_MODE,
+    threshold_chars=Config.LONG_TEXT_CHARS,
+    token_budget=Config.TOKEN_BUDGET,
+    chunk_tokens=Config.CHUNK_TOKENS
+)
+
+# Même cascade que l'API (si la version contient un second modèle)
+_cascade = Cascade(low=Config.CASCADE_LOW, high=Config.CASCADE_HIGH, max_chars=Config.LONG_TEXT_CHARS)
+
+OUTPUT_FIELDS = ['row', 'id', 'prediction', 'prediction_code',
+                 'probability_fake', 'probability_reliable', 'long_text', 'error']
+
+
+def log(message=''):
+    """Messages de progression sur stderr (stdout peut porter les résultats)"""
+    print(message, file=sys.stderr, flush=True)
+
+
+def load_scorer(model_format):
+    """Charge le scoreur avec le chemin de chargement de l'API"""
+    global _scorer, _second_stage
+    if _scorer is None:
+        bundle = load_release(Config.MODEL_DIR, model_format=model_format, log=lambda message: None,
+                              precision=Config.MODEL_PRECISION, second_stage=Config.CASCADE_ENABLED)
+        _scorer, _second_stage = bundle.scorer, bundle.second_stage
+    return _scorer
+
+
+# ============================================================
+# LECTURE EN FLUX
+# ============================================================
+
+def open_input(path):
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def detect_format(path, explicit):
+    if explicit:
+        return explicit
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def iter_records(stream, fmt, text_field, id_field):
+    """
+    Produit (texte, identifiant, erreur) pour chaque ligne, sans tout charger
+    """
+    if fmt == 'csv':
+        csv.field_size_limit(sys.maxsize)
+        for record in csv.DictReader(stream):
+            text = record.get(text_field)
+            if text is None:
+                yield None, record.get(id_field), f'Colonne "{text_field}" absente'
+            else:
+                yield text, record.get(id_field), None
+        return
+        
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield None, None, f'JSON invalide: {e}'
+            continue
+        if not isinstance(record, dict):
+            yield None, None, 'Ligne JSON non objet'
+            continue
+        text = record.get(text_field)
+        if not isinstance(text, str):
+            yield None, record.get(id_field), f'Champ "{text_field}" absent ou non textuel'
+        else:
+            yield text, record.get(id_field), None
+
+
+def iter_chunks(records, chunk_size):
+    """Regroupe les lignes en blocs de taille fixe : (numéro de bloc, première ligne, lignes)"""
+    chunk = []
+    index = 0
+    first_row = 0
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield index, first_row, chunk
+            index += 1
+            first_row += len(chunk)
+            chunk = []
+    if chunk:
+        yield index, first_row, chunk
+
+
+# ============================================================
+# SCORING
+# ============================================================
+
+def predict(scorer, second_stage, text):
+    """(classe, probabilités, détails) : premier étage, puis cascade si le texte est incertain"""
+    prediction, probabilities, details = _long_text_policy.predict(scorer, text)
+    prediction, probabilities, _ = _cascade.route(second_stage, text, prediction, probabilities)
+    return prediction, probabilities, details
+
+
+def score_chunk(first_row, chunk, scorer=None, second_stage=None):
+    """
+    Score un bloc (dans un worker, avec le scoreur du processus, ou avec
+    `scorer` et `second_stage`) et retourne les lignes de sortie
+    """
+    if scorer is None:
+        scorer, second_stage = _scorer, _second_stage
+    valid = [i for i, (text, _, error) in enumerate(chunk) if error is None and text.strip()]
+    scored = {i: predict(scorer, second_stage, chunk[i][0]) for i in valid}
+    
+    rows = []
+    for i, (text, item_id, error) in enumerate(chunk):
+        row = {'row': first_row + i, 'id': item_id}
+        if i in scored:
+            prediction, probabilities, details = scored[i]
+            row.update({
+                'prediction': Config.LABELS.get(int(prediction), 'Fake News'),
+                'prediction_code': int(prediction),
+                'probability_fake': round(float(probabilities[0]), 6),
+                'probability_reliable': round(float(probabilities[1]), 6),
+            })
+            if details is not None:
+                row['long_text'] = details
+        else:
+            row['error'] = error or 'Le texte ne peut pas être vide'
+        rows.append(row)
+    return rows
+
+
+def iter_scored_chunks(stream, fmt, text_field='text', id_field='id', chunk_size=1000, scorer=None,
+                       second_stage=None):
+    """
+    Score un flux bloc par bloc dans le processus courant (sans pool ni
+    reprise) : produit les lignes de sortie de chaque bloc, dans l'ordre
+    d'entrée. Utilisé par l'onglet « Fichier » de l'application Streamlit.
+    """
+    records = iter_records(stream, fmt, text_field, id_field)
+    for _, first_row, chunk in iter_chunks(records, chunk_size):
+        yield score_chunk(first_row, chunk, scorer, second_stage)
+
+
+def format_rows(rows, fmt):
+    """Lignes de résultats sérialisées en JSONL ou CSV (avec en-tête)"""
+    output = io.StringIO(newline='')
+    OutputWriter(output, fmt, write_header=True).write(rows)
+    return output.getvalue()
+
+
+class OutputWriter:
+    """Écrit les lignes de résultats en JSONL ou CSV"""
+    
+    def __init__(self, stream, fmt, write_header):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == 'csv':
+            self.writer = csv.DictWriter(stream, fieldnames=OUTPUT_FIELDS, extrasaction='ignore')
+            if write_header:
+                self.writer.writeheader()
+                
+    def write(self, rows):
+        if self.fmt == 'csv':
+            self.writer.writerows(
+                dict(row, long_text=json.dumps(row['long_text'])) if 'long_text' in row else row
+                for row in rows
+            )
+        else:
+            self.stream.write(''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows))
+
+
+# ============================================================
+# REPRISE
+# ============================================================
+
+def read_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(path, state):
+    """Écriture atomique du point de reprise"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# ============================================================
+# PROGRAMME PRINCIPAL
+# ============================================================
+
+def run(args):
+    input_format = detect_format(args.input, args.format)
+    output_format = args.output_format or ('csv' if (args.output or '').lower().endswith('.csv') else 'jsonl')
+    checkpoint_path = args.output + '.checkpoint' if args.output else None
+    
+    # Reprise : sauter les blocs déjà écrits, tronquer une éventuelle écriture partielle
+    skip_chunks = 0
+    rows_done = 0
+    output_bytes = 0
+    if args.resume:
+        if not args.output or args.input == '-':
+            raise SystemExit("--resume nécessite un fichier d'entrée et un fichier de sortie (-o)")
+        state = read_checkpoint(checkpoint_path)
+        if state is not None:
+            if state['chunk_size'] != args.chunk_size or state['input'] != os.path.abspath(args.input):
+                raise SystemExit("Le point de reprise ne correspond pas à cette entrée ou à --chunk-size")
+            skip_chunks = state['chunks_done']
+            rows_done = state['rows_done']
+            output_bytes = state['output_bytes']
+            log(f"♻️  Reprise après {skip_chunks} blocs ({rows_done} lignes)")
+            
+    load_scorer(args.model_format)
+    
+    if args.output:
+        mode = 'r+' if output_bytes else 'w'
+        output = open(args.output, mode, encoding='utf-8', newline='')
+        output.seek(output_bytes)
+        output.truncate()
+    else:
+        output = sys.stdout
+    writer = OutputWriter(output, output_format, write_header=output_bytes == 0)
+    
+    pool = None
+    if args.workers > 1:
+        # fork : les workers héritent du scoreur déjà chargé (copy-on-write)
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        pool = context.Pool(args.workers, initializer=load_scorer, initargs=(args.model_format,))
+        
+    start = time.monotonic()
+    last_report = start
+    rows_scored = 0
+    pending = deque()
+    max_in_flight = max(2, args.workers * 2)
+    
+    def flush_one():
+        nonlocal rows_done, rows_scored, output_bytes, last_report
+        index, result = pending.popleft()
+        rows = result.get() if pool is not None else result
+        writer.write(rows)
+        rows_done += len(rows)
+        rows_scored += len(rows)
+        
+        if checkpoint_path:
+            output.flush()
+            os.fsync(output.fileno())
+            output_bytes = output.tell()
+            write_checkpoint(checkpoint_path, {
+                'input': os.path.abspath(args.input),
+                'chunk_size': args.chunk_size,
+                'chunks_done': index + 1,
+                'rows_done': rows_done,
+                'output_bytes': output_bytes,
+            })
+            
+        now = time.monotonic()
+        if now - last_report >= args.progress_interval:
+            last_report = now
+            rate = rows_scored / (now - start)
+            log(f"⏳ {rows_done} lignes traitées ({rate:,.0f} lignes/s)")
+            
+    try:
+        with open_input(args.input) as stream:
+            records = iter_records(stream, input_format, args.text_field, args.id_field)
+            for index, first_row, chunk in iter_chunks(records, args.chunk_size):
+                if index < skip_chunks:
+                    continue
+                if pool is not None:
+                    pending.append((index, pool.apply_async(score_chunk, (first_row, chunk))))
+                else:
+                    pending.append((index, score_chunk(first_row, chunk)))
+                # Mémoire bornée : attendre le bloc le plus ancien (ordre préservé)
+                while len(pending) >= max_in_flight:
+                    flush_one()
+            while pending:
+                flush_one()
+    finally:
+        if pool is not None:
+            pool.terminate()
+        if output is not sys.stdout:
+            output.close()
+        else:
+            output.flush()
+            
+    elapsed = time.monotonic() - start
+    rate = rows_scored / elapsed if elapsed > 0 else 0.0
+    log(f"✅ Terminé : {rows_done} lignes ({rows_scored} dans cette exécution) "
+        f"en {elapsed:.1f} s, {rate:,.0f} lignes/s")
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return rows_done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scoring en masse de corpus JSONL/CSV")
+    parser.add_argument('input', help="Fichier d'entrée (.jsonl ou .csv), ou - pour stdin")
+    parser.add_argument('-o', '--output', help="Fichier de sortie (stdout par défaut)")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help="Format d'entrée (auto par défaut)")
+    parser.add_argument('--output-format', choices=['jsonl', 'csv'], help="Format de sortie (auto par défaut)")
+    parser.add_argument('--text-field', default='text')
+    parser.add_argument('--id-field', default='id')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=Config.WORKERS)
+    parser.add_argument('--model-format', choices=['pickle', 'mmap'], default=Config.MODEL_FORMAT)
+    parser.add_argument('--progress-interval', type=float, default=5.0, help="Secondes entre deux rapports")
+    parser.add_argument('--resume', action='store_true', help="Reprendre après le dernier bloc terminé")
+    args = parser.parse_args(argv)
+    
+    if args.chunk_size < 1 or args.workers < 1:
+        parser.error("--chunk-size et --workers doivent être >= 1")
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
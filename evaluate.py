@@ -0,0 +1,348 @@
+"""
+Évaluation hors-ligne du modèle sur un corpus étiqueté - FCC Fake News Detector
+
+Lit un fichier JSONL/CSV étiqueté (ou stdin) par blocs, score chaque bloc avec
+le même chargement de modèles et le même traitement des textes que l'API
+(via bulk_score.py : textes longs, cascade), répartit les blocs sur un pool
+de processus et cumule les métriques au fil de l'eau : seuls des compteurs
+sont gardés, jamais le corpus ni les scores.
+
+Le rapport JSON (models/evaluation.json par défaut, FCC_EVALUATION_REPORT)
+contient la matrice de confusion, les métriques par classe et leurs moyennes,
+la courbe ROC et son AUC, la courbe de calibration, la log-loss, le score de
+Brier, le débit, ainsi que la version du modèle évalué. L'application
+Streamlit et le README affichent les métriques de ce rapport.
+
+Étiquettes acceptées : 0 / 1, "fake" / "reliable" (ou "real", "true",
+"false") et les libellés de l'API ("Fake News", "Reliable News").
+
+Exemples :
+    python evaluate.py data/test.jsonl --workers 4
+    python evaluate.py data/test.csv --text-field content --label-field label -o report.json
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+
+from config import Config
+from loader import load_release
+
+# Lecture en flux, scoreur du processus et prédiction partagés avec le scoring en masse
+import bulk_score
+
+# Résolution de l'histogramme des probabilités (courbe ROC) et de la calibration
+ROC_BINS = 1000
+CALIBRATION_BINS = 10
+
+# Points de la courbe ROC écrits dans le rapport (l'AUC utilise tous les bacs)
+ROC_POINTS = 100
+
+# Erreurs de lecture gardées en exemple dans le rapport
+MAX_ERROR_EXAMPLES = 5
+
+LABEL_ALIASES = {
+    '0': 0, 'fake': 0, 'fake news': 0, 'false': 0,
+    '1': 1, 'reliable': 1, 'reliable news': 1, 'real': 1, 'true': 1,
+}
+
+
+def log(message=''):
+    print(message, file=sys.stderr, flush=True)
+
+
+def parse_label(value):
+    """Étiquette -> 0 (Fake News) ou 1 (Reliable News), None si elle n'est pas reconnue"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int) and value in (0, 1):
+        return value
+    if isinstance(value, str):
+        return LABEL_ALIASES.get(value.strip().lower())
+    return None
+
+
+class Evaluation:
+    """
+    Métriques cumulées sur un flux de prédictions. Seuls des compteurs sont
+    gardés : matrice de confusion, histogramme de la probabilité « Reliable
+    News » par classe réelle (courbe ROC), bacs de calibration, sommes de la
+    log-loss et du score de Brier. Deux évaluations se fusionnent (merge) :
+    chaque bloc est évalué dans un worker puis ajouté au total.
+    """
+    
+    def __init__(self, roc_bins=ROC_BINS, calibration_bins=CALIBRATION_BINS):
+        self.roc_bins = roc_bins
+        self.calibration_bins = calibration_bins
+        self.confusion = [[0, 0], [0, 0]]  # [classe réelle][classe prédite]
+        self.histogram = [[0] * roc_bins, [0] * roc_bins]
+        self.calibration = [[0, 0.0, 0] for _ in range(calibration_bins)]  # textes, somme de p, positifs
+        self.log_loss_sum = 0.0
+        self.brier_sum = 0.0
+        self.errors = 0
+        self.error_examples = []
+        
+    @property
+    def count(self):
+        return sum(map(sum, self.confusion))
+        
+    def add(self, label, prediction, reliable):
+        """Ajoute une prédiction : classe réelle, classe prédite, probabilité « Reliable News »"""
+        self.confusion[label][int(prediction)] += 1
+        self.histogram[label][min(int(reliable * self.roc_bins), self.roc_bins - 1)] += 1
+        bucket = self.calibration[min(int(reliable * self.calibration_bins), self.calibration_bins - 1)]
+        bucket[0] += 1
+        bucket[1] += reliable
+        bucket[2] += label
+        probability = min(max(reliable if label else 1.0 - reliable, sys.float_info.epsilon), 1.0)
+        self.log_loss_sum -= math.log(probability)
+        self.brier_sum += (reliable - label) ** 2
+        
+    def add_error(self, row, message):
+        self.errors += 1
+        if len(self.error_examples) < MAX_ERROR_EXAMPLES:
+            self.error_examples.append({'row': row, 'error': message})
+            
+    def merge(self, other):
+        for label in (0, 1):
+            for prediction in (0, 1):
+                self.confusion[label][prediction] += other.confusion[label][prediction]
+            self.histogram[label] = [a + b for a, b in zip(self.histogram[label], other.histogram[label])]
+        for bucket, added in zip(self.calibration, other.calibration):
+            for i in range(3):
+                bucket[i] += added[i]
+        self.log_loss_sum += other.log_loss_sum
+        self.brier_sum += other.brier_sum
+        self.errors += other.errors
+        self.error_examples = (self.error_examples + other.error_examples)[:MAX_ERROR_EXAMPLES]
+        return self
+        
+    def per_class(self):
+        """{label: {precision, recall, f1, support}} pour chaque classe"""
+        classes = {}
+        for code, name in sorted(Config.LABELS.items()):
+            true_positives = self.confusion[code][code]
+            predicted = self.confusion[0][code] + self.confusion[1][code]
+            support = sum(self.confusion[code])
+            precision = true_positives / predicted if predicted else 0.0
+            recall = true_positives / support if support else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            classes[name] = {'precision': precision, 'recall': recall, 'f1': f1, 'support': support}
+        return classes
+        
+    def roc(self):
+        """(points [{threshold, fpr, tpr}], AUC) en balayant l'histogramme du seuil le plus haut au plus bas"""
+        positives, negatives = sum(self.histogram[1]), sum(self.histogram[0])
+        if not positives or not negatives:
+            return [], None
+        step = max(1, self.roc_bins // ROC_POINTS)
+        points = [{'threshold': 1.0, 'fpr': 0.0, 'tpr': 0.0}]
+        true_positives = false_positives = 0
+        auc = 0.0
+        for bin_index in range(self.roc_bins - 1, -1, -1):
+            added_tp, added_fp = self.histogram[1][bin_index], self.histogram[0][bin_index]
+            # Trapèze : les textes d'un même bac sont traités comme ex aequo
+            auc += added_fp * (true_positives + added_tp / 2)
+            true_positives += added_tp
+            false_positives += added_fp
+            if bin_index % step == 0:
+                points.append({'threshold': bin_index / self.roc_bins,
+                               'fpr': round(false_positives / negatives, 6),
+                               'tpr': round(true_positives / positives, 6)})
+        return points, auc / (positives * negatives)
+        
+    def calibration_curve(self):
+        """Bacs de probabilité non vides : probabilité moyenne prédite et fréquence observée"""
+        width = 1.0 / self.calibration_bins
+        return [{
+            'bin': [round(i * width, 4), round((i + 1) * width, 4)],
+            'count': count,
+            'mean_predicted': total / count,
+            'observed': positives / count,
+        } for i, (count, total, positives) in enumerate(self.calibration) if count]
+        
+    def report(self):
+        count = self.count
+        classes = self.per_class()
+        supports = [metrics['support'] for metrics in classes.values()]
+        
+        def average(name, weights):
+            total = sum(weights)
+            if not total:
+                return 0.0
+            return sum(metrics[name] * weight for metrics, weight in zip(classes.values(), weights)) / total
+            
+        roc_points, auc = self.roc()
+        calibration = self.calibration_curve()
+        return {
+            'count': count,
+            'errors': self.errors,
+            'error_examples': self.error_examples,
+            'accuracy': (self.confusion[0][0] + self.confusion[1][1]) / count if count else 0.0,
+            'classes': classes,
+            'macro_avg': {name: average(name, [1, 1]) for name in ('precision', 'recall', 'f1')},
+            'weighted_avg': {name: average(name, supports) for name in ('precision', 'recall', 'f1')},
+            'confusion_matrix': {
+                'labels': [Config.LABELS[0], Config.LABELS[1]],
+                # Lignes : classe réelle ; colonnes : classe prédite
+                'matrix': [list(row) for row in self.confusion],
+            },
+            'roc_auc': auc,
+            'roc_curve': roc_points,
+            'log_loss': self.log_loss_sum / count if count else None,
+            'brier_score': self.brier_sum / count if count else None,
+            # Écart moyen (pondéré par bac) entre probabilité prédite et fréquence observée
+            'expected_calibration_error': (sum(b['count'] * abs(b['mean_predicted'] - b['observed'])
+                                               for b in calibration) / count if count else None),
+            'calibration': calibration,
+        }
+
+
+# ============================================================
+# ÉVALUATION PAR BLOCS
+# ============================================================
+
+def evaluate_chunk(first_row, chunk, scorer=None, second_stage=None):
+    """
+    Évalue un bloc de lignes (texte, étiquette, erreur) dans un worker, avec
+    le scoreur du processus (ou `scorer` et `second_stage`). Retourne une
+    Evaluation partielle.
+    """
+    if scorer is None:
+        scorer, second_stage = bulk_score._scorer, bulk_score._second_stage
+    evaluation = Evaluation()
+    for row, (text, raw_label, error) in enumerate(chunk, first_row):
+        label = parse_label(raw_label)
+        if error is None and not text.strip():
+            error = 'Le texte ne peut pas être vide'
+        if error is None and label is None:
+            error = f'Étiquette non reconnue: {raw_label!r}'
+        if error is not None:
+            evaluation.add_error(row, error)
+            continue
+        prediction, probabilities, _ = bulk_score.predict(scorer, second_stage, text)
+        evaluation.add(label, prediction, float(probabilities[1]))
+    return evaluation
+
+
+def run(args):
+    input_format = bulk_score.detect_format(args.input, args.format)
+    bundle = load_release(Config.MODEL_DIR, model_format=args.model_format, log=lambda message: None,
+                          precision=Config.MODEL_PRECISION, second_stage=Config.CASCADE_ENABLED)
+    # Hérité par les workers (fork) : pas de rechargement par processus
+    bulk_score._scorer, bulk_score._second_stage = bundle.scorer, bundle.second_stage
+    
+    pool = None
+    if args.workers > 1:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        pool = context.Pool(args.workers, initializer=bulk_score.load_scorer, initargs=(args.model_format,))
+        
+    total = Evaluation()
+    pending = deque()
+    max_in_flight = max(2, args.workers * 2)
+    start = time.monotonic()
+    last_report = start
+    
+    def merge_one():
+        nonlocal last_report
+        result = pending.popleft()
+        total.merge(result.get() if pool is not None else result)
+        now = time.monotonic()
+        if now - last_report >= args.progress_interval:
+            last_report = now
+            log(f"⏳ {total.count + total.errors} lignes évaluées "
+                f"({(total.count + total.errors) / (now - start):,.0f} lignes/s)")
+                
+    try:
+        with bulk_score.open_input(args.input) as stream:
+            # Le champ de l'identifiant de bulk_score porte ici l'étiquette
+            records = bulk_score.iter_records(stream, input_format, args.text_field, args.label_field)
+            for _, first_row, chunk in bulk_score.iter_chunks(records, args.chunk_size):
+                if pool is not None:
+                    pending.append(pool.apply_async(evaluate_chunk, (first_row, chunk)))
+                else:
+                    pending.append(evaluate_chunk(first_row, chunk))
+                # Mémoire bornée : quelques blocs en vol au plus
+                while len(pending) >= max_in_flight:
+                    merge_one()
+            while pending:
+                merge_one()
+    finally:
+        if pool is not None:
+            pool.terminate()
+            
+    elapsed = time.monotonic() - start
+    report = total.report()
+    report['throughput'] = {
+        'seconds': round(elapsed, 3),
+        'rows_per_s': round((total.count + total.errors) / elapsed, 1) if elapsed > 0 else None,
+        'workers': args.workers,
+        'chunk_size': args.chunk_size,
+    }
+    report['meta'] = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'dataset': os.path.abspath(args.input) if args.input != '-' else '-',
+        'format': input_format,
+        'model_version': bundle.version,
+        'model_release': bundle.release,
+        'model_format': bundle.format,
+        'second_stage': bundle.second_stage is not None,
+        'long_text_mode': Config.LONG_TEXT_MODE,
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+    }
+    
+    output = args.output or Config.EVALUATION_REPORT
+    tmp_path = output + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, output)
+    print_summary(report)
+    log(f"💾 Rapport écrit: {output}")
+    return report
+
+
+def print_summary(report):
+    log(f"✅ {report['count']:,} textes évalués ({report['errors']:,} lignes en erreur) "
+        f"en {report['throughput']['seconds']:.1f} s, {report['throughput']['rows_per_s'] or 0:,.0f} lignes/s")
+    log(f"   Accuracy {report['accuracy']:.2%}   AUC "
+        + (f"{report['roc_auc']:.4f}" if report['roc_auc'] is not None else 'n/a')
+        + (f"   log-loss {report['log_loss']:.4f}" if report['log_loss'] is not None else ''))
+    log(f"   {'classe':<17} {'precision':>10} {'recall':>10} {'f1':>10} {'support':>10}")
+    rows = list(report['classes'].items()) + [('moyenne pondérée', dict(report['weighted_avg'], support=report['count']))]
+    for name, metrics in rows:
+        log(f"   {name:<17} {metrics['precision']:>10.2%} {metrics['recall']:>10.2%} "
+            f"{metrics['f1']:>10.2%} {metrics['support']:>10,}")
+    matrix = report['confusion_matrix']['matrix']
+    log(f"   Confusion (réel x prédit) : fake {matrix[0]}  reliable {matrix[1]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Évaluation du modèle sur un corpus étiqueté JSONL/CSV")
+    parser.add_argument('input', help="Fichier d'entrée (.jsonl ou .csv), ou - pour stdin")
+    parser.add_argument('-o', '--output', help=f"Rapport JSON ({Config.EVALUATION_REPORT} par défaut)")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help="Format d'entrée (auto par défaut)")
+    parser.add_argument('--text-field', default='text')
+    parser.add_argument('--label-field', default='label')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=Config.WORKERS)
+    parser.add_argument('--model-format', choices=['pickle', 'mmap'], default=Config.MODEL_FORMAT)
+    parser.add_argument('--progress-interval', type=float, default=5.0, help="Secondes entre deux rapports")
+    args = parser.parse_args(argv)
+    
+    if args.chunk_size < 1 or args.workers < 1:
+        parser.error("--chunk-size et --workers doivent être >= 1")
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,11 @@
    CONFIGURATION
    ============================================================ */
 
-const API_URL = 'http://localhost:5000/predict';
+const API_BASE = 'http://localhost:5000';
+
+// Session d'édition ouverte sur l'API : { id, revision, text }. Les analyses
+// suivantes n'envoient que le passage modifié depuis la précédente.
+let draftSession = null;
 
 // Exemples prédéfinis
 const examples = [
@@ -41,6 +45,87 @@ function useExample(index) {
 function clearText() {
     document.getElementById('articleText').value = '';
     document.getElementById('results').style.display = 'none';
+    closeSession();
+}
+
+/**
+ * Plus petite modification { start, end, text } transformant oldText en
+ * newText, ou null s'ils sont égaux. Les positions sont comptées en
+ * caractères Unicode (comme en Python), pas en unités UTF-16.
+ */
+function diffSpan(oldText, newText) {
+    if (oldText === newText) {
+        return null;
+    }
+    const before = Array.from(oldText);
+    const after = Array.from(newText);
+    const limit = Math.min(before.length, after.length);
+    let prefix = 0;
+    while (prefix < limit && before[prefix] === after[prefix]) {
+        prefix++;
+    }
+    let suffix = 0;
+    while (suffix < limit - prefix
+           && before[before.length - 1 - suffix] === after[after.length - 1 - suffix]) {
+        suffix++;
+    }
+    return {
+        start: prefix,
+        end: before.length - suffix,
+        text: after.slice(prefix, after.length - suffix).join('')
+    };
+}
+
+/**
+ * Scorer le brouillon : modification envoyée à la session ouverte, ou
+ * nouvelle session avec le texte complet (première analyse, session
+ * expirée ou ouverte sur un autre worker)
+ */
+async function scoreDraft(text) {
+    if (draftSession) {
+        const edit = diffSpan(draftSession.text, text);
+        const response = await fetch(`${API_BASE}/sessions/${draftSession.id}`, {
+            method: 'PATCH',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ revision: draftSession.revision, edits: edit ? [edit] : [] })
+        });
+        if (response.ok) {
+            const data = await response.json();
+            draftSession.revision = data.session.revision;
+            draftSession.text = text;
+            return data;
+        }
+        if (response.status !== 404 && response.status !== 409) {
+            throw new Error(`Erreur HTTP: ${response.status}`);
+        }
+        draftSession = null;
+    }
+    
+    const response = await fetch(`${API_BASE}/sessions`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ text: text })
+    });
+    if (!response.ok) {
+        throw new Error(`Erreur HTTP: ${response.status}`);
+    }
+    const data = await response.json();
+    draftSession = { id: data.session.id, revision: data.session.revision, text: text };
+    return data;
+}
+
+/**
+ * Fermer la session d'édition (libère le brouillon côté serveur)
+ */
+function closeSession() {
+    if (draftSession) {
+        fetch(`${API_BASE}/sessions/${draftSession.id}`, { method: 'DELETE' }).catch(() => {});
+        draftSession = null;
+    }
 }
 
 /**
@@ -78,20 +163,8 @@ async function analyzeArticle() {
     results.style.display = 'none';
     
     try {
-        // Appel à l'API
-        const response = await fetch(API_URL, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ text: text })
-        });
-        
-        if (!response.ok) {
-            throw new Error(`Erreur HTTP: ${response.status}`);
-        }
-        
-        const data = await response.json();
+        // Appel à l'API (session d'édition : seul le passage modifié est envoyé)
+        const data = await scoreDraft(text);
         
         // Afficher les résultats
         displayResults(data);
@@ -220,7 +293,7 @@ document.getElementById('articleText').addEventListener('keydown', function(e) {
 // Vérifier que l'API est accessible au chargement
 window.addEventListener('load', async function() {
     try {
-        const response = await fetch('http://localhost:5000/health');
+        const response = await fetch(`${API_BASE}/health`);
         if (response.ok) {
             console.log('✅ API connectée');
         }
@@ -258,16 +331,3 @@ style.textContent = `
     }
 `;
 document.head.appendChild(style);
-```
-
-**Sauvegardez (Ctrl+S)**
-
----
-
-## 🎬 TESTER L'INTERFACE
-
-### **Étape 1 : Assurez-vous que l'API tourne**
-
-**Dans le terminal de l'API, vérifiez que vous voyez :**
-```
-* Running on http://127.0.0.1:5000
\ No newline at end of file
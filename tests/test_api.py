@@ -1 +1,340 @@
-# Tests API - À créer plus tard
+"""
+Tests de l'API FCC Fake News Detector (client de test Flask, sans serveur)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+import app as api_app
+
+
+@pytest.fixture(scope='module')
+def client():
+    """Client de test Flask avec les modèles chargés une seule fois"""
+    if api_app.model is None or api_app.vectorizer is None:
+        api_app.load_models()
+    return api_app.app.test_client()
+
+
+def test_health(client):
+    response = client.get('/health')
+    assert response.status_code == 200
+    assert response.get_json()['model_loaded'] is True
+
+
+def test_predict(client):
+    response = client.post('/predict', json={
+        'text': 'SHOCKING: Aliens landed in New York City yesterday!!!'
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['prediction'] in ('Fake News', 'Reliable News')
+    assert abs(data['probabilities']['fake'] + data['probabilities']['reliable'] - 100) < 0.05
+
+
+def test_predict_batch_matches_single(client):
+    texts = [
+        'SHOCKING: Aliens landed in New York City yesterday!!!',
+        'President announces new economic policy at White House press conference',
+    ]
+    response = client.post('/predict/batch', json={
+        'items': [{'id': f'article-{i}', 'text': text} for i, text in enumerate(texts)]
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['succeeded'] == 2 and data['failed'] == 0
+    
+    for i, (text, result) in enumerate(zip(texts, data['results'])):
+        single = client.post('/predict', json={'text': text}).get_json()
+        assert result['id'] == f'article-{i}'
+        assert result['prediction'] == single['prediction']
+        assert result['probabilities'] == single['probabilities']
+
+
+def test_predict_batch_scores_missing_texts_together(client, monkeypatch):
+    from cache import PredictionCache
+    
+    calls = []
+    scorer = api_app.bundle.scorer
+    
+    class CountingScorer:
+        def predict_batch(self, texts):
+            calls.append(len(texts))
+            return scorer.predict_batch(texts)
+            
+    monkeypatch.setattr(api_app, 'bundle', api_app.bundle._replace(scorer=CountingScorer()))
+    monkeypatch.setattr(api_app, 'prediction_cache', PredictionCache(max_size=100))
+    texts = ['Budget vote delayed again', 'Miracle cure hidden by doctors', 'Budget vote delayed again']
+    results = client.post('/predict/batch', json={'texts': texts}).get_json()['results']
+    
+    # Un seul appel pour les deux textes distincts ; le texte répété reprend le premier
+    assert calls == [2]
+    assert results[2]['probabilities'] == results[0]['probabilities']
+    assert [result['prediction_code'] for result in results[:2]] == [
+        int(prediction) for prediction, _ in scorer.predict_batch(texts[:2])]
+    
+    # N articles nouveaux et indexables (quasi-doublons cherchés) : exactement un appel
+    from dedup import NearDuplicateIndex
+    monkeypatch.setattr(api_app, 'near_duplicates', NearDuplicateIndex())
+    calls.clear()
+    articles = [' '.join(f'topic{n} paragraph {i} covers item{n * 1000 + i}.' for i in range(40)) for n in range(8)]
+    results = client.post('/predict/batch', json={'texts': articles}).get_json()['results']
+    assert calls == [len(articles)]
+    assert not any('near_duplicate' in result for result in results)
+
+
+def test_predict_batch_reports_item_errors(client):
+    response = client.post('/predict/batch', json={
+        'texts': ['Scientists publish peer-reviewed study', '   ', 42]
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['succeeded'] == 1 and data['failed'] == 2
+    assert 'prediction' in data['results'][0]
+    assert [r['index'] for r in data['results']] == [0, 1, 2]
+    assert 'error' in data['results'][1] and 'error' in data['results'][2]
+
+
+def test_predict_batch_size_limit(client, monkeypatch):
+    monkeypatch.setattr(api_app.Config, 'MAX_BATCH_SIZE', 2)
+    response = client.post('/predict/batch', json={'texts': ['a', 'b', 'c']})
+    assert response.status_code == 413
+
+
+def test_repeated_predict_hits_cache(client):
+    text = 'Wire service story re-submitted many times a day'
+    before = client.get('/health').get_json()['cache']['hits']
+    first = client.post('/predict', json={'text': text}).get_json()
+    second = client.post('/predict', json={'text': '  ' + text.upper()}).get_json()
+    after = client.get('/health').get_json()
+    assert after['cache']['hits'] == before + 1
+    assert first['probabilities'] == second['probabilities']
+    assert after['model_version']
+
+
+def test_input_size_limits(client, monkeypatch):
+    monkeypatch.setattr(api_app.Config, 'MAX_TEXT_CHARS', 20)
+    response = client.post('/predict', json={'text': 'x' * 21})
+    assert response.status_code == 413
+    batch = client.post('/predict/batch', json={'texts': ['short text', 'y' * 21]}).get_json()
+    assert 'error' not in batch['results'][0] and 'error' in batch['results'][1]
+    
+    monkeypatch.setitem(api_app.app.config, 'MAX_CONTENT_LENGTH', 100)
+    response = client.post('/predict', json={'text': 'z' * 200})
+    assert response.status_code == 413
+    assert 'error' in response.get_json()
+
+
+def test_long_text_reports_truncation(client, monkeypatch):
+    monkeypatch.setattr(api_app, 'long_text_policy', api_app.LongTextPolicy('truncate', 1000, 50))
+    data = client.post('/predict', json={'text': 'government report on the election ' * 100}).get_json()
+    assert data['long_text'] == {'mode': 'truncate', 'truncated': True, 'chunks': 1, 'tokens_scored': 50}
+    assert 'long_text' not in client.post('/predict', json={'text': 'short article'}).get_json()
+
+
+def test_ready_after_startup_and_warmup(client):
+    requests_before = api_app.requests_total.value('predict', '200')
+    api_app.create_app(background=False)
+    response = client.get('/ready')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['ready'] is True and data['state'] == 'ready'
+    assert data['ready_seconds'] > 0 and data['warmup_seconds'] > 0
+    # Les requêtes de préchauffage ne sont pas comptées
+    assert api_app.requests_total.value('predict', '200') == requests_before
+
+
+def test_predict_while_loading_is_unavailable(client, monkeypatch):
+    monkeypatch.setattr(api_app, 'bundle', None)
+    monkeypatch.setitem(api_app.startup, 'state', 'loading')
+    assert client.get('/ready').status_code == 503
+    assert client.get('/health').status_code == 200
+    assert client.post('/predict', json={'text': 'some article'}).status_code == 503
+
+
+def test_predict_explain_returns_top_terms(client):
+    text = 'SHOCKING: government hiding the truth, Reuters reported on Tuesday'
+    plain = client.post('/predict', json={'text': text}).get_json()
+    data = client.post('/predict', json={'text': text, 'explain': 3}).get_json()
+    explanation = data['explanation']
+    
+    assert data['probabilities'] == plain['probabilities']
+    assert explanation['top_k'] == 3
+    assert 0 < len(explanation['toward_reliable']) <= 3
+    assert all(entry['weight'] < 0 for entry in explanation['toward_fake'])
+    assert 'explanation' not in plain
+    assert client.post('/predict', json={'text': text, 'explain': 0}).status_code == 400
+
+
+def test_near_duplicate_reuses_verdict(client):
+    article = ' '.join(f'Council budget report paragraph {i} covers roads schools and taxes.' for i in range(30))
+    response = client.post('/predict/batch', json={'items': [
+        {'id': 'wire-1', 'text': article},
+        {'id': 'wire-2', 'text': 'By Jane Doe. ' + article + ' Copyright Wire Service.'},
+    ]})
+    first, copy = response.get_json()['results']
+    assert 'near_duplicate' not in first
+    assert copy['near_duplicate']['id'] == 'wire-1'
+    assert copy['probabilities'] == first['probabilities']
+    assert client.get('/health').get_json()['near_duplicates']['hits'] >= 1
+
+
+def test_predictions_are_stored_and_prefill_cache(client, tmp_path, monkeypatch):
+    from store import PredictionStore
+    
+    store = PredictionStore(str(tmp_path / 'predictions.db'), flush_seconds=0.01)
+    monkeypatch.setattr(api_app, 'prediction_store', store)
+    text = 'Store test: city council approves new transit budget'
+    assert client.post('/predict', json={'text': text}).status_code == 200
+    assert client.post('/predict/batch', json={'texts': [text, 'Another stored article']}).status_code == 200
+    store.flush()
+    assert store.count() == 3
+    assert client.get('/health').get_json()['store']['written'] == 3
+    
+    # Après un redémarrage (cache vide), la prédiction est servie depuis l'historique
+    api_app.prediction_cache.clear()
+    assert api_app.prefill_cache() == 2
+    hits = api_app.prediction_cache.stats()['hits']
+    client.post('/predict', json={'text': text})
+    assert api_app.prediction_cache.stats()['hits'] == hits + 1
+    store.close()
+
+
+def test_overloaded_requests_are_rejected_with_retry_after(client, monkeypatch):
+    from governor import ResourceGovernor
+    
+    governor = ResourceGovernor(max_concurrent=1, max_queue=0)
+    monkeypatch.setattr(api_app, 'governor', governor)
+    rejected = api_app.admission_rejected.value('queue')
+    
+    # Le seul créneau d'inférence est occupé et la file n'accepte personne
+    with governor.admit():
+        response = client.post('/predict', json={'text': 'Overload test article'})
+        batch = client.post('/predict/batch', json={'texts': ['Overload test article']})
+        # Rien à scorer : pas d'attente d'un créneau
+        invalid = client.post('/predict/batch', json={'texts': ['   ', 42]})
+    assert invalid.status_code == 200 and invalid.get_json()['failed'] == 2
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.get_json()['reason'] == 'queue'
+    assert batch.status_code == 503
+    assert api_app.admission_rejected.value('queue') == rejected + 2
+    
+    assert client.post('/predict', json={'text': 'Overload test article'}).status_code == 200
+    assert client.get('/health').get_json()['governor']['rejected'] == {'queue': 2}
+
+
+def test_editing_session_matches_full_predictions(client):
+    draft = 'Scientists at Harvard Medical School publish a peer-reviewed study on cancer research.'
+    created = client.post('/sessions', json={'text': draft})
+    assert created.status_code == 201
+    session = created.get_json()['session']
+    assert session['revision'] == 0
+    
+    # Seul le passage modifié est envoyé ; le résultat est celui du texte complet
+    edited = draft.replace('publish a peer-reviewed study', 'HIDE the SHOCKING truth')
+    start = draft.index('publish')
+    response = client.patch(f"/sessions/{session['id']}", json={
+        'revision': 0,
+        'edits': [{'start': start, 'end': start + len('publish a peer-reviewed study'),
+                   'text': 'HIDE the SHOCKING truth'}]
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+    full = client.post('/predict', json={'text': edited}).get_json()
+    assert data['probabilities'] == full['probabilities']
+    assert data['prediction'] == full['prediction']
+    assert data['text_length'] == len(edited)
+    assert data['session']['revision'] == 1
+    assert data['session']['retokenized_chars'] <= len(edited)
+    
+    # Révision périmée, modification invalide, session fermée
+    stale = client.patch(f"/sessions/{session['id']}", json={'revision': 0, 'edits': []})
+    assert stale.status_code == 409 and stale.get_json()['revision'] == 1
+    invalid = client.patch(f"/sessions/{session['id']}", json={'edits': [{'start': 0, 'end': 10 ** 6}]})
+    assert invalid.status_code == 400
+    assert client.get('/health').get_json()['sessions']['active'] >= 1
+    assert client.delete(f"/sessions/{session['id']}").status_code == 204
+    assert client.patch(f"/sessions/{session['id']}", json={'edits': []}).status_code == 404
+
+
+def test_fields_limit_json_results(client):
+    response = client.post('/predict/batch', json={
+        'texts': ['Scientists publish peer-reviewed study'],
+        'fields': ['prediction_code', 'probabilities']
+    })
+    assert response.status_code == 200
+    result = response.get_json()['results'][0]
+    assert set(result) == {'prediction_code', 'probabilities', 'model_version', 'index', 'id'}
+    
+    single = client.post('/predict', json={'text': 'Scientists publish peer-reviewed study',
+                                           'fields': ['prediction']}).get_json()
+    assert 'text_preview' not in single and 'confidence' not in single
+    assert single['prediction'] in ('Fake News', 'Reliable News')
+    assert client.post('/predict', json={'text': 'x', 'fields': ['text']}).status_code == 400
+
+
+def test_msgpack_batch_returns_columns(client):
+    msgpack = pytest.importorskip('msgpack')
+    texts = ['SHOCKING: Aliens landed in New York City yesterday!!!', '   ',
+             'President announces new economic policy at White House press conference']
+    response = client.post('/predict/batch', data=msgpack.packb({'texts': texts}),
+                           headers={'Content-Type': 'application/msgpack', 'Accept': 'application/msgpack'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/msgpack'
+    data = msgpack.unpackb(response.data)
+    assert (data['count'], data['succeeded'], data['failed']) == (3, 2, 1)
+    assert set(data['columns']) == {'prediction_code', 'probabilities'}
+    assert data['columns']['prediction_code'][1] is None
+    assert data['errors'][0]['index'] == 1
+    
+    # Mêmes verdicts que le JSON, probabilités entre 0 et 1 (flottants sur 4 octets)
+    reference = client.post('/predict/batch', json={'texts': texts}).get_json()['results']
+    for i in (0, 2):
+        assert data['columns']['prediction_code'][i] == reference[i]['prediction_code']
+        reliable = data['columns']['probabilities']['reliable'][i]
+        assert reliable * 100 == pytest.approx(reference[i]['probabilities']['reliable'], abs=0.01)
+        
+    # Réponse MessagePack à une requête JSON, et l'inverse
+    single = msgpack.unpackb(client.post('/predict', json={'text': texts[0]},
+                                         headers={'Accept': 'application/msgpack'}).data)
+    assert set(single) == {'prediction_code', 'probabilities', 'model_version'}
+    assert single['prediction_code'] == reference[0]['prediction_code']
+    assert single['probabilities']['fake'] == data['columns']['probabilities']['fake'][0]
+    assert single['probabilities']['fake'] + single['probabilities']['reliable'] == pytest.approx(1.0)
+    selected = msgpack.unpackb(client.post('/predict', json={'text': texts[0], 'fields': ['confidence', 'text_length']},
+                                           headers={'Accept': 'application/msgpack'}).data)
+    assert selected['text_length'] == len(texts[0])
+    assert 0.5 <= selected['confidence'] <= 1.0
+    as_json = client.post('/predict', data=msgpack.packb({'text': texts[0]}),
+                          headers={'Content-Type': 'application/msgpack'})
+    assert as_json.get_json()['prediction'] == reference[0]['prediction']
+    invalid = client.post('/predict', data=b'\xc1', headers={'Content-Type': 'application/msgpack'})
+    assert invalid.status_code == 400
+
+
+def test_predict_explain_follows_cascade(client, monkeypatch):
+    from cache import PredictionCache
+    from inference import Cascade
+    
+    class SecondStage:
+        """Second étage factice : toujours "Fake News" avec certitude"""
+        def predict(self, text):
+            return 0, (1.0, 0.0)
+            
+    # Bande [0, 1] : tous les textes passent au second étage
+    monkeypatch.setattr(api_app, 'cascade', Cascade(low=0.0, high=1.0))
+    monkeypatch.setattr(api_app, 'bundle', api_app.bundle._replace(second_stage=SecondStage()))
+    monkeypatch.setattr(api_app, 'prediction_cache', PredictionCache(max_size=0))
+    text = 'Reuters reported the council budget vote on Tuesday'
+    plain = client.post('/predict', json={'text': text}).get_json()
+    data = client.post('/predict', json={'text': text, 'explain': 3}).get_json()
+    
+    assert plain['prediction_code'] == data['prediction_code'] == 0
+    assert data['probabilities'] == plain['probabilities']
+    assert data['explanation']['stage'] == 2
+    assert 'note' in data['explanation']
@@ -0,0 +1,122 @@
+"""
+Tests du point d'entrée ASGI (micro-lots) sans serveur HTTP
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+import app as api_app
+import asgi
+from batching import MicroBatcher
+
+
+async def call(method, path, payload=None, content_type=b'application/json', body=None):
+    """Envoie une requête à l'application ASGI et retourne (statut, en-têtes, JSON)"""
+    if body is None:
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+        'headers': [(b'content-type', content_type)], 'server': ('testserver', 80),
+    }
+    messages = []
+    
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+        
+    async def send(message):
+        messages.append(message)
+        
+    await asgi.app(scope, receive, send)
+    headers = dict(messages[0]['headers'])
+    return messages[0]['status'], headers, json.loads(messages[1]['body'])
+
+
+@pytest.fixture(scope='module', autouse=True)
+def models():
+    if api_app.bundle is None:
+        api_app.load_models()
+
+
+def test_predict_schema_matches_flask():
+    text = 'Scientists at Harvard Medical School publish peer-reviewed study on cancer research'
+    expected = api_app.app.test_client().post('/predict', json={'text': text}).get_json()
+    
+    async def scenario():
+        asgi.batcher = MicroBatcher(asgi.score_batch, max_batch_size=8, max_wait_ms=5)
+        result = await call('POST', '/predict', {'text': text})
+        await asgi.batcher.stop()
+        return result
+        
+    status, headers, data = asyncio.run(scenario())
+    assert status == 200
+    assert headers[b'access-control-allow-origin'] == b'*'
+    assert data == expected
+
+
+def test_concurrent_requests_are_batched():
+    texts = [f'Breaking story number {i} about the economy and elections' for i in range(20)]
+    
+    async def scenario():
+        asgi.batcher = MicroBatcher(asgi.score_batch, max_batch_size=8, max_wait_ms=50)
+        responses = await asyncio.gather(*(call('POST', '/predict', {'text': t}) for t in texts))
+        stats = asgi.batcher.stats()
+        await asgi.batcher.stop()
+        return responses, stats
+        
+    responses, stats = asyncio.run(scenario())
+    assert [status for status, _, _ in responses] == [200] * 20
+    assert [data['text_preview'] for _, _, data in responses] == texts
+    assert stats['items'] == 20 and stats['batches'] == 3
+    assert stats['largest_batch'] == 8
+
+
+def test_validation_errors_and_forwarded_routes():
+    async def scenario():
+        asgi.batcher = MicroBatcher(asgi.score_batch)
+        empty = await call('POST', '/predict', {'text': '   '})
+        missing = await call('POST', '/predict', {'body': 'x'})
+        wrong_type = await call('POST', '/predict', {'text': 'x'}, content_type=b'text/plain')
+        health = await call('GET', '/health')
+        await asgi.batcher.stop()
+        return empty, missing, wrong_type, health
+        
+    empty, missing, wrong_type, health = asyncio.run(scenario())
+    assert empty[0] == 400 and missing[0] == 400 and wrong_type[0] == 400
+    assert health[0] == 200
+    assert health[2]['model_loaded'] is True
+    assert 'microbatch' in health[2]
+
+
+def test_fields_and_msgpack_requests():
+    msgpack = pytest.importorskip('msgpack')
+    text = 'Scientists at Harvard Medical School publish peer-reviewed study on cancer research'
+    
+    async def scenario():
+        asgi.batcher = MicroBatcher(asgi.score_batch)
+        selected = await call('POST', '/predict', {'text': text, 'fields': ['prediction_code']})
+        # Corps MessagePack : servi par Flask hors micro-lots, réponse JSON
+        forwarded = await call('POST', '/predict', content_type=b'application/msgpack',
+                               body=msgpack.packb({'text': text}))
+        await asgi.batcher.stop()
+        return selected, forwarded
+        
+    selected, forwarded = asyncio.run(scenario())
+    assert selected[0] == 200 and set(selected[2]) == {'prediction_code', 'model_version'}
+    assert forwarded[0] == 200
+    assert forwarded[2]['prediction_code'] == selected[2]['prediction_code']
+
+
+def test_predict_rejected_when_microbatch_queue_is_full(monkeypatch):
+    from governor import ResourceGovernor
+    
+    monkeypatch.setattr(api_app, 'governor', ResourceGovernor(max_concurrent=1, max_queue=0))
+    status, headers, data = asyncio.run(call('POST', '/predict', {'text': 'Overload test article'}))
+    assert status == 503
+    assert headers[b'retry-after'] == b'1'
+    assert data['reason'] == 'queue'
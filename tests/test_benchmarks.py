@@ -0,0 +1,101 @@
+"""
+Tests des outils de benchmark (référence d'inférence, démarrage, test de charge)
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from bench_inference import compare, make_texts, summarize
+from bench_load import is_saturated, parse_mix, run_step
+from bench_startup import parse_importtime, top_imports
+
+
+def results(**p50):
+    return {'results': {name: {'p50_ms': value} for name, value in p50.items()}}
+
+
+def test_compare_flags_slowdowns_beyond_tolerance():
+    baseline = results(transform=10.0, scorer=1.0, json=0.01)
+    current = results(transform=14.0, scorer=1.2, json=0.03, request=5.0)
+    regressions = compare(current, baseline, tolerance=0.3, min_delta_ms=0.05)
+    
+    # scorer : +20 % toléré ; json : x3 mais écart absolu négligeable ;
+    # request : absent de la référence
+    assert [regression['case'] for regression in regressions] == ['transform']
+    assert regressions[0]['ratio'] == 1.4
+
+
+def test_texts_are_deterministic():
+    vocabulary = ['news', 'report', 'government', 'study']
+    texts = make_texts(vocabulary, 280, 3, seed=1)
+    assert texts == make_texts(vocabulary, 280, 3, seed=1)
+    assert all(len(text) == 280 for text in texts)
+
+
+def test_summarize_percentiles_and_throughput():
+    summary = summarize([1.0] * 98 + [10.0, 20.0], batch_size=4)
+    assert summary['p50_ms'] == 1.0
+    assert summary['p99_ms'] > 10.0
+    assert summary['throughput_per_s'] == round(4 * 1000 / summary['mean_ms'], 1)
+
+
+def test_importtime_parsing_keeps_top_level_imports():
+    lines = [
+        'import time: self [us] | cumulative | imported package',
+        'import time:       120 |        120 |     _json',
+        'import time:       900 |       1020 |   json',
+        'import time:      3000 |       3000 |   sklearn',
+        'import time:       500 |       1520 | app',
+        'unrelated stderr line',
+    ]
+    imports = parse_importtime(lines)
+    assert [(entry['module'], entry['depth']) for entry in imports] == [
+        ('_json', 2), ('json', 1), ('sklearn', 1), ('app', 0)]
+    assert imports[-1]['cumulative_ms'] == 1.52
+    assert [entry['module'] for entry in top_imports(imports, 5)] == ['app']
+
+
+def test_load_mix_is_normalized_and_validated():
+    assert parse_mix('280:3,2000:1') == [(280, 0.75), (2000, 0.25)]
+    for value in ('280:0', '0:1', 'abc'):
+        try:
+            parse_mix(value)
+        except ValueError:
+            continue
+        raise AssertionError(value)
+
+
+def test_saturation_reasons():
+    step = {'offered_rps': 100, 'sent_rps': 100.0, 'throughput_rps': 95.0, 'p99_ms': 40.0, 'error_rate': 0.0}
+    assert is_saturated(step, max_p99_ms=100, max_error_rate=0.01) == []
+    step.update(throughput_rps=60.0, p99_ms=400.0, error_rate=0.05)
+    assert is_saturated(step, max_p99_ms=100, max_error_rate=0.01) == ['throughput', 'p99', 'errors']
+
+
+def test_open_loop_step_counts_statuses():
+    from werkzeug.serving import make_server
+    from werkzeug.wrappers import Request, Response
+    
+    @Request.application
+    def api(request):
+        # Un texte sur deux est refusé
+        return Response('{}', status=400 if b'bad' in request.get_data() else 200)
+        
+    server = make_server('127.0.0.1', 0, api, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        payloads = {10: [b'{"text": "good"}'], 20: [b'{"text": "bad"}']}
+        step = asyncio.run(run_step(f'http://127.0.0.1:{server.port}', payloads, [(10, 0.5), (20, 0.5)],
+                                    rate=200, concurrency=4, duration=0.5))
+    finally:
+        server.shutdown()
+        server.server_close()
+        
+    assert step['sent'] > 20
+    assert step['ok'] + step['errors']['400'] == step['sent']
+    assert 0 < step['error_rate'] < 1
+    assert step['p50_ms'] <= step['p99_ms'] <= step['max_ms']
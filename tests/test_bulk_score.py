@@ -0,0 +1,75 @@
+"""
+Tests du scoring en masse (bulk_score.py)
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import bulk_score
+
+
+ARTICLES = [
+    "Scientists at Harvard Medical School published a peer-reviewed study.",
+    "SHOCKING! Government hiding the truth about aliens, share before deleted!",
+    "The central bank raised interest rates by a quarter point on Tuesday.",
+]
+
+
+def write_jsonl(path, count):
+    with open(path, 'w') as f:
+        for i in range(count):
+            f.write(json.dumps({'id': f'a{i}', 'text': ARTICLES[i % len(ARTICLES)]}) + '\n')
+        f.write('pas du json\n')
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_scores_in_input_order(tmp_path):
+    source, output = tmp_path / 'in.jsonl', tmp_path / 'out.jsonl'
+    write_jsonl(source, 10)
+    bulk_score.main([str(source), '-o', str(output), '--chunk-size', '3', '--workers', '1'])
+    
+    rows = read_jsonl(output)
+    assert [row['row'] for row in rows] == list(range(11))
+    assert rows[0]['id'] == 'a0'
+    assert rows[0]['prediction_code'] in (0, 1)
+    assert abs(rows[0]['probability_fake'] + rows[0]['probability_reliable'] - 1) < 1e-5
+    assert 'error' in rows[-1]
+    assert not os.path.exists(str(output) + '.checkpoint')
+
+
+def test_resume_skips_written_chunks(tmp_path):
+    source, output = tmp_path / 'in.jsonl', tmp_path / 'out.jsonl'
+    write_jsonl(source, 10)
+    bulk_score.main([str(source), '-o', str(output), '--chunk-size', '3', '--workers', '1'])
+    expected = output.read_bytes()
+    
+    # Arrêt simulé après 2 blocs, avec une ligne à moitié écrite
+    written = b''.join(expected.splitlines(keepends=True)[:6])
+    output.write_bytes(written + b'{"row": 6, "id"')
+    with open(str(output) + '.checkpoint', 'w') as f:
+        json.dump({'input': os.path.abspath(source), 'chunk_size': 3, 'chunks_done': 2,
+                   'rows_done': 6, 'output_bytes': len(written)}, f)
+        
+    bulk_score.main([str(source), '-o', str(output), '--chunk-size', '3', '--workers', '1', '--resume'])
+    assert output.read_bytes() == expected
+
+
+def test_in_process_chunks_match_cli(tmp_path):
+    source, output = tmp_path / 'in.jsonl', tmp_path / 'out.jsonl'
+    write_jsonl(source, 10)
+    bulk_score.main([str(source), '-o', str(output), '--chunk-size', '3', '--workers', '1'])
+    
+    with open(source, encoding='utf-8') as stream:
+        chunks = list(bulk_score.iter_scored_chunks(stream, 'jsonl', chunk_size=3,
+                                                    scorer=bulk_score.load_scorer('pickle')))
+    assert [len(rows) for rows in chunks] == [3, 3, 3, 2]
+    rows = [row for chunk in chunks for row in chunk]
+    assert bulk_score.format_rows(rows, 'jsonl') == output.read_text(encoding='utf-8')
+    assert bulk_score.format_rows(rows, 'csv').splitlines()[0] == ','.join(bulk_score.OUTPUT_FIELDS)
@@ -0,0 +1,91 @@
+"""
+Tests du cache de prédictions (LRU, TTL, regroupement des calculs)
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from cache import PredictionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        
+    def __call__(self):
+        return self.now
+
+
+def test_key_ignores_case_and_whitespace():
+    key = PredictionCache.make_key('Breaking  News\n today', 'v1')
+    assert key == PredictionCache.make_key('breaking news today', 'v1')
+    assert key != PredictionCache.make_key('breaking news today', 'v2')
+
+
+def test_long_text_key_normalizes_only_the_beginning():
+    from cache import NORMALIZE_MAX_CHARS
+    
+    body = 'word ' * NORMALIZE_MAX_CHARS
+    assert PredictionCache.make_key('Breaking\tNEWS ' + body, 'v1') == PredictionCache.make_key('breaking news ' + body, 'v1')
+    # La fin d'un texte long compte toujours, au caractère près
+    assert PredictionCache.make_key(body + 'a', 'v1') != PredictionCache.make_key(body + 'b', 'v1')
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_size=2, ttl_seconds=0)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'a' devient le plus récent
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_expiration():
+    clock = FakeClock()
+    cache = PredictionCache(max_size=10, ttl_seconds=5, clock=clock)
+    cache.put('a', 1)
+    clock.now = 4.9
+    assert cache.get('a') == 1
+    clock.now = 5.0
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_concurrent_identical_requests_compute_once():
+    cache = PredictionCache(max_size=10, ttl_seconds=60)
+    calls = []
+    started = threading.Event()
+    
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return 'result'
+        
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+               for _ in range(8)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+        
+    assert len(calls) == 1
+    assert results == ['result'] * 8
+    assert cache.stats()['coalesced'] == 7
+
+
+def test_clear_invalidates():
+    cache = PredictionCache(max_size=10, ttl_seconds=60)
+    cache.put('a', 1)
+    cache.clear()
+    assert cache.get('a') is None
+    assert cache.stats()['invalidations'] == 1
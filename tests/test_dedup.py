@@ -0,0 +1,96 @@
+"""
+Tests de l'index des quasi-doublons (MinHash + LSH)
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from dedup import NearDuplicateIndex, choose_bands
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        
+    def __call__(self):
+        return self.now
+
+
+def make_article(seed, words=300):
+    rng = random.Random(seed)
+    vocabulary = [f'word{i}' for i in range(2000)]
+    return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+
+def syndicated_copy(text):
+    """Même dépêche avec une autre signature et un pied de page"""
+    return 'By Jane Doe, Wire Service. ' + text + ' Copyright 2024 Wire Service. All rights reserved.'
+
+
+def test_choose_bands_keeps_recall_at_threshold():
+    bands, rows = choose_bands(64, 0.8)
+    assert bands * rows == 64
+    assert 1 - (1 - 0.8 ** rows) ** bands >= 0.99
+    assert choose_bands(64, 0.95)[1] > rows
+
+
+def test_syndicated_copy_reuses_verdict():
+    index = NearDuplicateIndex(threshold=0.8)
+    article = make_article(1)
+    index.add('k1', 'article-1', index.signature(article), (1, [0.1, 0.9]), 'v1')
+    index.add('k2', 'article-2', index.signature(make_article(2)), (0, [0.8, 0.2]), 'v1')
+    
+    match = index.lookup(index.signature(syndicated_copy(article)), 'v1')
+    assert match.doc_id == 'article-1'
+    assert match.similarity >= 0.8
+    assert match.verdict == (1, [0.1, 0.9])
+    
+    # Autre article, autre version du modèle, texte trop court : pas de reprise
+    assert index.lookup(index.signature(make_article(3)), 'v1') is None
+    assert index.lookup(index.signature(syndicated_copy(article)), 'v2') is None
+    assert index.signature('Too short to be indexed') is None
+
+
+def test_lookup_batch_matches_earlier_texts_of_the_batch():
+    index = NearDuplicateIndex(threshold=0.8)
+    indexed, article = make_article(1), make_article(2)
+    index.add('k1', 'article-1', index.signature(indexed), (1, [0.1, 0.9]), 'v1')
+    
+    signatures = [index.signature(text) for text in
+                  (article, syndicated_copy(indexed), 'Too short', syndicated_copy(article), make_article(3))]
+    matches = index.lookup_batch(signatures, 'v1')
+    assert matches[0] is None and matches[2] is None and matches[4] is None
+    assert matches[1].doc_id == 'article-1'
+    # La reprise du premier texte du lot reçoit sa position
+    assert matches[3][0] == 0 and matches[3][1] >= 0.8
+    assert index.stats()['hits'] == 2
+
+
+def test_size_and_age_bounds():
+    clock = FakeClock()
+    index = NearDuplicateIndex(max_size=2, ttl_seconds=60, clock=clock)
+    articles = [make_article(seed) for seed in range(3)]
+    for seed, article in enumerate(articles):
+        index.add(seed, seed, index.signature(article), (0, [1.0, 0.0]), 'v1')
+        
+    # Le plus ancien est évincé, ses bandes LSH aussi
+    assert len(index) == 2 and index.stats()['evictions'] == 1
+    assert index.lookup(index.signature(articles[0]), 'v1') is None
+    assert index.lookup(index.signature(articles[2]), 'v1').doc_id == 2
+    
+    clock.now = 61
+    assert index.lookup(index.signature(articles[2]), 'v1') is None
+    assert len(index) == 0 and index.stats()['expirations'] == 2
+    assert not any(index._buckets)
+
+
+def test_disabled_index():
+    index = NearDuplicateIndex(max_size=0)
+    assert index.signature(make_article(1)) is None
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(num_perm=48)
@@ -0,0 +1,67 @@
+"""
+Tests de l'évaluation hors-ligne (evaluate.py)
+"""
+
+import json
+import os
+import random
+import sys
+
+import pytest
+from sklearn import metrics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import evaluate
+
+
+def test_incremental_metrics_match_sklearn():
+    rng = random.Random(7)
+    labels = [rng.randint(0, 1) for _ in range(2000)]
+    reliable = [min(max(rng.gauss(0.3 + 0.4 * label, 0.2), 0.0), 1.0) for label in labels]
+    predictions = [int(p >= 0.5) for p in reliable]
+    
+    # Deux moitiés évaluées séparément puis fusionnées (blocs des workers)
+    first, second = evaluate.Evaluation(), evaluate.Evaluation()
+    for i, (label, prediction, p) in enumerate(zip(labels, predictions, reliable)):
+        (first if i < 1000 else second).add(label, prediction, p)
+    report = first.merge(second).report()
+    
+    assert report['count'] == 2000
+    assert report['accuracy'] == pytest.approx(metrics.accuracy_score(labels, predictions))
+    precision, recall, f1, _ = metrics.precision_recall_fscore_support(labels, predictions, average='weighted')
+    assert report['weighted_avg']['precision'] == pytest.approx(precision)
+    assert report['weighted_avg']['recall'] == pytest.approx(recall)
+    assert report['weighted_avg']['f1'] == pytest.approx(f1)
+    assert report['classes']['Fake News']['support'] == labels.count(0)
+    assert report['confusion_matrix']['matrix'] == metrics.confusion_matrix(labels, predictions).tolist()
+    # AUC sur 1000 bacs : écart de l'ordre des ex aequo d'un même bac
+    assert report['roc_auc'] == pytest.approx(metrics.roc_auc_score(labels, reliable), abs=1e-3)
+    assert report['brier_score'] == pytest.approx(metrics.brier_score_loss(labels, reliable))
+    assert report['roc_curve'][0] == {'threshold': 1.0, 'fpr': 0.0, 'tpr': 0.0}
+    assert (report['roc_curve'][-1]['fpr'], report['roc_curve'][-1]['tpr']) == (1.0, 1.0)
+    assert sum(bucket['count'] for bucket in report['calibration']) == 2000
+
+
+def test_labels_are_normalized():
+    assert [evaluate.parse_label(value) for value in (0, 1, True, '1', ' Fake ', 'Reliable News', 'real')] == \
+        [0, 1, 1, 1, 0, 1, 1]
+    assert evaluate.parse_label('maybe') is None and evaluate.parse_label(2) is None
+
+
+def test_evaluates_labeled_corpus_in_parallel(tmp_path):
+    source, output = tmp_path / 'labeled.jsonl', tmp_path / 'report.json'
+    with open(source, 'w') as f:
+        for i in range(30):
+            f.write(json.dumps({'text': f'Scientists published a peer-reviewed study number {i}.',
+                                'label': 'reliable' if i % 2 else 'fake'}) + '\n')
+        f.write(json.dumps({'text': 'Le texte est là', 'label': 'peut-être'}) + '\n')
+        f.write('pas du json\n')
+    evaluate.main([str(source), '-o', str(output), '--chunk-size', '4', '--workers', '2'])
+    
+    report = json.loads(output.read_text())
+    assert report['count'] == 30 and report['errors'] == 2
+    assert [example['row'] for example in report['error_examples']] == [30, 31]
+    assert report['classes']['Fake News']['support'] == 15
+    assert report['throughput']['workers'] == 2 and report['throughput']['rows_per_s'] > 0
+    assert len(report['meta']['model_version']) == 12
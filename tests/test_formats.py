@@ -0,0 +1,48 @@
+"""
+Tests des formats d'échange (négociation, champs, colonnes MessagePack)
+"""
+
+import os
+import sys
+
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+import formats
+
+
+def accept(header):
+    return parse_accept_header(header, MIMEAccept)
+
+
+def test_negotiation_defaults_to_json(monkeypatch):
+    assert formats.negotiate(accept('')) == formats.JSON
+    assert formats.negotiate(accept('*/*')) == formats.JSON
+    assert formats.negotiate(accept('text/html')) == formats.JSON
+    
+    # Sans la bibliothèque : JSON si le client l'accepte, 406 sinon
+    monkeypatch.setattr(formats, 'msgpack', None)
+    assert formats.negotiate(accept('application/msgpack, application/json;q=0.5')) == formats.JSON
+    assert formats.negotiate(accept('application/msgpack')) is None
+
+
+def test_fields_and_columns():
+    assert formats.parse_fields({}, formats.JSON) == (formats.FIELDS, None)
+    assert formats.parse_fields({}, formats.MSGPACK) == (('prediction_code', 'probabilities'), None)
+    # Ordre canonique, quel que soit l'ordre demandé
+    assert formats.parse_fields({'fields': ['text_length', 'prediction']}, formats.JSON) == (
+        ('prediction', 'text_length'), None)
+    for invalid in ([], 'prediction', ['prediction', 'text']):
+        fields, message = formats.parse_fields({'fields': invalid}, formats.JSON)
+        assert fields is None and 'fields' in message
+        
+    rows = [(0, 'a' * 120, 1, (0.25, 0.75)), (2, 'court', 0, (0.9, 0.1))]
+    table = formats.columns(rows, 3, formats.FIELDS, {0: 'Fake News', 1: 'Reliable News'})
+    assert table['prediction'] == ['Reliable News', None, 'Fake News']
+    assert table['prediction_code'] == [1, None, 0]
+    assert table['confidence'] == [0.75, None, 0.9]
+    assert table['probabilities'] == {'fake': [0.25, None, 0.9], 'reliable': [0.75, None, 0.1]}
+    assert table['text_length'] == [120, None, 5]
+    assert table['text_preview'] == ['a' * 100 + '...', None, 'court']
@@ -0,0 +1,101 @@
+"""
+Tests du gouverneur de ressources (contrôle d'admission des inférences)
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from governor import Overloaded, ResourceGovernor
+
+
+def test_requests_queue_then_are_rejected_when_queue_is_full():
+    governor = ResourceGovernor(max_concurrent=1, max_queue=1, max_wait_seconds=5)
+    started = threading.Event()
+    release = threading.Event()
+    
+    def hold_slot():
+        with governor.admit():
+            started.set()
+            release.wait()
+            
+    holder = threading.Thread(target=hold_slot)
+    holder.start()
+    started.wait()
+    
+    # Le créneau est pris : la deuxième requête attend, la troisième est refusée
+    def wait_for_slot():
+        with governor.admit():
+            pass
+            
+    waiter = threading.Thread(target=wait_for_slot)
+    waiter.start()
+    while governor.stats()['queue_depth'] < 1:
+        time.sleep(0.001)
+    with pytest.raises(Overloaded) as refused:
+        with governor.admit():
+            pass
+    assert refused.value.reason == 'queue'
+    assert refused.value.retry_after >= 1
+    
+    release.set()
+    holder.join()
+    waiter.join()
+    stats = governor.stats()
+    assert stats['admitted'] == 2
+    assert stats['rejected'] == {'queue': 1}
+    assert stats['queue_depth'] == 0
+
+
+def test_estimated_wait_and_timeout_rejections():
+    governor = ResourceGovernor(max_concurrent=1, max_queue=10, max_wait_seconds=0.05)
+    with governor.admit():
+        # Attente estimée : une inférence moyenne de 0,2 s devant la requête
+        governor.mean_service_seconds = 0.2
+        with pytest.raises(Overloaded) as refused:
+            with governor.admit():
+                pass
+        assert (refused.value.reason, refused.value.retry_after) == ('wait', 1)
+        
+        # Estimation favorable mais créneau toujours pris au bout de max_wait_seconds
+        governor.mean_service_seconds = 0.001
+        with pytest.raises(Overloaded) as refused:
+            with governor.admit():
+                pass
+        assert refused.value.reason == 'timeout'
+    assert governor.stats()['rejected'] == {'wait': 1, 'timeout': 1}
+
+
+def test_estimated_wait_counts_texts_of_batches():
+    governor = ResourceGovernor(max_concurrent=1, max_queue=10, max_wait_seconds=0.05)
+    governor.observe(0.001)
+    with governor.admit():
+        # Une requête d'un texte passe, un lot de 100 textes dépasse l'attente maximale
+        with pytest.raises(Overloaded) as refused:
+            with governor.admit(texts=100):
+                pass
+        assert refused.value.reason == 'wait'
+        assert governor.estimated_wait(0, 1) < governor.max_wait_seconds
+
+
+def test_check_for_external_queue_and_disabled_governor():
+    governor = ResourceGovernor(max_concurrent=1, max_queue=8, max_wait_seconds=0.1)
+    governor.observe(0.02)
+    governor.check(queued=3)
+    with pytest.raises(Overloaded) as refused:
+        governor.check(queued=8)
+    assert refused.value.reason == 'queue'
+    with pytest.raises(Overloaded) as refused:
+        governor.check(queued=5)
+    assert refused.value.reason == 'wait'
+    assert governor.stats()['admitted'] == 1
+    
+    disabled = ResourceGovernor(max_concurrent=0)
+    with disabled.admit():
+        disabled.check(queued=10 ** 6)
+    assert disabled.stats()['enabled'] is False
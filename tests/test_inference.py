@@ -0,0 +1,224 @@
+"""
+Tests du moteur d'inférence compilé (parité avec scikit-learn)
+"""
+
+import json
+import os
+import pickle
+import random
+import sys
+
+import numpy as np
+import pytest
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BASE_DIR, 'api'))
+
+from inference import Cascade, LinearScorer, LongTextPolicy, SklearnScorer, compile_scorer
+
+TEXTS = [
+    'SHOCKING: Aliens landed in New York City yesterday!!!',
+    'President announces new economic policy at White House press conference',
+    "UNBELIEVABLE: Doctors don't want you to know this miracle cure!!!",
+    'Scientists at Harvard Medical School publish peer-reviewed study on cancer research',
+    'zzqx qqzz',  # aucun terme du vocabulaire : seul l'intercept compte
+    'Élection présidentielle : le gouvernement annonce 3 nouvelles réformes',
+    'a',
+]
+
+
+@pytest.fixture(scope='module')
+def models():
+    with open(os.path.join(BASE_DIR, 'models', 'fake_news_model.pkl'), 'rb') as f:
+        model = pickle.load(f)
+    with open(os.path.join(BASE_DIR, 'models', 'tfidf_vectorizer.pkl'), 'rb') as f:
+        vectorizer = pickle.load(f)
+    return model, vectorizer, LinearScorer.from_sklearn(vectorizer, model)
+
+
+def random_texts(vectorizer, count=200, seed=0):
+    """Textes synthétiques tirés du vocabulaire, mélangés à des mots inconnus"""
+    rng = random.Random(seed)
+    words = sorted(term for term in vectorizer.vocabulary_ if ' ' not in term)
+    texts = []
+    for _ in range(count):
+        length = rng.randint(1, 400)
+        tokens = [rng.choice(words) if rng.random() < 0.8 else 'oovword%d' % rng.randint(0, 50)
+                  for _ in range(length)]
+        texts.append(' '.join(token.upper() if rng.random() < 0.1 else token for token in tokens))
+    return texts
+
+
+def test_parity_with_sklearn(models):
+    model, vectorizer, scorer = models
+    texts = TEXTS + random_texts(vectorizer)
+    
+    expected_proba = model.predict_proba(vectorizer.transform(texts))
+    expected_labels = model.predict(vectorizer.transform(texts))
+    
+    for text, proba, label in zip(texts, expected_proba, expected_labels):
+        prediction, probabilities = scorer.predict(text)
+        assert prediction == label
+        np.testing.assert_allclose(probabilities, proba, rtol=0, atol=1e-9)
+
+
+def test_predict_batch_preserves_order(models):
+    _, _, scorer = models
+    assert scorer.predict_batch(TEXTS) == [scorer.predict(text) for text in TEXTS]
+
+
+def test_unsupported_configuration(models):
+    model, vectorizer, _ = models
+    vectorizer = pickle.loads(pickle.dumps(vectorizer))
+    vectorizer.sublinear_tf = True
+    with pytest.raises(ValueError):
+        LinearScorer.from_sklearn(vectorizer, model)
+
+
+def test_mapped_artifact_parity(models, tmp_path):
+    from artifact import export_artifact, load_artifact, read_header
+    
+    model, vectorizer, scorer = models
+    path = str(tmp_path / 'model.mmap')
+    export_artifact(scorer, path, 'test-version')
+    
+    assert read_header(path)['format_version'] == 1
+    mapped = load_artifact(path)
+    assert mapped.model_version == 'test-version'
+    assert mapped.n_features == scorer.n_features
+    
+    for text in TEXTS + random_texts(vectorizer, count=50, seed=1):
+        prediction, probabilities = mapped.predict(text)
+        expected_prediction, expected = scorer.predict(text)
+        assert prediction == expected_prediction
+        np.testing.assert_allclose(probabilities, expected, rtol=0, atol=1e-9)
+
+
+def test_windowed_tokenizer_matches_tokenize(models):
+    _, vectorizer, scorer = models
+    text = ' '.join(random_texts(vectorizer, count=20, seed=3))
+    for window_chars in (64, 1000, 16384):
+        assert list(scorer.iter_tokens(text, window_chars=window_chars)) == scorer.tokenize(text)
+
+
+def test_long_text_policy_bounds_work(models):
+    _, vectorizer, scorer = models
+    text = ' '.join(random_texts(vectorizer, count=400, seed=4))
+    
+    # Texte sous le budget : même résultat que le scoring complet
+    prediction, probabilities, details = LongTextPolicy('truncate', 100, 10 ** 6).predict(scorer, text)
+    assert (prediction, probabilities) == scorer.predict(text)
+    assert details['truncated'] is False
+    
+    _, _, details = LongTextPolicy('truncate', 100, 500).predict(scorer, text)
+    assert details == {'mode': 'truncate', 'truncated': True, 'chunks': 1, 'tokens_scored': 500}
+    
+    prediction, probabilities, details = LongTextPolicy('chunk', 100, 1000, 250).predict(scorer, text)
+    assert details['chunks'] == 4 and details['tokens_scored'] == 1000
+    assert abs(sum(probabilities) - 1) < 1e-12
+    
+    # Texte court : aucun traitement particulier
+    assert LongTextPolicy('chunk', 10 ** 6).predict(scorer, text)[2] is None
+
+
+def test_compact_artifact_variants(models, tmp_path):
+    from artifact import export_artifact, load_artifact, read_header
+    
+    _, vectorizer, scorer = models
+    texts = TEXTS + random_texts(vectorizer, count=50, seed=2)
+    for precision, tolerance in (('float32', 1e-6), ('int8', 0.02)):
+        path = str(tmp_path / f'model.{precision}.mmap')
+        export_artifact(scorer, path, 'test-version', precision)
+        compact = load_artifact(path)
+        assert compact.precision == precision
+        assert read_header(path)['format_version'] == (2 if precision == 'int8' else 1)
+        for text in texts:
+            _, probabilities = compact.predict(text)
+            np.testing.assert_allclose(probabilities, scorer.predict(text)[1], rtol=0, atol=tolerance)
+
+
+def test_variant_check_reports_agreement(models, tmp_path):
+    from artifact import check_variants, read_texts
+    
+    _, vectorizer, _ = models
+    path = tmp_path / 'heldout.jsonl'
+    path.write_text('\n'.join(json.dumps({'text': text, 'label': 1}) for text in TEXTS))
+    texts, labels = read_texts(str(path), label_field='label')
+    assert len(texts) == len(TEXTS) and labels == [1] * len(TEXTS)
+    
+    results = check_variants(texts, labels, precisions=['float32'])
+    assert set(results) == {'pickle', 'sklearn', 'mmap-float32'}
+    assert results['mmap-float32']['label_agreement'] == 1.0
+    assert results['mmap-float32']['max_prob_diff'] < 1e-6
+    assert results['pickle']['accuracy'] == results['sklearn']['accuracy']
+
+
+def test_contributions_sum_to_decision(models, tmp_path):
+    from artifact import export_artifact, load_artifact
+    from inference import top_contributions
+    
+    _, vectorizer, scorer = models
+    path = str(tmp_path / 'model.mmap')
+    export_artifact(scorer, path, 'test-version')
+    mapped = load_artifact(path)
+    
+    for text in TEXTS + random_texts(vectorizer, count=20, seed=4):
+        counts = scorer.count_terms(text)
+        contributions = scorer.contributions(counts)
+        assert scorer.intercept + sum(weight for _, weight in contributions) == pytest.approx(scorer.decision(counts))
+        assert dict(mapped.contributions(counts)) == pytest.approx(dict(contributions))
+        
+        positive, negative = top_contributions(contributions, 3)
+        assert len(positive) <= 3 and all(weight > 0 for _, weight in positive)
+        assert [weight for _, weight in negative] == sorted(weight for _, weight in negative)
+        if positive:
+            assert positive[0][1] == max(weight for _, weight in contributions)
+
+
+def test_explain_matches_prediction(models):
+    _, vectorizer, scorer = models
+    policy = LongTextPolicy('chunk', 100, 200, 50)
+    for text in TEXTS + [' '.join(random_texts(vectorizer, count=5, seed=5))]:
+        counts, _ = policy.count(scorer, text) if policy.applies(text) else ([scorer.count_terms(text)], None)
+        prediction, probabilities, _ = policy.explain(scorer, counts)
+        expected_prediction, expected = policy.combine(scorer, counts)
+        assert prediction == expected_prediction
+        np.testing.assert_allclose(probabilities, expected, rtol=0, atol=1e-12)
+
+
+def train_char_model(texts, labels):
+    """Petit modèle à n-grammes de caractères (non compilable) pour le second étage"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    
+    vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 4))
+    model = LogisticRegression().fit(vectorizer.fit_transform(texts), labels)
+    return vectorizer, model
+
+
+def test_cascade_escalates_only_uncertain_texts(models):
+    model, vectorizer, scorer = models
+    assert isinstance(compile_scorer(vectorizer, model), LinearScorer)
+    texts = random_texts(vectorizer, count=60)
+    first = scorer.predict_batch(texts)
+    char_vectorizer, char_model = train_char_model(texts, [prediction for prediction, _ in first])
+    second_stage = compile_scorer(char_vectorizer, char_model)
+    assert isinstance(second_stage, SklearnScorer)
+    
+    cascade = Cascade(low=0.3, high=0.7)
+    uncertain = [cascade.uncertain(probabilities) for _, probabilities in first]
+    results = [cascade.route(second_stage, text, prediction, probabilities)
+               for text, (prediction, probabilities) in zip(texts, first)]
+    for (prediction, probabilities), (final, final_probabilities, stage), escalated in zip(first, results, uncertain):
+        assert stage == (2 if escalated else 1)
+        if not escalated:
+            assert (final, final_probabilities) == (prediction, probabilities)
+        assert abs(sum(final_probabilities) - 1) < 1e-9
+        
+    stats = cascade.stats()
+    assert stats['scored'] == len(texts)
+    assert stats['escalated'] == sum(uncertain)
+    
+    # Sans second étage ou avec une bande vide, le premier étage répond seul
+    assert cascade.route(None, texts[0], *first[0])[2] == 1
+    assert Cascade(low=0.6, high=0.4).route(second_stage, texts[0], 1, (0.5, 0.5))[2] == 1
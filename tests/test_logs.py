@@ -0,0 +1,63 @@
+"""
+Tests de la journalisation structurée (file + thread d'écriture, échantillonnage)
+"""
+
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+import app as api_app
+from config import Config
+from logs import setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def json_logs(capsys):
+    """Journal JSON ; retourne une fonction qui vide la file et lit les lignes écrites"""
+    shutdown_logging()
+    setup_logging('INFO', 'json')
+    
+    def read():
+        shutdown_logging()
+        setup_logging('INFO', 'json')
+        return [json.loads(line) for line in capsys.readouterr().err.splitlines() if line.startswith('{')]
+    
+    yield read
+    shutdown_logging()
+    setup_logging(Config.LOG_LEVEL, Config.LOG_FORMAT)
+
+
+def test_records_are_structured_json(json_logs):
+    logging.getLogger('fcc.test').info("Bonjour", extra={'fields': {'answer': 42}})
+    records = json_logs()
+    assert records[-1]['message'] == 'Bonjour'
+    assert records[-1]['answer'] == 42
+    assert records[-1]['level'] == 'INFO'
+    assert records[-1]['logger'] == 'fcc.test'
+
+
+def test_slow_requests_are_always_logged(json_logs, monkeypatch):
+    monkeypatch.setattr(Config, 'LOG_SAMPLE_RATE', 0.0)
+    monkeypatch.setattr(Config, 'SLOW_REQUEST_MS', 100)
+    api_app.log_request('predict', 200, 0.01, {'text_length': 10})
+    api_app.log_request('predict', 200, 0.25, {'text_length': 50000})
+    
+    records = [record for record in json_logs() if record['logger'] == 'fcc.requests']
+    assert len(records) == 1
+    assert records[0]['level'] == 'WARNING'
+    assert records[0]['duration_ms'] == 250.0
+    assert records[0]['text_length'] == 50000
+
+
+def test_sampling_rate(json_logs, monkeypatch):
+    monkeypatch.setattr(Config, 'LOG_SAMPLE_RATE', 1.0)
+    monkeypatch.setattr(Config, 'SLOW_REQUEST_MS', 10000)
+    for _ in range(3):
+        api_app.log_request('health', 200, 0.001)
+    records = [record for record in json_logs() if record['logger'] == 'fcc.requests']
+    assert [record['level'] for record in records] == ['INFO'] * 3
@@ -0,0 +1,69 @@
+"""
+Tests des métriques Prometheus (module metrics et endpoint /metrics)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+import app as api_app
+from metrics import MetricsRegistry
+
+
+def test_histogram_exposition_is_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('latency_seconds', 'Latence', ['stage'], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, 'score')
+        
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{stage="score",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{stage="score",le="1"} 3' in text
+    assert 'latency_seconds_bucket{stage="score",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{stage="score"} 4' in text
+    assert 'latency_seconds_sum{stage="score"} 3.65' in text
+
+
+def test_counter_labels_are_escaped_and_checked():
+    registry = MetricsRegistry()
+    counter = registry.counter('events_total', 'Événements', ['label'])
+    counter.inc('say "hi"')
+    counter.inc('say "hi"', amount=2)
+    assert 'events_total{label="say \\"hi\\""} 3' in registry.render()
+    with pytest.raises(ValueError):
+        counter.inc()
+
+
+@pytest.fixture(scope='module')
+def client():
+    if api_app.bundle is None:
+        api_app.load_models()
+    return api_app.app.test_client()
+
+
+def test_metrics_endpoint_reports_request_path(client):
+    before = api_app.requests_total.value('predict', '200')
+    fake_before = api_app.predictions_total.value('Fake News')
+    reliable_before = api_app.predictions_total.value('Reliable News')
+    
+    client.post('/predict', json={'text': 'Metrics test: unique article about the city council budget'})
+    client.post('/predict', json={'text': ''})
+    
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    
+    assert api_app.requests_total.value('predict', '200') == before + 1
+    assert api_app.errors_total.value('predict', 'client') >= 1
+    assert (api_app.predictions_total.value('Fake News') + api_app.predictions_total.value('Reliable News')
+            == fake_before + reliable_before + 1)
+    for stage in ('parse', 'vectorize', 'score', 'response'):
+        assert f'fcc_stage_duration_seconds_count{{endpoint="predict",stage="{stage}"}}' in text
+    assert 'fcc_request_size_bytes_bucket{endpoint="predict"' in text
+    assert 'fcc_requests_in_flight 1' in text   # la requête /metrics elle-même
+    assert f'fcc_model_info{{version="{api_app.model_version}"' in text
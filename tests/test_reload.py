@@ -0,0 +1,182 @@
+"""
+Tests des versions publiées et du rechargement à chaud (loader et /admin/reload)
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+import app as api_app
+from config import Config
+from inference import Cascade
+from loader import (MODEL_FILE, SECOND_STAGE_MODEL_FILE, SECOND_STAGE_VECTORIZER_FILE, VECTORIZER_FILE,
+                    current_release, list_releases, load_release, release_dir, set_current_release)
+
+REAL_MODELS_DIR = Config.MODEL_DIR
+
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    """Dossier models/ avec deux versions (liens vers les vrais .pkl) et une version corrompue"""
+    for release in ('v1', 'v2'):
+        (tmp_path / release).mkdir()
+        for name in (MODEL_FILE, VECTORIZER_FILE):
+            os.symlink(os.path.abspath(os.path.join(REAL_MODELS_DIR, name)), tmp_path / release / name)
+    (tmp_path / 'broken').mkdir()
+    (tmp_path / 'broken' / MODEL_FILE).write_bytes(b'not a pickle')
+    (tmp_path / 'broken' / VECTORIZER_FILE).write_bytes(b'not a pickle')
+    set_current_release(str(tmp_path), 'v1')
+    
+    monkeypatch.setattr(Config, 'MODEL_DIR', str(tmp_path))
+    monkeypatch.setattr(Config, 'MODEL_FORMAT', 'pickle')
+    if api_app.bundle is None:
+        api_app.load_models()
+    original = api_app.bundle
+    api_app.activate_bundle(api_app.load_release_bundle())
+    yield str(tmp_path)
+    wait_for_reload()
+    api_app.activate_bundle(original)
+
+
+def wait_for_reload(timeout=30):
+    deadline = time.monotonic() + timeout
+    while api_app.reload_lock.locked() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_release_helpers(models_dir):
+    assert list_releases(models_dir) == ['broken', 'v1', 'v2']
+    assert current_release(models_dir) == 'v1'
+    assert release_dir(models_dir, None) == models_dir
+    with pytest.raises(ValueError):
+        release_dir(models_dir, '../v1')
+    with pytest.raises(FileNotFoundError):
+        release_dir(models_dir, 'missing')
+        
+    set_current_release(models_dir, None)
+    assert current_release(models_dir) is None
+
+
+def test_reload_swaps_release(models_dir):
+    assert api_app.bundle.release == 'v1'
+    set_current_release(models_dir, 'v2')
+    assert api_app.reload_models()
+    wait_for_reload()
+    
+    assert api_app.bundle.release == 'v2'
+    assert api_app.reload_status['state'] == 'idle'
+    health = api_app.app.test_client().get('/health').get_json()
+    assert health['model_release'] == 'v2'
+
+
+def test_failed_reload_keeps_active_release(models_dir):
+    previous = api_app.bundle
+    set_current_release(models_dir, 'broken')
+    assert api_app.reload_models()
+    wait_for_reload()
+    
+    assert api_app.bundle is previous
+    assert api_app.reload_status['state'] == 'failed'
+    assert current_release(models_dir) == 'v1'
+
+
+def test_predictions_report_model_version(models_dir):
+    response = api_app.app.test_client().post('/predict', json={'text': 'Reload test: council budget vote'})
+    assert response.get_json()['model_version'] == api_app.bundle.version
+
+
+def test_admin_reload_requires_token(models_dir, monkeypatch):
+    client = api_app.app.test_client()
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', '')
+    assert client.post('/admin/reload', headers={'X-Admin-Token': ''}).status_code == 403
+    
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', 'secret')
+    assert client.post('/admin/reload', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    
+    headers = {'X-Admin-Token': 'secret'}
+    assert client.post('/admin/reload', json={'version': 'missing'}, headers=headers).status_code == 404
+    assert client.post('/admin/reload', json={'version': '../v1'}, headers=headers).status_code == 400
+    
+    response = client.post('/admin/reload', json={'version': 'v2'}, headers=headers)
+    assert response.status_code == 202
+    wait_for_reload()
+    assert api_app.bundle.release == 'v2'
+
+
+def test_artifact_export_into_release(models_dir, capsys):
+    from artifact import MappedScorer, main
+    
+    assert main(['export', '--release', 'v2', '--precision', 'float32']) == 0
+    assert os.path.exists(os.path.join(models_dir, 'v2', 'fake_news_model.float32.mmap'))
+    bundle = load_release(models_dir, 'v2', model_format='mmap', log=lambda message: None, precision='float32')
+    assert isinstance(bundle.scorer, MappedScorer) and bundle.format == 'mmap-float32'
+    
+    # Sans --release : la version active (v1), qui n'avait pas d'artefact
+    assert load_release(models_dir, model_format='mmap', log=lambda message: None).format == 'pickle'
+    assert main(['export']) == 0
+    assert load_release(models_dir, model_format='mmap', log=lambda message: None).format == 'mmap'
+
+
+def test_release_with_second_stage_enables_cascade(models_dir, monkeypatch):
+    import pickle
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    
+    texts = ['Reuters reported the council budget vote on Tuesday', 'SHOCKING miracle cure they hide!!!']
+    vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 4))
+    model = LogisticRegression().fit(vectorizer.fit_transform(texts), [1, 0])
+    for name, value in ((SECOND_STAGE_MODEL_FILE, model), (SECOND_STAGE_VECTORIZER_FILE, vectorizer)):
+        with open(os.path.join(models_dir, 'v2', name), 'wb') as f:
+            pickle.dump(value, f)
+            
+    # Le second étage entre dans la version : les verdicts en cache ne sont pas repris
+    v1 = load_release(models_dir, 'v1', log=lambda message: None)
+    v2 = load_release(models_dir, 'v2', log=lambda message: None)
+    assert v1.second_stage is None and v2.second_stage is not None
+    assert v2.version != v1.version
+    assert load_release(models_dir, 'v2', log=lambda message: None, second_stage=False).version == v1.version
+    
+    # Bande [0, 1] : tous les textes passent au second étage
+    monkeypatch.setattr(api_app, 'cascade', Cascade(low=0.0, high=1.0))
+    api_app.activate_bundle(api_app.load_release_bundle('v2'))
+    client = api_app.app.test_client()
+    data = client.post('/predict', json={'text': texts[1]}).get_json()
+    assert data['model_version'] == v2.version
+    assert data['probabilities']['fake'] == round(model.predict_proba(vectorizer.transform([texts[1]]))[0][0] * 100, 2)
+    cascade = client.get('/health').get_json()['cascade']
+    assert cascade['escalated'] == cascade['scored'] == 1
+    assert cascade['second_stage'] == 'SklearnScorer'
+
+
+def test_shadow_release_is_scored_after_responses(models_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'SHADOW_RELEASE', 'v2')
+    monkeypatch.setattr(Config, 'SHADOW_SAMPLE_RATE', 1.0)
+    monkeypatch.setattr(api_app, 'shadow', None)
+    api_app.load_shadow()
+    assert api_app.shadow.candidate.release == 'v2'
+    
+    client = api_app.app.test_client()
+    responses = [
+        client.post('/predict', json={'text': 'SHOCKING miracle cure they hide!!!'}),
+        client.post('/predict/batch', json={'texts': ['Reuters reported the council budget vote', 'Aliens landed']}),
+    ]
+    # Rien n'est déposé avant la fin de l'envoi des réponses
+    assert api_app.shadow.stats()['sampled'] == 0
+    for response in responses:
+        response.close()
+    api_app.shadow.flush(timeout=10)
+    
+    # Même modèle des deux côtés : accord total, aucune dérive
+    shadow = client.get('/health').get_json()['shadow']
+    assert (shadow['sampled'], shadow['compared'], shadow['dropped']) == (3, 3, 0)
+    assert shadow['agreement_rate'] == 1.0
+    assert shadow['max_abs_drift'] == 0.0
+    assert 'fcc_shadow_compared_total 3' in client.get('/metrics').get_data(as_text=True)
+    
+    # Changement de version active : statistiques remises à zéro
+    api_app.activate_bundle(api_app.load_release_bundle('v2'))
+    assert api_app.shadow.stats()['compared'] == 0
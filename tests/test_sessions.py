@@ -0,0 +1,123 @@
+"""
+Tests des sessions d'édition (rescoring incrémental d'un brouillon)
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from inference import LinearScorer
+from sessions import DraftScorer, SessionStore, apply_edits, diff_span
+
+WORDS = ['the', 'council', 'voted', 'budget', 'on', 'Tuesday', 'SHOCKING', 'miracle', 'cure', 'they',
+         'hide', 'from', 'you', 'Reuters', 'reported', 'ΑΣ', 'İstanbul', 'a', 'x1', 'don\'t', '!!!']
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    """Scoreur compilé avec trigrammes et mots vides (bords de blocs sur deux tokens)"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    
+    rng = random.Random(0)
+    texts = [' '.join(rng.choice(WORDS) for _ in range(30)) for _ in range(40)]
+    vectorizer = TfidfVectorizer(ngram_range=(1, 3), stop_words=['the', 'on', 'from'])
+    model = LogisticRegression().fit(vectorizer.fit_transform(texts), [i % 2 for i in range(40)])
+    return LinearScorer.from_sklearn(vectorizer, model)
+
+
+def random_text(rng, words):
+    separators = [' ', ' ', ' ', '\n', '. ', ', ', '\t']
+    return ''.join(rng.choice(WORDS) + rng.choice(separators) for _ in range(words))
+
+
+def test_random_edits_match_full_rescore(scorer):
+    rng = random.Random(1)
+    text = random_text(rng, 600)
+    # Petits blocs : les modifications traversent souvent plusieurs blocs
+    draft = DraftScorer(scorer, text, block_chars=64, resync_every=1000)
+    for _ in range(300):
+        start = rng.randrange(len(text) + 1)
+        end = min(len(text), start + rng.choice([0, 0, 1, 2, 15, 200]))
+        replacement = rng.choice(['', ' ', 'x', 'Σ', '\n\n', random_text(rng, rng.randrange(1, 12))])
+        draft.replace(start, end, replacement)
+        text = text[:start] + replacement + text[end:]
+        
+        assert draft.text == text and len(draft) == len(text)
+        expected = scorer.decision(scorer.count_terms(text))
+        assert draft.decision() == pytest.approx(expected, abs=1e-9)
+    assert draft.predict()[0] == scorer.predict(text)[0]
+    
+    # Brouillon vidé puis réécrit
+    draft.replace(0, len(text), '')
+    assert draft.counts == {} and draft.decision() == scorer.intercept
+    draft.replace(0, 0, 'SHOCKING miracle cure')
+    prediction, probabilities = draft.predict()
+    expected_prediction, expected = scorer.predict('SHOCKING miracle cure')
+    assert prediction == expected_prediction and probabilities == pytest.approx(expected)
+
+
+def test_edits_are_validated_before_any_change(scorer):
+    draft = DraftScorer(scorer, 'the council voted')
+    with pytest.raises(ValueError):
+        apply_edits(draft, [{'start': 0, 'end': 3, 'text': 'a'}, {'start': 10, 'end': 99, 'text': ''}])
+    with pytest.raises(ValueError):
+        apply_edits(draft, [{'start': '0', 'end': 3}])
+    with pytest.raises(ValueError):
+        apply_edits(draft, [{'start': 0, 'end': 0, 'text': 'x' * 20}], max_chars=30)
+    assert draft.text == 'the council voted'
+    
+    # Positions relatives au texte déjà modifié
+    apply_edits(draft, [{'start': 0, 'end': 3, 'text': 'a'}, {'start': 9, 'end': 9, 'text': ' then'}])
+    assert draft.text == 'a council then voted'
+    
+    old = 'The council voted the budget on Tuesday.'
+    new = 'The council rejected the budget on Tuesday.'
+    edit = diff_span(old, new)
+    assert edit == {'start': 12, 'end': 14, 'text': 'rejec'}
+    assert old[:edit['start']] + edit['text'] + old[edit['end']:] == new
+    assert diff_span(old, old) is None
+
+
+def test_session_store_evicts_and_expires():
+    clock = FakeClock()
+    store = SessionStore(max_sessions=2, ttl_seconds=10, clock=clock)
+    first = store.create('draft-1', 'v1')
+    second = store.create('draft-2', 'v1')
+    clock.now = 5
+    assert store.get(first.id) is first  # la première devient la plus récente
+    store.create('draft-3', 'v1')
+    assert store.get(second.id) is None
+    assert store.stats()['evictions'] == 1
+    
+    # Expiration après ttl_seconds sans utilisation
+    clock.now = 15.1
+    assert store.get(first.id) is None
+    assert store.stats()['expirations'] == 2
+    assert not store.delete(first.id)
+
+
+def test_mapped_artifact_drafts(scorer, tmp_path):
+    from artifact import export_artifact, load_artifact
+    
+    path = str(tmp_path / 'model.mmap')
+    export_artifact(scorer, path, 'test-version')
+    mapped = load_artifact(path)
+    rng = random.Random(2)
+    text = random_text(rng, 200)
+    draft = DraftScorer(mapped, text, block_chars=64)
+    draft.replace(100, 180, 'SHOCKING miracle cure ')
+    text = text[:100] + 'SHOCKING miracle cure ' + text[180:]
+    assert draft.decision() == pytest.approx(mapped.decision(mapped.count_terms(text)), abs=1e-9)
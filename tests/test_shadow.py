@@ -0,0 +1,104 @@
+"""
+Tests de l'évaluation fantôme (modèle candidat scoré en arrière-plan)
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from shadow import ShadowScorer
+
+Candidate = namedtuple('Candidate', ['scorer', 'version', 'release'])
+
+
+def candidate_predict(candidate, text):
+    """Candidat factice : probabilité « Reliable News » lue dans le texte"""
+    reliable = float(text)
+    return int(reliable >= 0.5), [1 - reliable, reliable], None
+
+
+def test_agreement_drift_and_latency():
+    shadow = ShadowScorer(Candidate(None, 'candidate', 'v2'), candidate_predict, sample_rate=1.0)
+    # (texte = probabilité du candidat, verdict et probabilités du modèle actif)
+    for text, prediction, reliable in (('0.9', 1, 0.8), ('0.2', 0, 0.1), ('0.6', 0, 0.4), ('0.3', 1, 0.7)):
+        assert shadow.submit(text, prediction, [1 - reliable, reliable])
+    shadow.flush(timeout=5)
+    
+    stats = shadow.stats()
+    assert stats['candidate_version'] == 'candidate'
+    assert (stats['sampled'], stats['compared'], stats['dropped']) == (4, 4, 0)
+    assert stats['agreement_rate'] == 0.5
+    assert stats['flips'] == {'fake_to_reliable': 1, 'reliable_to_fake': 1}
+    assert abs(stats['mean_drift'] - 0.0) < 1e-9
+    assert abs(stats['mean_abs_drift'] - 0.2) < 1e-9
+    assert abs(stats['max_abs_drift'] - 0.4) < 1e-9
+    assert stats['candidate_p50_ms'] is not None
+    
+    shadow.reset()
+    assert shadow.stats()['compared'] == 0 and shadow.stats()['agreement_rate'] is None
+
+
+def test_sampling_and_drops_when_queue_is_full():
+    release = threading.Event()
+    started = threading.Event()
+    
+    def slow_predict(candidate, text):
+        started.set()
+        release.wait()
+        return candidate_predict(candidate, text)
+        
+    draws = iter([0.9, 0.1, 0.1, 0.1])
+    shadow = ShadowScorer(Candidate(None, 'candidate', 'v2'), slow_predict, sample_rate=0.5,
+                          workers=1, queue_size=1, rng=lambda: next(draws))
+    # Tirage 0,9 >= 0,5 : prédiction non échantillonnée
+    assert not shadow.submit('0.9', 1, [0.1, 0.9])
+    assert shadow.submit('0.9', 1, [0.1, 0.9])
+    started.wait(5)
+    
+    # Le worker est occupé : un texte attend, le suivant est abandonné sans bloquer
+    assert shadow.submit('0.9', 1, [0.1, 0.9])
+    start = time.perf_counter()
+    assert not shadow.submit('0.9', 1, [0.1, 0.9])
+    assert time.perf_counter() - start < 0.1
+    
+    release.set()
+    shadow.flush(timeout=5)
+    stats = shadow.stats()
+    assert (stats['sampled'], stats['compared'], stats['dropped']) == (3, 2, 1)
+    assert stats['agreement_rate'] == 1.0
+
+
+def test_candidate_errors_are_counted():
+    def broken_predict(candidate, text):
+        raise ValueError('candidat illisible')
+        
+    shadow = ShadowScorer(Candidate(None, 'candidate', 'v2'), broken_predict, sample_rate=1.0)
+    shadow.submit('texte', 1, [0.2, 0.8])
+    shadow.flush(timeout=5)
+    assert (shadow.stats()['errors'], shadow.stats()['compared']) == (1, 0)
+
+
+def test_candidate_waits_for_idle_process():
+    busy = threading.Event()
+    busy.set()
+    shadow = ShadowScorer(Candidate(None, 'candidate', 'v2'), candidate_predict, sample_rate=1.0,
+                          busy=busy.is_set, max_defer_seconds=5)
+    shadow.submit('0.9', 1, [0.1, 0.9])
+    time.sleep(0.05)
+    # Trafic principal en cours : le texte attend
+    assert shadow.stats()['compared'] == 0
+    busy.clear()
+    shadow.flush(timeout=5)
+    assert shadow.stats()['compared'] == 1
+    assert shadow.stats()['mean_defer_ms'] >= 50
+    
+    # Au-delà de max_defer_seconds, le texte est scoré malgré tout
+    busy.set()
+    shadow.max_defer_seconds = 0.01
+    shadow.submit('0.9', 1, [0.1, 0.9])
+    shadow.flush(timeout=5)
+    assert shadow.stats()['compared'] == 2
@@ -0,0 +1,57 @@
+"""
+Tests de l'historique persistant des prédictions (écriture par lots, rétention)
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from cache import text_hash
+from store import PredictionStore
+
+
+def test_records_are_written_in_batches(tmp_path):
+    store = PredictionStore(str(tmp_path / 'predictions.db'), batch_size=50, flush_seconds=0.05)
+    for i in range(120):
+        assert store.record(f'article {i % 40}', 'v1', 'predict', i % 2, [0.25, 0.75], duration_ms=0.5)
+    store.record('long article', 'v2', 'predict_batch', 0, [0.9, 0.1], {'truncated': True})
+    store.close()
+    
+    stats = store.stats()
+    assert stats['written'] == 121 and stats['dropped'] == 0
+    assert stats['batches'] < 121
+    assert store.count() == 121
+    
+    # Dernière prédiction de chaque texte, la plus récente d'abord
+    latest = store.latest('v1', limit=100)
+    assert len(latest) == 40
+    assert latest[0] == (text_hash('Article 39'), 1, [0.25, 0.75], None)
+    assert store.latest('v2', limit=10) == [(text_hash('long article'), 0, [0.9, 0.1], {'truncated': True})]
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    store = PredictionStore(str(tmp_path / 'predictions.db'), queue_size=1, batch_size=1000, flush_seconds=5)
+    start = time.perf_counter()
+    results = [store.record(f'article {i}', 'v1', 'predict', 0, [1.0, 0.0]) for i in range(100)]
+    assert time.perf_counter() - start < 1
+    assert not all(results) and store.stats()['dropped'] > 0
+    store.close()
+
+
+def test_compact_applies_retention(tmp_path):
+    store = PredictionStore(str(tmp_path / 'predictions.db'), flush_seconds=0.01, retention_days=1,
+                            max_rows=5, compact_seconds=0)
+    for i in range(8):
+        store.record(f'article {i}', 'v1', 'predict', 0, [1.0, 0.0])
+    store.flush()
+    assert store.count() == 8
+    
+    # Les 5 lignes les plus récentes sont gardées
+    assert store.compact() == 3
+    assert [digest for digest, *_ in store.latest('v1', 10)][-1] == text_hash('article 3')
+    
+    store.retention_days = 1e-9
+    assert store.compact() == 5 and store.count() == 0
+    store.close()